@@ -0,0 +1 @@
+"""Micro-benchmarks del motor y del diálogo (ver `python -m benchmarks --help`)."""
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from .cases import all_cases
+from .runner import BASELINE_PATH, REFERENCE_CASE, compare, load_baseline, measure, save_baseline
+
+
+def main(argv: list[str] | None = None) -> int:
+	ap = argparse.ArgumentParser(prog="python -m benchmarks", description="Micro-benchmarks del motor y del diálogo")
+	ap.add_argument("--only", default="", help="casos separados por coma (default: todos)")
+	ap.add_argument("--iterations", type=int, default=1000)
+	ap.add_argument("--rounds", type=int, default=5, help="rondas por caso (se reporta la más rápida)")
+	ap.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+	ap.add_argument("--threshold", type=float, default=0.30, help="regresión relativa tolerada (0.30 = 30%%)")
+	ap.add_argument("--record", action="store_true", help="guardar los resultados como nuevo baseline")
+	ap.add_argument("--json", type=Path, default=None, help="escribir resultados en este archivo")
+	args = ap.parse_args(argv)
+
+	only = {n.strip() for n in args.only.split(",") if n.strip()}
+	# El caso de referencia corre siempre: compare lo usa para escalar los tiempos
+	cases = [c for c in all_cases() if not only or c.name in only or c.name == REFERENCE_CASE]
+	results = {}
+	for case in cases:
+		res = measure(case, args.iterations, rounds=args.rounds)
+		results[case.name] = res
+		print(
+			f"{case.name:<24} {res['ops_per_sec']:>12,.1f} ops/s  p50 {res['p50_us']:>9.2f}us  "
+			f"p99 {res['p99_us']:>9.2f}us  mem {res['peak_kb']:>8.1f}KiB"
+		)
+	if args.json is not None:
+		args.json.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+	if args.record:
+		merged = load_baseline(args.baseline) | results
+		save_baseline(merged, args.baseline)
+		print(f"Baseline guardado en {args.baseline}")
+		return 0
+	regressions = compare(results, load_baseline(args.baseline), args.threshold)
+	for line in regressions:
+		print(f"REGRESIÓN {line}", file=sys.stderr)
+	return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
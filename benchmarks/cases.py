@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from typing import Any
+
+from src.dialogue.manager import DialogueManager
+from src.engine import inference
+from src.engine.inference import backward_chain, forward_chain
+from src.engine.kb_loader import load_knowledge_base, reload_knowledge_base
+from src.utils.normalize import extract_pairs
+
+from .runner import REFERENCE_CASE, Case
+from .workloads import fact_sets, messages
+
+
+def _reference(n: int) -> int:
+	# Trabajo fijo de dicts/strings/sort parecido al del motor, sin depender de él
+	d = {f"v{i}": i * 7 % n for i in range(n)}
+	return sum(v for _, v in sorted(d.items(), key=lambda kv: kv[1]) if v % 3)
+
+
+def _calibration() -> Case:
+	return Case(REFERENCE_CASE, _reference, [200])
+
+
+def _no_cache() -> None:
+	inference.configure_inference_cache(maxsize=0)
+
+
+def _forward_cold() -> Case:
+	# Sin cache de inferencia (el default): costo real del motor
+	return Case("forward_chain", forward_chain, fact_sets(500, seed=1), setup=_no_cache)
+
+
+def _forward_cached() -> Case:
+	inputs = fact_sets(200, seed=2)
+
+	def _warm() -> None:
+		inference.configure_inference_cache()
+		for f in inputs:
+			forward_chain(f)
+
+	return Case("forward_chain_cached", forward_chain, inputs, setup=_warm, teardown=_no_cache)
+
+
+def _backward() -> Case:
+	goals = ("crear_aviso", "adjuntar_certificado", "consultar_estado")
+	inputs = [(goals[i % len(goals)], f) for i, f in enumerate(fact_sets(500, seed=3))]
+	return Case("backward_chain", lambda arg: backward_chain(arg[0], arg[1]), inputs, setup=_no_cache)
+
+
+def _backward_slots() -> Case:
+	inputs = [("crear_aviso", f) for f in fact_sets(500, seed=4)]
+	return Case("backward_chain_slots", lambda arg: backward_chain(arg[0], arg[1], infer=False), inputs)
+
+
+def _kb_load() -> Case:
+	return Case("load_knowledge_base", lambda _: load_knowledge_base(), [None], setup=load_knowledge_base)
+
+
+def _kb_reload() -> Case:
+	return Case("reload_knowledge_base", lambda _: reload_knowledge_base(), [None])
+
+
+def _extract() -> Case:
+	return Case("extract_pairs", extract_pairs, messages(500, seed=5))
+
+
+def _dialogue() -> Case:
+	# Sesiones con legajo ya validado: se mide el turno de diálogo, no la base de datos
+	msgs = messages(500, seed=6)
+	state: dict[str, Any] = {}
+
+	def _setup() -> None:
+		mgr = DialogueManager()
+		for i in range(len(msgs)):
+			mgr.set_legajo_validado(f"bench-{i}", "1000")
+		state["mgr"] = mgr
+		state["i"] = 0
+
+	def _turn(msg: str) -> Any:
+		i = state["i"] = state["i"] + 1
+		return state["mgr"].process_message(f"bench-{i % len(msgs)}", msg)
+
+	return Case("process_message", _turn, msgs, setup=_setup)
+
+
+def all_cases() -> list[Case]:
+	return [
+		_calibration(),
+		_forward_cold(),
+		_forward_cached(),
+		_backward(),
+		_backward_slots(),
+		_kb_load(),
+		_kb_reload(),
+		_extract(),
+		_dialogue(),
+	]
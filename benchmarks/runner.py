@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import gc
+import json
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Sequence
+
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+# Métricas comparadas contra el baseline: (clave, True si "más alto es mejor")
+_METRICS = (("ops_per_sec", True), ("p50_us", False), ("p99_us", False), ("peak_kb", False))
+# Diferencias absolutas por debajo de esto son ruido de medición
+_NOISE_FLOOR = {"p50_us": 2.0, "p99_us": 5.0, "peak_kb": 8.0}
+# Caso de calibración (Python puro, sin código del repo): los tiempos absolutos
+# dependen de la máquina, así que compare escala el baseline por cuánto más
+# lento o rápido corre este caso en la corrida actual respecto de cuando se grabó.
+REFERENCE_CASE = "reference"
+_TIME_METRICS = {"ops_per_sec", "p50_us", "p99_us"}
+
+
+@dataclass
+class Case:
+	name: str
+	fn: Callable[[Any], Any]
+	inputs: Sequence[Any]
+	# Preparación fuera de la medición (p.ej. calentar caches o crear sesiones)
+	setup: Callable[[], None] | None = None
+	teardown: Callable[[], None] | None = None
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+	if not sorted_values:
+		return 0.0
+	idx = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+	return sorted_values[idx]
+
+
+def _timed_round(fn: Callable[[Any], Any], inputs: Sequence[Any], iterations: int) -> tuple[float, list[float]]:
+	n_in = len(inputs)
+	lat: list[float] = []
+	clock = time.perf_counter_ns
+	gc.collect()
+	gc_was_enabled = gc.isenabled()
+	gc.disable()
+	try:
+		t_start = clock()
+		for i in range(iterations):
+			arg = inputs[i % n_in]
+			t0 = clock()
+			fn(arg)
+			lat.append(clock() - t0)
+		total_s = (clock() - t_start) / 1e9
+	finally:
+		if gc_was_enabled:
+			gc.enable()
+	lat.sort()
+	return total_s, lat
+
+
+def measure(case: Case, iterations: int, warmup: int = 10, rounds: int = 5) -> dict[str, Any]:
+	"""Corre case.fn sobre sus inputs (cíclicamente) y devuelve las métricas.
+
+	Se hacen `rounds` rondas de `iterations` y se reporta la más rápida (como
+	timeit: el ruido de la máquina solo puede sumar tiempo).
+	- ops_per_sec: iteraciones / tiempo total
+	- p50_us / p99_us: latencia por operación en microsegundos
+	- peak_kb: pico de memoria asignada por operación (tracemalloc, pasada aparte
+	  para no distorsionar los tiempos)
+	"""
+	inputs = case.inputs
+	n_in = len(inputs)
+	if case.setup is not None:
+		case.setup()
+	try:
+		fn = case.fn
+		for i in range(min(warmup, n_in)):
+			fn(inputs[i])
+		total_s, lat = min(
+			(_timed_round(fn, inputs, iterations) for _ in range(max(1, rounds))),
+			key=lambda r: r[0],
+		)
+
+		peak = 0
+		tracemalloc.start()
+		try:
+			for i in range(min(iterations, 50)):
+				tracemalloc.reset_peak()
+				base, _ = tracemalloc.get_traced_memory()
+				fn(inputs[i % n_in])
+				_, top = tracemalloc.get_traced_memory()
+				peak = max(peak, top - base)
+		finally:
+			tracemalloc.stop()
+	finally:
+		if case.teardown is not None:
+			case.teardown()
+
+	return {
+		"iterations": iterations,
+		"ops_per_sec": round(iterations / total_s, 1) if total_s > 0 else 0.0,
+		"p50_us": round(_percentile(lat, 0.50) / 1e3, 2),
+		"p99_us": round(_percentile(lat, 0.99) / 1e3, 2),
+		"peak_kb": round(peak / 1024, 1),
+	}
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> dict[str, Any]:
+	if not path.exists():
+		return {}
+	return json.loads(path.read_text(encoding="utf-8")).get("cases", {})
+
+
+def save_baseline(results: dict[str, dict[str, Any]], path: Path = BASELINE_PATH) -> None:
+	doc = {"cases": results}
+	path.write_text(json.dumps(doc, ensure_ascii=False, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def _machine_scale(results: dict[str, dict[str, Any]], baseline: dict[str, dict[str, Any]]) -> float:
+	now = results.get(REFERENCE_CASE, {}).get("p50_us")
+	then = baseline.get(REFERENCE_CASE, {}).get("p50_us")
+	if not now or not then:
+		return 1.0
+	return now / then
+
+
+def compare(
+	results: dict[str, dict[str, Any]],
+	baseline: dict[str, dict[str, Any]],
+	threshold: float = 0.30,
+) -> list[str]:
+	"""Regresiones respecto del baseline (empeora más que `threshold`, relativo).
+
+	Si ambos tienen el caso REFERENCE_CASE, las métricas de tiempo del baseline se
+	escalan por la razón entre su p50 actual y el grabado, así una máquina más
+	lenta (o más rápida) que la que grabó el baseline no cuenta como regresión.
+	Los casos o métricas sin baseline no se comparan.
+	"""
+	scale = _machine_scale(results, baseline)
+	regressions: list[str] = []
+	for name, cur in results.items():
+		ref = baseline.get(name)
+		if not ref or name == REFERENCE_CASE:
+			continue
+		for key, higher_is_better in _METRICS:
+			old, new = ref.get(key), cur.get(key)
+			if not old or new is None:
+				continue
+			if key in _TIME_METRICS:
+				old = round(old / scale if higher_is_better else old * scale, 2)
+			if abs(new - old) < _NOISE_FLOOR.get(key, 0.0):
+				continue
+			change = (old - new) / old if higher_is_better else (new - old) / old
+			if change > threshold:
+				regressions.append(f"{name}.{key}: {old} → {new} ({change:+.0%} peor)")
+	return regressions
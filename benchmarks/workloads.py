@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import random
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Any, Iterator
+
+from src.persistence.seed_synthetic import _DOC_MAP, _pick_motivo_weighted
+
+
+# Cargas de trabajo realistas: los motivos siguen la misma distribución que los
+# datos sintéticos (seed_synthetic), con fechas/duraciones en rangos similares.
+# Todo es determinista a partir de `seed` para que las corridas sean comparables.
+
+_AREAS = ["producción", "logística", "calidad", "rrhh", "mantenimiento"]
+_VINCULOS = ["padre", "madre", "hijo/a", "cónyuge", "otro"]
+
+
+@contextmanager
+def _seeded(seed: int) -> Iterator[None]:
+	# _pick_motivo_weighted usa el random global: se fija la semilla y se restaura
+	state = random.getstate()
+	random.seed(seed)
+	try:
+		yield
+	finally:
+		random.setstate(state)
+
+
+def fact_sets(n: int, seed: int = 0) -> list[dict[str, Any]]:
+	"""n conjuntos de hechos de avisos (entrada típica de forward/backward chaining)."""
+	today = date.today()
+	out: list[dict[str, Any]] = []
+	with _seeded(seed):
+		for i in range(n):
+			motivo = _pick_motivo_weighted()
+			fi = today - timedelta(days=random.randint(0, 180))
+			facts: dict[str, Any] = {
+				"legajo": str(1000 + random.randint(0, 199)),
+				"motivo": motivo,
+				"fecha_inicio": fi.isoformat(),
+				"duracion_estimdays": random.randint(1, 7),
+				"area": random.choice(_AREAS),
+			}
+			if random.random() < 0.9:
+				facts["empleado_nombre"] = f"Empleado {i}"
+			if motivo == "enfermedad_familiar":
+				facts["vinculo_familiar"] = random.choice(_VINCULOS)
+			doc = _DOC_MAP.get(motivo)
+			if doc is not None:
+				facts["documento_tipo"] = doc
+				if random.random() < 0.7:
+					facts["documento_legible"] = random.random() < 0.8
+					facts["fecha_recepcion"] = (fi + timedelta(days=random.randint(0, 5))).isoformat()
+					facts["plazo_cert_horas"] = 72
+			# Turnos de diálogo intermedios: a veces falta algún slot
+			if random.random() < 0.2:
+				facts.pop(random.choice(["motivo", "fecha_inicio", "duracion_estimdays"]))
+			out.append(facts)
+	return out
+
+
+def messages(n: int, seed: int = 0) -> list[str]:
+	"""n mensajes de usuario con las formas que reconoce extract_pairs."""
+	out: list[str] = []
+	with _seeded(seed):
+		for _ in range(n):
+			motivo = _pick_motivo_weighted()
+			fi = date.today() - timedelta(days=random.randint(0, 30))
+			dias = random.randint(1, 7)
+			kind = random.random()
+			if kind < 0.4:
+				out.append(
+					f"legajo: {1000 + random.randint(0, 199)}\nmotivo: {motivo.replace('_', ' ')}\n"
+					f"fecha_inicio: {fi.strftime('%d/%m/%Y')}\nduracion_estimdays: {dias}"
+				)
+			elif kind < 0.6:
+				out.append(f"me caso el {fi.strftime('%d/%m/%Y')} x{dias}d")
+			elif kind < 0.8:
+				out.append(f"mi legajo es {1000 + random.randint(0, 199)}, son {dias} días")
+			else:
+				out.append(random.choice(["enfermedad", "hoy", "mañana", str(dias), "enf", "x3d"]))
+	return out
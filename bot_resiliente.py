@@ -8,6 +8,8 @@ import asyncio
 import logging
 from src.config import settings
 from src.dialogue.manager import DialogueManager
+from src.dialogue.async_manager import AsyncDialogueManager
+from src.persistence.seed import ensure_schema_once
 
 try:
     from aiogram import Bot, Dispatcher
@@ -23,7 +25,7 @@ except ImportError:
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-dm = DialogueManager()
+dm = AsyncDialogueManager()
 
 class RetryMiddleware(BaseMiddleware):
     async def __call__(self, handler, event: TelegramObject, data: dict):
@@ -42,6 +44,9 @@ async def safe_start_bot():
         print("❌ Falta TELEGRAM_TOKEN en .env")
         return False
     
+    # Esquema de BD una sola vez al arrancar (no por mensaje)
+    ensure_schema_once()
+
     # Configuración más robusta
     bot = Bot(
         token=settings.TELEGRAM_TOKEN,
@@ -84,7 +89,7 @@ async def safe_start_bot():
             
             # Procesamiento con DialogueManager
             session_id = str(user_id)
-            result = dm.process_message(session_id, msg.text)
+            result = await dm.process_message(session_id, msg.text)
             
             reply_text = result.get("reply_text", "✅ Procesado correctamente")
             
@@ -9,7 +9,8 @@ import logging
 from aiohttp import web
 from aiohttp.web_request import Request
 from src.config import settings
-from src.dialogue.manager import DialogueManager
+from src.dialogue.async_manager import AsyncDialogueManager
+from src.persistence.seed import ensure_schema_once
 
 try:
     from aiogram import Bot, Dispatcher, types
@@ -27,13 +28,16 @@ PORT = 8080
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-dm = DialogueManager()
+dm = AsyncDialogueManager()
 
 async def setup_webhook_bot():
     if not settings.TELEGRAM_TOKEN:
         print("❌ Falta TELEGRAM_TOKEN en .env")
         return None, None
     
+    # Esquema de BD una sola vez al arrancar (no por mensaje)
+    ensure_schema_once()
+
     bot = Bot(token=settings.TELEGRAM_TOKEN)
     dp = Dispatcher()
     
@@ -61,7 +65,7 @@ async def setup_webhook_bot():
             
             # Procesamiento normal
             session_id = str(user_id)
-            result = dm.process_message(session_id, msg.text)
+            result = await dm.process_message(session_id, msg.text)
             
             reply = result.get("reply_text", "✅ Procesado")
             if result.get("ask"):
@@ -10,6 +10,15 @@ class Settings(BaseModel):
 	DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./ausencias.db")
 	LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
 	DEMO_EXPORT: bool = os.getenv("DEMO_EXPORT", "false").lower() in ("1", "true", "yes")
+	# Sesiones de diálogo en memoria: máximo de chats vivos y expiración por inactividad
+	SESSION_MAX: int = int(os.getenv("SESSION_MAX", "10000"))
+	SESSION_TTL_S: float = float(os.getenv("SESSION_TTL_S", "21600"))
+	# Persistencia de sesiones: "memory" (default) o "sqlite" (archivo SESSION_DB_PATH)
+	SESSION_BACKEND: str = os.getenv("SESSION_BACKEND", "memory")
+	SESSION_DB_PATH: str = os.getenv("SESSION_DB_PATH", "./sessions.db")
+	# Diálogo fuera del event loop: hilos del pool y tope de mensajes en curso
+	DIALOGUE_WORKERS: int = int(os.getenv("DIALOGUE_WORKERS", "8"))
+	DIALOGUE_MAX_PENDING: int = int(os.getenv("DIALOGUE_MAX_PENDING", "256"))
 
 
 settings = Settings()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from ..config import settings
+from .dispatcher import ChatDispatcher, DispatcherBusy
+from .manager import DialogueManager
+
+
+T = TypeVar("T")
+
+BUSY_REPLY = "Estoy con mucha demanda en este momento. Probá de nuevo en unos segundos."
+
+
+class AsyncDialogueManager:
+	"""Entrada async del diálogo para los handlers de aiogram.
+
+	process_message (motor + SQLAlchemy + lectura de la KB) corre en un pool de
+	hilos acotado, así un chat lento no frena al event loop ni a los demás chats.
+	- Orden por chat: un ChatDispatcher mantiene una cola por chat y procesa sus
+	  mensajes de a uno, en orden de llegada (las ráfagas van en un solo salto al
+	  pool); chats distintos corren en paralelo.
+	- Backpressure: como máximo `max_pending` mensajes en curso o esperando; el
+	  excedente recibe BUSY_REPLY en vez de encolarse sin límite.
+	- Las operaciones sobre la sesión que no son mensajes (set_legajo_validado)
+	  van por la misma cola del chat, así no corren en paralelo con un turno.
+	"""
+
+	def __init__(
+		self,
+		manager: DialogueManager | None = None,
+		*,
+		max_workers: int | None = None,
+		max_pending: int | None = None,
+		max_burst: int = 16,
+	) -> None:
+		self.manager = manager if manager is not None else DialogueManager()
+		self.max_workers = max_workers or settings.DIALOGUE_WORKERS
+		self.max_pending = max_pending or settings.DIALOGUE_MAX_PENDING
+		self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="dialogo")
+		self.dispatcher = ChatDispatcher(self._handle, self._executor, max_pending=self.max_pending, max_burst=max_burst)
+
+	def _handle(self, session_id: str, item: Any) -> Any:
+		# Corre en el pool: un mensaje de texto o una operación sobre la sesión
+		if callable(item):
+			return item(session_id)
+		return self.manager.process_message(session_id, item)
+
+	async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+		"""Ejecuta una función bloqueante en el pool del diálogo."""
+		loop = asyncio.get_running_loop()
+		return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+	async def process_message(self, session_id: str, incoming: str) -> dict[str, Any]:
+		try:
+			return await self.dispatcher.dispatch(str(session_id), incoming)
+		except DispatcherBusy:
+			return {"reply_text": BUSY_REPLY, "busy": True}
+
+	async def set_legajo_validado(self, session_id: str, legajo: str) -> None:
+		"""Marca el legajo validado, en orden con los mensajes del chat.
+
+		Lanza DispatcherBusy si se superó el tope de pendientes.
+		"""
+		await self.dispatcher.dispatch(str(session_id), functools.partial(self.manager.set_legajo_validado, legajo=legajo))
+
+	def metrics(self) -> dict[str, Any]:
+		"""Profundidad de colas, ráfagas agrupadas y rechazos (ver ChatDispatcher)."""
+		return self.dispatcher.metrics() | {"workers": self.max_workers}
+
+	def shutdown(self, wait: bool = True) -> None:
+		self._executor.shutdown(wait=wait)
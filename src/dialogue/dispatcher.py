@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, Callable
+
+
+# Despachador entre el Dispatcher de aiogram y DialogueManager: una cola FIFO por
+# chat y, por chat, a lo sumo un lote en el pool de hilos. Así los mensajes de un
+# mismo chat nunca mutan sess["facts"] en paralelo, pero chats distintos sí corren
+# en paralelo. Si un chat manda una ráfaga mientras se procesa su turno, lo que se
+# acumuló se procesa en un único salto al pool (en orden, una respuesta por mensaje).
+
+
+class DispatcherBusy(RuntimeError):
+	"""Se superó el tope de mensajes encolados del proceso."""
+
+
+class ChatDispatcher:
+	def __init__(
+		self,
+		handler: Callable[[str, Any], Any],
+		executor: Executor,
+		*,
+		max_pending: int = 256,
+		max_burst: int = 16,
+	) -> None:
+		self.handler = handler
+		self.executor = executor
+		self.max_pending = max_pending
+		self.max_burst = max_burst
+		self._queues: dict[str, deque[tuple[Any, asyncio.Future]]] = {}
+		self._tasks: set[asyncio.Task] = set()
+		self._pending = 0  # encolados + en curso
+		self._in_flight = 0
+		self._stats = {"processed": 0, "rejected": 0, "errors": 0, "bursts": 0, "coalesced": 0, "peak_depth": 0, "peak_pending": 0}
+
+	def submit(self, chat_id: str, item: Any) -> asyncio.Future:
+		"""Encola un mensaje del chat; el futuro se resuelve con el resultado del handler."""
+		if self._pending >= self.max_pending:
+			self._stats["rejected"] += 1
+			raise DispatcherBusy(f"{self._pending} mensajes pendientes")
+		chat_id = str(chat_id)
+		loop = asyncio.get_running_loop()
+		fut = loop.create_future()
+		queue = self._queues.get(chat_id)
+		idle = queue is None
+		if idle:
+			queue = self._queues[chat_id] = deque()
+		queue.append((item, fut))
+		self._pending += 1
+		self._stats["peak_depth"] = max(self._stats["peak_depth"], len(queue))
+		self._stats["peak_pending"] = max(self._stats["peak_pending"], self._pending)
+		if idle:
+			task = loop.create_task(self._drain(chat_id, queue))
+			self._tasks.add(task)
+			task.add_done_callback(self._tasks.discard)
+		return fut
+
+	async def dispatch(self, chat_id: str, item: Any) -> Any:
+		return await self.submit(chat_id, item)
+
+	def _run_burst(self, chat_id: str, items: list[Any]) -> list[tuple[bool, Any]]:
+		# Corre en un hilo del pool: los mensajes de la ráfaga, en orden
+		out: list[tuple[bool, Any]] = []
+		for item in items:
+			try:
+				out.append((True, self.handler(chat_id, item)))
+			except Exception as e:
+				out.append((False, e))
+		return out
+
+	async def _drain(self, chat_id: str, queue: deque[tuple[Any, asyncio.Future]]) -> None:
+		loop = asyncio.get_running_loop()
+		burst: list[tuple[Any, asyncio.Future]] = []
+		try:
+			while queue:
+				burst = [queue.popleft() for _ in range(min(len(queue), self.max_burst))]
+				self._stats["bursts"] += 1
+				self._stats["coalesced"] += len(burst) - 1
+				self._in_flight += len(burst)
+				try:
+					outcomes = await loop.run_in_executor(self.executor, self._run_burst, chat_id, [it for it, _ in burst])
+				finally:
+					self._in_flight -= len(burst)
+					self._pending -= len(burst)
+				for (_, fut), (ok, value) in zip(burst, outcomes):
+					if fut.done():
+						continue
+					if ok:
+						self._stats["processed"] += 1
+						fut.set_result(value)
+					else:
+						self._stats["errors"] += 1
+						fut.set_exception(value)
+				burst = []
+		except BaseException:
+			# Cancelación (shutdown): nadie debe quedar esperando para siempre
+			for _, fut in burst + list(queue):
+				if not fut.done():
+					fut.cancel()
+			self._pending -= len(queue)
+			queue.clear()
+			raise
+		finally:
+			# Sin await entre el while y acá: nadie pudo encolar en esta cola vacía
+			self._queues.pop(chat_id, None)
+
+	def depths(self, top: int = 10) -> list[tuple[str, int]]:
+		"""Chats con más mensajes esperando (sin contar el lote en curso)."""
+		return sorted(((c, len(q)) for c, q in self._queues.items()), key=lambda x: -x[1])[:top]
+
+	def metrics(self) -> dict[str, Any]:
+		queued = self._pending - self._in_flight
+		return dict(self._stats) | {
+			"pending": self._pending,
+			"queued": queued,
+			"in_flight": self._in_flight,
+			"active_chats": len(self._queues),
+			"max_depth": max((len(q) for q in self._queues.values()), default=0),
+		}
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any
 import re
 
 from ..utils.normalize import (
@@ -9,8 +9,9 @@ from ..utils.normalize import (
 	parse_date,
 	sanitize_number_of_days,
 	parse_legajo,
+	tokenize,
 )
-from ..engine.inference import backward_chain, forward_chain
+from ..engine.inference import InferenceSession, backward_chain
 from ..engine.kb_loader import load_knowledge_base
 from .prompts import (
 	PROMPTS,
@@ -27,31 +28,38 @@ from .prompts import (
 	msg_error,
 )
 from ..telegram.keyboards import kb_motivos, kb_fecha, kb_dias, kb_si_no, ik_adjuntar
-from ..session_store import get_legajo, set_legajo
+from ..config import settings
+from ..session_backends import SessionBackend
+from ..session_store import SessionStore, get_legajo, get_session_backend, set_legajo
 
 
 class DialogueManager:
-	def __init__(self) -> None:
-		self.sessions: Dict[str, dict[str, Any]] = {}
+	def __init__(self, backend: SessionBackend | None = None) -> None:
+		# "_inference" es reconstruible desde facts: se descarta en sesiones inactivas
+		# y no se persiste
+		self.sessions = SessionStore(
+			maxsize=settings.SESSION_MAX,
+			ttl=settings.SESSION_TTL_S,
+			transient=("_inference",),
+			compact_after=900.0,
+			backend=backend if backend is not None else get_session_backend(),
+			namespace="dialogo",
+		)
 		self._glossary = load_knowledge_base().glossary
 
 	def set_legajo_validado(self, session_id: str, legajo: str) -> None:
 		sess = self._ensure_session(session_id)
 		sess["legajo_validado"] = str(legajo)
+		self.sessions.persist(session_id)
 
 	def _validate_legajo_in_db(self, legajo_digits: str) -> bool:
 		try:
-			from ..persistence.seed import ensure_schema
-			from ..persistence.dao import session_scope
-			from ..persistence.models import Employee
-			ensure_schema()
-			with session_scope() as s:
-				emp = s.query(Employee).filter(Employee.legajo == legajo_digits).first()
-				return bool(emp)
+			from ..persistence.directory import employee_directory
+			return employee_directory().is_valid(legajo_digits)
 		except Exception:
 			return False
 
-	def _maybe_gate_by_legajo(self, session_id: str, facts: dict[str, Any], incoming: str) -> dict[str, Any] | None:
+	def _maybe_gate_by_legajo(self, session_id: str, facts: dict[str, Any], incoming: str, lex: Any = None) -> dict[str, Any] | None:
 		"""Enforces legajo gate: must have a validated 4-digit legajo existing in DB.
 
 		If validated, ensure facts["legajo"] is set and return confirmation on first validation.
@@ -63,7 +71,7 @@ class DialogueManager:
 			facts.setdefault("legajo", sess.get("legajo_validado"))
 			return None
 		# Intentar extraer candidato del mensaje o facts
-		cand = parse_legajo(incoming)
+		cand = parse_legajo(lex if lex is not None else incoming)
 		if not cand:
 			# buscar en facts (puede venir como "L1001" o similar)
 			raw = facts.get("legajo") or ""
@@ -101,18 +109,37 @@ class DialogueManager:
 			sess["ui"] = ui
 			return {"reply_text": "Legajo inválido, intente de nuevo", "ask": ["legajo"]}
 
+	def _infer(self, sess: dict[str, Any], facts: dict[str, Any]) -> dict[str, Any]:
+		"""Forward chaining incremental: reutiliza el estado de inferencia del chat."""
+		inf = sess.get("_inference")
+		if inf is None:
+			inf = sess["_inference"] = InferenceSession()
+		fw = inf.sync(facts)
+		# Reemplazar (no solo actualizar) para descartar derivados ya retractados
+		facts.clear()
+		facts.update(fw["facts"])
+		return fw
+
 	def _ensure_session(self, session_id: str) -> dict[str, Any]:
-		if session_id not in self.sessions:
-			self.sessions[session_id] = {"facts": {}, "goal": None, "ui": {"awaiting": "waiting_legajo"}}
-		return self.sessions[session_id]
+		return self.sessions.get_or_create(
+			session_id, lambda: {"facts": {}, "goal": None, "ui": {"awaiting": "waiting_legajo"}}
+		)
 
 	def process_message(self, session_id: str, incoming: str) -> dict[str, Any]:
+		try:
+			return self._process_message(session_id, incoming)
+		finally:
+			# Write-through (asincrónico) del estado del turno
+			self.sessions.persist(session_id)
+
+	def _process_message(self, session_id: str, incoming: str) -> dict[str, Any]:
 		sess = self._ensure_session(session_id)
 		facts = sess["facts"]
 		ui = sess.get("ui", {"awaiting": None})
 
-		# Extraer hechos del texto
-		delta = extract_pairs(incoming)
+		# Extraer hechos del texto (se tokeniza una sola vez por turno)
+		lex = tokenize(incoming)
+		delta = extract_pairs(lex)
 		facts.update(delta)
 
 		text_l = (incoming or "").strip()
@@ -126,7 +153,7 @@ class DialogueManager:
 				sess["legajo_guardado"] = stored
 
 		# Gate por legajo: obligatorio antes de continuar con cualquier flujo
-		gate = self._maybe_gate_by_legajo(session_id, facts, incoming or "")
+		gate = self._maybe_gate_by_legajo(session_id, facts, incoming or "", lex)
 		if gate is not None:
 			return gate
 
@@ -154,14 +181,14 @@ class DialogueManager:
 			awaiting = ui.get("awaiting")
 			# Estados transitorios de UI
 			if awaiting == "otra_fecha_text":
-				fd = parse_date(text_l)
+				fd = parse_date(lex)
 				if fd:
 					facts["fecha_inicio"] = fd
 					ui["awaiting"] = None
 				else:
 					return {"reply_text": msg_pedir_fecha()}
 			elif awaiting == "dias_otro_numero":
-				d = sanitize_number_of_days(text_l)
+				d = sanitize_number_of_days(lex)
 				if d is not None:
 					facts["duracion_estimdays"] = d
 					ui["awaiting"] = None
@@ -170,8 +197,7 @@ class DialogueManager:
 			elif awaiting == "confirmacion":
 				if text_norm.startswith("confirmar"):
 					try:
-						fw = forward_chain(facts)
-						facts.update(fw["facts"])
+						self._infer(sess, facts)
 						try:
 							from ..persistence.dao import create_aviso
 							res = create_aviso(facts)
@@ -206,11 +232,11 @@ class DialogueManager:
 
 			# Interpretación directa desde texto (atajos/botones simulados)
 			if not facts.get("motivo"):
-				mot = normalize_motivo(text_l)
+				mot = normalize_motivo(lex)
 				if mot:
 					facts["motivo"] = mot
 			if not facts.get("fecha_inicio"):
-				fd = parse_date(text_l)
+				fd = parse_date(lex)
 				if not fd:
 					if "mañana" in text_norm or "manana" in text_norm:
 						fd = parse_date("mañana")
@@ -228,12 +254,12 @@ class DialogueManager:
 					ui["awaiting"] = "dias_otro_numero"
 					return {"reply_text": msg_pedir_dias()}
 				else:
-					d = sanitize_number_of_days(text_l)
+					d = sanitize_number_of_days(lex)
 					if d is not None:
 						facts["duracion_estimdays"] = d
 
 			# Detectar faltantes y usar teclados/mensajes
-			bw = backward_chain("crear_aviso", facts)
+			bw = backward_chain("crear_aviso", facts, infer=False)
 			if bw["status"] == "need_info":
 				tasks = bw["ask"]
 				if "motivo" in tasks:
@@ -252,8 +278,7 @@ class DialogueManager:
 				return {"reply_text": "\n".join(msgs) or "A CONFIRMAR", "ask": tasks}
 
 			# Completo: resumen + confirmación + doc si corresponde
-			fw = forward_chain(facts)
-			facts.update(fw["facts"])
+			fw = self._infer(sess, facts)
 			traces = fw.get("traces", [])
 			traza = ""
 			if traces:
@@ -269,7 +294,7 @@ class DialogueManager:
 
 		# Backward para pedir slots faltantes (otros flujos)
 		if goal in {"adjuntar_certificado", "consultar_estado"}:
-			bw = backward_chain(goal, facts)
+			bw = backward_chain(goal, facts, infer=False)
 			if bw["status"] == "need_info":
 				tasks = bw["ask"]
 				prompt_set = PROMPTS.get(goal, {})
@@ -279,8 +304,7 @@ class DialogueManager:
 				return {"reply_text": "A CONFIRMAR", "ask": ["A CONFIRMAR"]}
 
 		# Forward cuando hay suficiente info (flujo general)
-		fw = forward_chain(facts)
-		facts.update(fw["facts"])
+		fw = self._infer(sess, facts)
 		summary = resumen_corto(facts)
 		traces = fw.get("traces", [])
 		explic = ""
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Any, Callable
+
+
+# Hechos tipados según el `type` del glosario: cada valor se convierte UNA vez al
+# entrar al motor (fechas → date, int → int, boolean → bool) y se vuelve a ISO
+# solo al devolver resultados. Si un valor no se puede convertir queda tal cual
+# (las reglas lo tratarán igual que antes: sin match en comparaciones).
+
+_TRUE = {"true", "si", "sí", "1"}
+_FALSE = {"false", "no", "0"}
+
+
+def _parse_date(value: Any) -> date | None:
+	if value is None:
+		return None
+	if isinstance(value, date) and not isinstance(value, datetime):
+		return value
+	if isinstance(value, str):
+		try:
+			return date.fromisoformat(value)
+		except Exception:
+			return None
+	return None
+
+
+def _to_date(value: Any) -> Any:
+	if isinstance(value, str):
+		d = _parse_date(value)
+		return d if d is not None else value
+	return value
+
+
+def _to_int(value: Any) -> Any:
+	if isinstance(value, bool) or isinstance(value, int):
+		return value
+	if isinstance(value, float) and value.is_integer():
+		return int(value)
+	if isinstance(value, str):
+		txt = value.strip()
+		if txt.lstrip("+-").isdigit():
+			return int(txt)
+	return value
+
+
+def _to_bool(value: Any) -> Any:
+	if isinstance(value, str):
+		txt = value.strip().lower()
+		if txt in _TRUE:
+			return True
+		if txt in _FALSE:
+			return False
+	return value
+
+
+_COERCERS: dict[str, Callable[[Any], Any]] = {
+	"date": _to_date,
+	"int": _to_int,
+	"boolean": _to_bool,
+}
+
+
+def glossary_types(glossary: dict[str, Any]) -> dict[str, str]:
+	"""var → type del glosario."""
+	return {var: spec.get("type", "string") for var, spec in glossary.get("variables", {}).items()}
+
+
+def coerce_value(type_name: str | None, value: Any) -> Any:
+	fn = _COERCERS.get(type_name or "")
+	return fn(value) if fn is not None and value is not None else value
+
+
+def coerce_facts(facts: dict[str, Any], types: dict[str, str]) -> dict[str, Any]:
+	"""Copia de facts con los valores convertidos a su tipo nativo (entrada al motor)."""
+	out: dict[str, Any] = {}
+	for k, v in facts.items():
+		fn = _COERCERS.get(types.get(k, ""))
+		if fn is not None and v is not None:
+			v = fn(v)
+		elif isinstance(v, list):
+			v = list(v)  # el motor hace append en el lugar
+		out[k] = v
+	return out
+
+
+def serialize_value(value: Any) -> Any:
+	if isinstance(value, date) and not isinstance(value, datetime):
+		return value.isoformat()
+	return value
+
+
+def serialize_facts(facts: dict[str, Any], types: dict[str, str]) -> dict[str, Any]:
+	"""Copia de facts con fechas en ISO (salida del motor)."""
+	out: dict[str, Any] = {}
+	for k, v in facts.items():
+		if types.get(k) == "date":
+			v = serialize_value(v)
+		elif isinstance(v, list):
+			v = list(v)
+		out[k] = v
+	return out
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from .facts import coerce_value, glossary_types
+from .kb_loader import KnowledgeBase
+from .network import _make_test
+
+
+# Tablas de requisitos por meta para backward_chain, compiladas desde
+# docs/goals.json. Cada meta es una lista de chequeos de slots (any_of →
+# requires → conditional) que se recorren en orden para armar `ask`; las
+# validaciones de dominio se evalúan después, para cualquier meta conocida.
+
+
+Condition = tuple[str, str | None, Callable[[Any], bool]]  # (var, type, test)
+
+
+@dataclass(frozen=True)
+class GoalTable:
+	name: str
+	any_of: tuple[tuple[str, ...], ...]
+	requires: tuple[str, ...]
+	filled: bool  # True: alcanza con != None/""; False: el valor debe ser truthy
+	conditional: tuple[tuple[tuple[Condition, ...], tuple[str, ...]], ...]
+
+
+@dataclass(frozen=True)
+class Validation:
+	id: str
+	conditions: tuple[Condition, ...]
+	domain_var: str
+	allowed: frozenset[Any]
+	explanation: str
+
+
+@dataclass(frozen=True)
+class GoalTables:
+	goals: dict[str, GoalTable]
+	validations: tuple[Validation, ...]
+	slots: frozenset[str]  # todo lo que miran las metas (para la clave de cache)
+
+
+def _present(value: Any, filled: bool) -> bool:
+	if filled:
+		return value not in (None, "")
+	return bool(value)
+
+
+def _compile_conditions(conds: list[dict[str, Any]], types: dict[str, str]) -> tuple[Condition, ...]:
+	out = []
+	for c in conds or []:
+		type_name = types.get(c["var"])
+		out.append((c["var"], type_name, _make_test(c["op"], c.get("value"), type_name)))
+	return tuple(out)
+
+
+def _matches(conditions: tuple[Condition, ...], facts: dict[str, Any]) -> bool:
+	return all(test(coerce_value(t, facts.get(var))) for var, t, test in conditions)
+
+
+def compile_goals(kb: KnowledgeBase) -> GoalTables:
+	types = glossary_types(kb.glossary)
+	variables = kb.glossary.get("variables", {})
+	doc = kb.goals or {}
+	goals: dict[str, GoalTable] = {}
+	slots: set[str] = set()
+	for name, spec in doc.get("goals", {}).items():
+		conditional = []
+		for cond in spec.get("conditional", []):
+			when = _compile_conditions(cond.get("when", []), types)
+			conditional.append((when, tuple(cond.get("requires", []))))
+			slots.update(var for var, _, _ in when)
+			slots.update(cond.get("requires", []))
+		table = GoalTable(
+			name=name,
+			any_of=tuple(tuple(g) for g in spec.get("any_of", [])),
+			requires=tuple(spec.get("requires", [])),
+			filled=spec.get("presence", "truthy") == "filled",
+			conditional=tuple(conditional),
+		)
+		for group in table.any_of:
+			slots.update(group)
+		slots.update(table.requires)
+		goals[name] = table
+	validations = []
+	for val in doc.get("validations", []):
+		conds = _compile_conditions(val.get("when", []), types)
+		domain_var = val["domain"]
+		validations.append(Validation(
+			id=val["id"],
+			conditions=conds,
+			domain_var=domain_var,
+			allowed=frozenset(variables.get(domain_var, {}).get("values", [])),
+			explanation=val.get("explanation", "A CONFIRMAR"),
+		))
+		slots.update(var for var, _, _ in conds)
+		slots.add(domain_var)
+	return GoalTables(goals=goals, validations=tuple(validations), slots=frozenset(slots))
+
+
+_goals_cache: tuple[KnowledgeBase, GoalTables] | None = None
+
+
+def get_goal_tables(kb: KnowledgeBase) -> GoalTables:
+	"""Devuelve las tablas compiladas para kb (se recompilan solo si cambia la KB)."""
+	global _goals_cache
+	cached = _goals_cache
+	if cached is not None and cached[0] is kb:
+		return cached[1]
+	tables = compile_goals(kb)
+	_goals_cache = (kb, tables)
+	return tables
+
+
+def check_goal(tables: GoalTables, goal: str, facts: dict[str, Any]) -> dict[str, Any] | None:
+	"""Chequeo de slots y dominios de una meta, sin encadenar hacia adelante.
+
+	Devuelve {status: need_info|no_match, ...} o None si la meta está lista.
+	"""
+	table = tables.goals.get(goal)
+	if table is None:
+		# Meta desconocida → A CONFIRMAR
+		return {"status": "no_match", "ask": ["A CONFIRMAR"]}
+	ask: list[str] = []
+	if table.any_of and not any(all(facts.get(s) for s in group) for group in table.any_of):
+		for group in table.any_of:
+			ask.extend(s for s in group if not facts.get(s) and s not in ask)
+	ask.extend(s for s in table.requires if not _present(facts.get(s), table.filled))
+	for when, requires in table.conditional:
+		if _matches(when, facts):
+			ask.extend(s for s in requires if not facts.get(s) and s not in ask)
+	if ask:
+		return {"status": "need_info", "ask": ask}
+	for val in tables.validations:
+		if not _matches(val.conditions, facts):
+			continue
+		value = facts.get(val.domain_var)
+		try:
+			ok = value in val.allowed
+		except TypeError:
+			ok = False
+		if not ok:
+			return {
+				"status": "no_match",
+				"traces": [{
+					"regla_id": val.id,
+					"porque": val.explanation,
+					"hechos_usados": {val.domain_var: value},
+				}],
+			}
+	return None
@@ -1,11 +1,26 @@
 from __future__ import annotations
 
+import heapq
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from datetime import date, datetime, timedelta
-from typing import Any, Callable
+from datetime import date, timedelta
+from itertools import islice
+from types import MappingProxyType
+from typing import Any, Callable, Iterable, Iterator
 
 from .kb_loader import KnowledgeBase, load_knowledge_base
 from .explain import explain_traces
+from .facts import _parse_date, coerce_facts, serialize_facts, serialize_value
+from .goals import GoalTables, check_goal, get_goal_tables
+from .memo import MISS, TTLCache
+from .network import RuleNetwork, get_rule_network
+from .scheduler import Derivation, Schedule, build_schedule
+
+
+# Evaluaciones máximas de un nodo que pertenece a un ciclo de dependencias; fuera
+# de los ciclos cada nodo se evalúa a lo sumo una vez por corrida
+_MAX_CYCLE_EVALS = 10
 
 
 @dataclass
@@ -18,61 +33,29 @@ class Conclusion:
 	porque: str | None = None
 
 
-def _parse_date(value: Any) -> date | None:
-	if value is None:
-		return None
-	if isinstance(value, date) and not isinstance(value, datetime):
-		return value
-	if isinstance(value, str):
-		try:
-			return date.fromisoformat(value)
-		except Exception:
-			return None
-	return None
-
-
-def _compare(op: str, left: Any, right: Any) -> bool:
-	if op == "==":
-		return left == right
-	if op == "!=":
-		return left != right
-	if op == "in":
-		if isinstance(right, (list, tuple, set)):
-			return left in right
-		return False
-	# Soporte numérico y fechas para >= <=
-	if op in {">=", "<="}:
-		l_dt = _parse_date(left)
-		r_dt = _parse_date(right)
-		if l_dt is not None and r_dt is not None:
-			if op == ">=":
-				return l_dt >= r_dt
-			return l_dt <= r_dt
-		try:
-			l = float(left)
-			r = float(right)
-			return l >= r if op == ">=" else l <= r
-		except Exception:
-			return False
-	return False
-
-
-def _apply_action(facts: dict[str, Any], action: dict[str, Any]) -> None:
+def _apply_action(facts: dict[str, Any], action: dict[str, Any]) -> bool:
+	"""Aplica la acción sobre facts. Retorna True si el hecho cambió."""
 	var = action["var"]
 	op = action["op"]
 	val = action.get("value")
 	if op == "set":
+		changed = var not in facts or facts[var] != val
 		facts[var] = val
+		return changed
 	elif op == "append":
 		curr = facts.get(var)
 		if curr is None:
 			facts[var] = [val]
+			return True
 		elif isinstance(curr, list):
 			if val not in curr:
 				curr.append(val)
-			facts[var] = curr
+				return True
+			return False
 		else:
 			facts[var] = [curr, val] if curr != val else [curr]
+			return True
+	return False
 
 
 def _certainties_combine(existing: float | None, new: float) -> float:
@@ -82,13 +65,19 @@ def _certainties_combine(existing: float | None, new: float) -> float:
 	return (existing + new) / 2.0
 
 
-def _derive_helper_states(facts: dict[str, Any]) -> None:
-	# fecha_fin_estimada
-	fi = _parse_date(facts.get("fecha_inicio"))
+def _as_date(value: Any) -> date | None:
+	# Los hechos de tipo date ya llegan convertidos (facts.coerce_facts)
+	return value if type(value) is date else None
+
+
+def _d_fecha_fin(facts: dict[str, Any]) -> None:
+	fi = _as_date(facts.get("fecha_inicio"))
 	days = facts.get("duracion_estimdays")
 	if fi is not None and isinstance(days, int):
-		facts["fecha_fin_estimada"] = (fi + timedelta(days=days)).isoformat()
+		facts["fecha_fin_estimada"] = fi + timedelta(days=days)
+
 
+def _d_estado_certificado(facts: dict[str, Any]) -> None:
 	# estado_certificado según adjunto + documento_legible
 	doc_tipo = facts.get("documento_tipo")
 	adj = facts.get("adjunto_certificado")
@@ -102,15 +91,20 @@ def _derive_helper_states(facts: dict[str, Any]) -> None:
 		else:
 			facts["estado_certificado"] = "pendiente"
 
-	# fuera_de_termino
-	fi = _parse_date(facts.get("fecha_inicio"))
-	fr = _parse_date(facts.get("fecha_recepcion"))
+
+def _d_fuera_de_termino(facts: dict[str, Any]) -> None:
+	fi = _as_date(facts.get("fecha_inicio"))
+	fr = _as_date(facts.get("fecha_recepcion"))
 	plazo_h = facts.get("plazo_cert_horas", 48)
 	if fi and fr and isinstance(plazo_h, int):
-		delta_h = (datetime.combine(fr, datetime.min.time()) - datetime.combine(fi, datetime.min.time())).total_seconds() / 3600.0
+		delta_h = (fr - fi).days * 24.0
 		facts["fuera_de_termino"] = bool(delta_h > plazo_h)
 
+
+def _d_solape(facts: dict[str, Any]) -> None:
 	# Duplicado solapado
+	fi = _as_date(facts.get("fecha_inicio"))
+	days = facts.get("duracion_estimdays")
 	if fi is not None and isinstance(days, int):
 		fin_actual = fi + timedelta(days=days)
 		for a in facts.get("avisos_abiertos", []) or []:
@@ -121,6 +115,8 @@ def _derive_helper_states(facts: dict[str, Any]) -> None:
 					facts["estado_aviso"] = "rechazado"
 					_append_notify(facts, "rrhh")
 
+
+def _d_estado_aviso(facts: dict[str, Any]) -> None:
 	# R-EST-02: Estado final del aviso
 	# - Si hay duplicado/solape (rechazado) o pendiente_validacion → no tocar
 	cur_estado = facts.get("estado_aviso")
@@ -143,6 +139,37 @@ def _derive_helper_states(facts: dict[str, Any]) -> None:
 		facts["estado_aviso"] = "incompleto"
 
 
+# Estados auxiliares derivados por código, con lo que leen/escriben declarado para
+# que el planificador los ordene junto a las reglas
+DERIVATIONS: tuple[Derivation, ...] = (
+	Derivation("D-FECHA-FIN", _d_fecha_fin, frozenset({"fecha_inicio", "duracion_estimdays"}), frozenset({"fecha_fin_estimada"})),
+	Derivation(
+		"D-ESTADO-CERT",
+		_d_estado_certificado,
+		frozenset({"documento_tipo", "adjunto_certificado", "documento_legible"}),
+		frozenset({"estado_certificado"}),
+	),
+	Derivation(
+		"D-FUERA-TERMINO",
+		_d_fuera_de_termino,
+		frozenset({"fecha_inicio", "fecha_recepcion", "plazo_cert_horas"}),
+		frozenset({"fuera_de_termino"}),
+	),
+	Derivation(
+		"D-SOLAPE",
+		_d_solape,
+		frozenset({"fecha_inicio", "duracion_estimdays", "avisos_abiertos", "legajo"}),
+		frozenset({"estado_aviso", "notificar_a"}),
+	),
+	Derivation(
+		"D-ESTADO-AVISO",
+		_d_estado_aviso,
+		frozenset({"estado_aviso", "motivo", "documento_tipo", "estado_certificado"}),
+		frozenset({"estado_aviso"}),
+	),
+)
+
+
 def _append_notify(facts: dict[str, Any], value: str) -> None:
 	notifs = facts.get("notificar_a")
 	if notifs is None:
@@ -154,40 +181,103 @@ def _append_notify(facts: dict[str, Any], value: str) -> None:
 		facts["notificar_a"] = [notifs, value] if notifs != value else [notifs]
 
 
-def forward_chain(facts: dict[str, Any]) -> dict[str, Any]:
-	"""Aplica encadenamiento hacia adelante.
+_MISSING = object()
 
-	Retorna dict con:
-	- facts: estado final de hechos
-	- conclusiones: top-3 por certeza
-	- traces: lista de trazas {regla_id, porque, hechos_usados}
+
+def _copy_value(value: Any) -> Any:
+	# Copia de listas: _append_notify/_apply_action las mutan en el lugar
+	return list(value) if isinstance(value, list) else value
+
+
+_schedule_cache: tuple[RuleNetwork, Schedule] | None = None
+
+
+def _get_schedule(net: RuleNetwork) -> Schedule:
+	global _schedule_cache
+	cached = _schedule_cache
+	if cached is not None and cached[0] is net:
+		return cached[1]
+	sched = build_schedule(net, DERIVATIONS)
+	_schedule_cache = (net, sched)
+	return sched
+
+
+def _run_agenda(
+	sched: Schedule,
+	facts_mut: dict[str, Any],
+	conclusions: dict[str, Conclusion],
+	pending: Iterable[int],
+	alpha: dict[int, bool] | None = None,
+	derive: bool = False,
+) -> dict[str, Any]:
+	"""Ejecuta la agenda (reglas + derivaciones) hasta el punto fijo.
+
+	- pending: nodos a evaluar; se procesan por rango topológico (ver scheduler.py).
+	- Los resultados de cada predicado se memorizan (memoria alfa) y se invalidan
+	  solo cuando cambia la variable que testean. `alpha` permite precargarlos
+	  (p.ej. desde una evaluación columnar).
+	- Al cambiar un hecho se encolan los nodos que lo leen y los que lo escriben con
+	  rango mayor (ante conflictos gana el último en el orden, como en el recorrido
+	  secuencial original).
+	- Las derivaciones solo corren una vez que disparó alguna regla (derive=True
+	  indica que eso ya ocurrió en una corrida previa).
+
+	Retorna {fired, written, derived, derive, fixpoint, ciclos_cortados, evaluaciones}
+	(written: variables que escribieron las reglas disparadas; derived: las que
+	cambió alguna derivación).
 	"""
-	kb: KnowledgeBase = load_knowledge_base()
-	facts_mut = dict(facts)
-	conclusions: dict[str, Conclusion] = {}
-	traces: list[dict[str, Any]] = []
+	net = sched.net
+	n_rules = sched.n_rules
+	rank = sched.rank
+	cyclic = sched.cyclic
+	if alpha is None:
+		alpha = {}
+	queued = set(pending)
+	heap = [(rank[n], n) for n in queued]
+	heapq.heapify(heap)
+	evals: dict[int, int] = {}
+	fired: set[int] = set()
+	written: set[str] = set()
+	derived: set[str] = set()
+	cut: list[str] = []
 
-	# Ciclo fijo (sin bucle infinito): reevaluar hasta estabilidad o límite
-	for _ in range(5):
-		fired_any = False
-		for rule in kb.rules:
-			conds = rule.get("when", [])
+	def _push(node: int) -> None:
+		if node not in queued:
+			queued.add(node)
+			heapq.heappush(heap, (rank[node], node))
+
+	while heap:
+		r, node = heapq.heappop(heap)
+		queued.discard(node)
+		if node >= n_rules and not derive:
+			continue
+		count = evals.get(node, 0) + 1
+		if count > _MAX_CYCLE_EVALS and node in cyclic:
+			# Solo los nodos de un ciclo pueden reevaluarse: se corta el ciclo
+			node_id = sched.node_id(node)
+			if node_id not in cut:
+				cut.append(node_id)
+			continue
+		evals[node] = count
+		changed: set[str] = set()
+		if node < n_rules:
+			rule = net.rules[node]
 			ok = True
-			hechos_usados: dict[str, Any] = {}
-			for c in conds:
-				var = c.get("var")
-				op = c.get("op")
-				val = c.get("value")
-				left = facts_mut.get(var)
-				if not _compare(op, left, val):
+			for pid in rule.conditions:
+				res = alpha.get(pid)
+				if res is None:
+					pred = net.predicates[pid]
+					res = alpha[pid] = pred.test(facts_mut.get(pred.var))
+				if not res:
 					ok = False
 					break
-				hechos_usados[var] = left
 			if not ok:
 				continue
+			hechos_usados = {net.predicates[pid].var: facts_mut.get(net.predicates[pid].var) for pid in rule.conditions}
 			# Acciones
-			for act in rule.get("then", []):
-				_apply_action(facts_mut, act)
+			for act in rule.actions:
+				if _apply_action(facts_mut, act):
+					changed.add(act["var"])
 				certainty = float(act.get("certainty", 1.0))
 				var = act["var"]
 				concl = conclusions.get(var)
@@ -197,91 +287,436 @@ def forward_chain(facts: dict[str, Any]) -> dict[str, Any]:
 					var=var,
 					value=new_val,
 					certainty=new_cert,
-					regla_id=rule.get("id", ""),
+					regla_id=rule.id,
 					hechos_usados=hechos_usados,
-					porque=rule.get("explanation"),
+					porque=rule.explanation,
 				)
-				fired_any = True
-		if fired_any:
-			_derive_helper_states(facts_mut)
+			fired.add(node)
+			written |= rule.writes
+			if not derive:
+				derive = True
+				for d in range(n_rules, n_rules + len(sched.derivations)):
+					_push(d)
 		else:
-			break
+			d = sched.derivations[node - n_rules]
+			before = {v: _copy_value(facts_mut.get(v, _MISSING)) for v in d.writes}
+			d.fn(facts_mut)
+			changed = {v for v in d.writes if facts_mut.get(v, _MISSING) != before[v]}
+			derived |= changed
+		for var in changed:
+			for pid in net.predicates_by_var.get(var, ()):
+				alpha.pop(pid, None)
+			for other in sched.readers_by_var.get(var, ()):
+				if other != node:
+					_push(other)
+			for other in sched.writers_by_var.get(var, ()):
+				if rank[other] > r:
+					_push(other)
+	return {
+		"fired": fired,
+		"written": written,
+		"derived": derived,
+		"derive": derive,
+		"fixpoint": not cut,
+		"ciclos_cortados": cut,
+		"evaluaciones": sum(evals.values()),
+	}
+
 
+def forward_chain(facts: dict[str, Any]) -> dict[str, Any]:
+	"""Aplica encadenamiento hacia adelante.
+
+	Retorna dict con:
+	- facts: estado final de hechos
+	- conclusiones: top-3 por certeza
+	- traces: lista de trazas {regla_id, porque, hechos_usados}
+	- fixpoint: {alcanzado, ciclos_cortados, evaluaciones}
+	"""
+	kb: KnowledgeBase = load_knowledge_base()
+	return _forward_chain_cached(get_rule_network(kb), facts)
+
+
+def _forward_chain_net(net: RuleNetwork, facts: dict[str, Any], alpha: dict[int, bool] | None = None) -> dict[str, Any]:
+	return _forward_chain_typed(net, coerce_facts(facts, net.var_types), alpha)
+
+
+def _forward_chain_typed(net: RuleNetwork, facts_mut: dict[str, Any], alpha: dict[int, bool] | None = None) -> dict[str, Any]:
+	conclusions: dict[str, Conclusion] = {}
+
+	# Agenda inicial: todas las reglas; luego solo los nodos que dependen de hechos modificados
+	report = _run_agenda(_get_schedule(net), facts_mut, conclusions, range(len(net.rules)), alpha)
+
+	return _result(net, facts_mut, conclusions, report)
+
+
+def _result(net: RuleNetwork, facts_mut: dict[str, Any], conclusions: dict[str, Conclusion], report: dict[str, Any]) -> dict[str, Any]:
 	# Top-3 por certeza
 	top3 = sorted(conclusions.values(), key=lambda c: c.certainty, reverse=True)[:3]
 	traces = [
 		{
 			"regla_id": c.regla_id,
 			"porque": c.porque,
-			"hechos_usados": c.hechos_usados,
+			"hechos_usados": {k: serialize_value(v) for k, v in c.hechos_usados.items()},
 		}
 		for c in top3
 	]
 	return {
-		"facts": facts_mut,
+		"facts": serialize_facts(facts_mut, net.var_types),
 		"conclusiones": [c.__dict__ for c in top3],
 		"traces": explain_traces(traces),
+		"fixpoint": {
+			"alcanzado": report["fixpoint"],
+			"ciclos_cortados": list(report["ciclos_cortados"]),
+			"evaluaciones": report["evaluaciones"],
+		},
 	}
 
 
-def backward_chain(goal: str, facts: dict[str, Any]) -> dict[str, Any]:
+# --- Memoización ---
+# forward_chain es función pura de (hechos que el motor lee/escribe, KB). La clave
+# es la forma canónica de esas variables (ya tipadas) y se vacía al recargar la KB.
+# Las que las reglas solo comparan con None (Schedule.null_tested) entran a la
+# clave por presencia, no por valor. El resto de los hechos pasa sin cambios, así
+# que en un hit se combinan con la parte cacheada.
+# Desactivado por defecto: con avisos reales (fechas y legajos distintos) casi no
+# hay hits y el costo de la clave y la copia supera al del motor. Se activa con
+# configure_inference_cache() donde se repitan los mismos hechos.
+
+_cache: TTLCache | None = None
+
+
+def _canon(value: Any) -> Any:
+	if isinstance(value, (list, tuple)):
+		return tuple(_canon(v) for v in value)
+	if isinstance(value, dict):
+		return tuple(sorted((k, _canon(v)) for k, v in value.items()))
+	if isinstance(value, set):
+		return frozenset(_canon(v) for v in value)
+	return value
+
+
+def _fact_key(typed: dict[str, Any], variables: frozenset[str], presence: tuple[str, ...] = ()) -> tuple | None:
+	key = tuple(sorted((k, type(v).__name__, _canon(v)) for k, v in typed.items() if k in variables))
+	if presence:
+		key += tuple(typed.get(k) is not None for k in presence)
+	try:
+		hash(key)
+	except TypeError:  # valores no hasheables: sin cache
+		return None
+	return key
+
+
+class _FrozenList(tuple):
+	"""Lista congelada dentro de una entrada del cache (se distingue de una tupla)."""
+
+	__slots__ = ()
+
+
+def _freeze(value: Any) -> Any:
+	if type(value) is dict:
+		return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+	if type(value) is list:
+		return _FrozenList(_freeze(v) for v in value)
+	if type(value) is tuple:
+		return tuple(_freeze(v) for v in value)
+	if type(value) is set:
+		return frozenset(value)
+	return value
+
+
+def _thaw(value: Any) -> Any:
+	# Los escalares (lo más común) se comparten; solo se rearman los contenedores
+	cls = type(value)
+	if cls is MappingProxyType:
+		return {k: _thaw(v) if type(v) in _FROZEN else v for k, v in value.items()}
+	if cls is _FrozenList:
+		return [_thaw(v) if type(v) in _FROZEN else v for v in value]
+	if cls is tuple:
+		return tuple(_thaw(v) if type(v) in _FROZEN else v for v in value)
+	return value
+
+
+_FROZEN = frozenset({MappingProxyType, _FrozenList, tuple})
+
+
+def _store(result: dict[str, Any], variables: frozenset[str]) -> MappingProxyType:
+	"""Entrada inmutable del cache: el llamador no puede alterarla después."""
+	entry = {k: v for k, v in result.items() if k != "facts"}
+	if "facts" in result:
+		entry["facts"] = {k: v for k, v in result["facts"].items() if k in variables}
+	return _freeze(entry)
+
+
+def _restore(
+	entry: MappingProxyType,
+	typed: dict[str, Any],
+	net: RuleNetwork,
+	variables: frozenset[str],
+	presence: tuple[str, ...] = (),
+) -> dict[str, Any]:
+	out = _thaw(entry)
+	if "facts" in entry:
+		rest = serialize_facts({k: v for k, v in typed.items() if k not in variables}, net.var_types)
+		out["facts"] = rest | out["facts"]
+	if presence:
+		# Las claves por presencia comparten entrada: hechos_usados lleva los valores de este llamador
+		for key, value_of in (("conclusiones", typed.get), ("traces", lambda k: serialize_value(typed.get(k)))):
+			for item in out.get(key, ()):
+				used = item.get("hechos_usados")
+				for k in presence:
+					if used and k in used:
+						used[k] = value_of(k)
+	return out
+
+
+def _cache_vars(sched: Schedule, extra: frozenset[str] = frozenset()) -> tuple[frozenset[str], tuple[str, ...]]:
+	"""(variables de la clave por valor, variables por presencia) para el cache."""
+	presence = sched.null_tested - extra
+	return (sched.variables | extra) - presence, tuple(sorted(presence))
+
+
+def _forward_chain_cached(net: RuleNetwork, facts: dict[str, Any]) -> dict[str, Any]:
+	typed = coerce_facts(facts, net.var_types)
+	cache = _cache
+	if cache is None:
+		return _forward_chain_typed(net, typed)
+	variables, presence = _cache_vars(_get_schedule(net))
+	key = _fact_key(typed, variables, presence)
+	if key is None:
+		return _forward_chain_typed(net, typed)
+	cache.bind(net.fingerprint)
+	hit = cache.get(("fc", key))
+	if hit is not MISS:
+		return _restore(hit, typed, net, variables, presence)
+	res = _forward_chain_typed(net, typed)
+	cache.put(("fc", key), _store(res, variables))
+	return res
+
+
+def configure_inference_cache(maxsize: int = 4096, ttl: float | None = 600.0) -> None:
+	"""Activa (o reemplaza) el cache de inferencia: tamaño máximo y TTL en segundos.
+
+	maxsize=0 lo desactiva (estado inicial del proceso).
+	"""
+	global _cache
+	_cache = TTLCache(maxsize=maxsize, ttl=ttl) if maxsize > 0 else None
+
+
+def clear_inference_cache() -> None:
+	if _cache is not None:
+		_cache.clear()
+
+
+def inference_cache_stats() -> dict[str, Any]:
+	"""hits, misses, evictions, expirations, invalidations (por recarga de KB) y tamaño."""
+	cache = _cache
+	if cache is None:
+		return {"enabled": False}
+	return cache.stats() | {"enabled": True}
+
+
+class InferenceSession:
+	"""Estado de inferencia reutilizable entre turnos de diálogo (uno por chat).
+
+	update(delta) aplica hechos nuevos/modificados y propaga solo sus
+	consecuencias, conservando conclusiones y trazas previas. Cuando el delta
+	invalida algo ya concluido (modifica o quita un hecho existente, o agrega uno
+	que leyó una regla ya disparada) se recalcula desde los hechos base del
+	usuario: sin mantenimiento de verdad, es la única forma de retractar. También
+	se recalcula cuando la propagación toca algo ya concluido (el orden de los
+	append y la combinación de certezas dependen del orden de disparo), así el
+	resultado es siempre el mismo que el de forward_chain sobre los hechos base.
+
+	Cada turno se calcula sobre copias y se confirma al final: si una regla o
+	derivación lanza una excepción, el estado queda como antes del turno.
+	"""
+
+	def __init__(self) -> None:
+		self.facts: dict[str, Any] = {}
+		self.conclusions: dict[str, Conclusion] = {}
+		self._base: dict[str, Any] = {}
+		self._net: RuleNetwork | None = None
+		self._alpha: dict[int, bool] = {}
+		self._supports: set[str] = set()
+		self._fired: set[int] = set()
+		self._order: dict[str, int] = {}  # var → rango de la primera regla que la concluyó
+		self._derive = False
+		self._report: dict[str, Any] = {"fixpoint": True, "ciclos_cortados": [], "evaluaciones": 0}
+		self.stats: dict[str, int] = {"incremental": 0, "full": 0}
+
+	def update(self, delta: dict[str, Any]) -> dict[str, Any]:
+		"""Aplica delta (p.ej. la salida de extract_pairs) y devuelve el resultado
+		con el mismo formato que forward_chain."""
+		return self._update(delta, self._base, self._net)
+
+	def sync(self, facts: dict[str, Any]) -> dict[str, Any]:
+		"""Como update, pero recibe el estado completo del llamador.
+
+		Calcula el delta contra los hechos actuales (los hechos derivados que el
+		llamador ya incorporó no cuentan como cambio) y trata como retractados los
+		hechos base que ya no están.
+		"""
+		base = {k: v for k, v in self._base.items() if k in facts}
+		net = get_rule_network(load_knowledge_base())
+		typed = coerce_facts(facts, net.var_types)
+		delta = {k: v for k, v in typed.items() if self.facts.get(k, _MISSING) != v}
+		# Hechos base retractados: fuerza recálculo
+		return self._update(delta, base, self._net if len(base) == len(self._base) else None)
+
+	def _update(self, delta: dict[str, Any], base: dict[str, Any], prev_net: RuleNetwork | None) -> dict[str, Any]:
+		net = get_rule_network(load_knowledge_base())
+		delta = coerce_facts(delta, net.var_types)
+		changed = {k for k, v in delta.items() if self.facts.get(k, _MISSING) != v}
+		base = base | delta
+		if net is not prev_net or any(k in self.facts or k in self._supports for k in changed):
+			return self._recompute(net, base)
+		if not changed:
+			self._base = base
+			return _result(net, self.facts, self.conclusions, self._report)
+		sched = _get_schedule(net)
+		facts = {k: _copy_value(v) for k, v in self.facts.items()}
+		alpha = dict(self._alpha)
+		for k in changed:
+			facts[k] = _copy_value(delta[k])
+			for pid in net.predicates_by_var.get(k, ()):
+				alpha.pop(pid, None)
+		conclusions = dict(self.conclusions)
+		pending = {node for k in changed for node in sched.readers_by_var.get(k, ())}
+		report = _run_agenda(sched, facts, conclusions, pending, alpha, derive=self._derive)
+		fired = report["fired"]
+		if (
+			fired & self._fired
+			or fired & sched.cyclic
+			or report["written"] & (self.facts.keys() | self._supports)
+			or report["derived"] & self.conclusions.keys()
+		):
+			# La propagación toca algo ya concluido por una regla: el resultado
+			# dependería del orden de disparo. (Que una derivación recalcule su
+			# propio valor no importa: es función de sus entradas.)
+			return self._recompute(net, base)
+		self.stats["incremental"] += 1
+		self._commit(net, base, facts, conclusions, alpha, report, self._fired | fired)
+		return _result(net, self.facts, self.conclusions, self._report)
+
+	def _recompute(self, net: RuleNetwork, base: dict[str, Any]) -> dict[str, Any]:
+		facts = {k: _copy_value(v) for k, v in base.items()}
+		conclusions: dict[str, Conclusion] = {}
+		alpha: dict[int, bool] = {}
+		report = _run_agenda(_get_schedule(net), facts, conclusions, range(len(net.rules)), alpha)
+		self.stats["full"] += 1
+		self._order = {}
+		self._commit(net, base, facts, conclusions, alpha, report, report["fired"])
+		return _result(net, self.facts, self.conclusions, self._report)
+
+	def _commit(
+		self,
+		net: RuleNetwork,
+		base: dict[str, Any],
+		facts: dict[str, Any],
+		conclusions: dict[str, Conclusion],
+		alpha: dict[int, bool],
+		report: dict[str, Any],
+		fired: set[int],
+	) -> None:
+		rank = _get_schedule(net).rank
+		# Conclusiones en el orden de una corrida completa: por la primera regla
+		# (en rango) que concluyó cada variable
+		for var in conclusions:
+			if var not in self._order:
+				self._order[var] = min(rank[ri] for ri in fired if var in net.rules[ri].writes)
+		self.conclusions = {var: conclusions[var] for var in sorted(conclusions, key=self._order.__getitem__)}
+		self.facts = facts
+		self._base = base
+		self._net = net
+		self._alpha = alpha
+		self._fired = fired
+		self._supports = set().union(*(net.rules[ri].reads for ri in fired))
+		self._derive = report["derive"]
+		self._report = report
+
+
+def _forward_chain_chunk(chunk: list[dict[str, Any]]) -> list[dict[str, Any]]:
+	# Worker de proceso: cada proceso usa su propia KB cacheada (se carga una vez)
+	net = get_rule_network(load_knowledge_base())
+	return [_forward_chain_typed(net, coerce_facts(f, net.var_types)) for f in chunk]
+
+
+def forward_chain_batch(
+	facts_iter: Iterable[dict[str, Any]],
+	*,
+	processes: int | None = None,
+	chunksize: int = 256,
+) -> Iterator[dict[str, Any]]:
+	"""Encadenamiento hacia adelante sobre muchos conjuntos de hechos.
+
+	Generador: devuelve, en el mismo orden de entrada, exactamente lo que
+	devolvería forward_chain(facts) para cada elemento. La KB se carga y compila
+	una sola vez; no pasa por el cache de inferencia (en un lote cada aviso
+	suele ser distinto). Con processes > 1 reparte bloques de `chunksize` en un
+	pool de procesos, manteniendo en vuelo como máximo 2 bloques por proceso.
+	"""
+	if chunksize < 1:
+		raise ValueError("chunksize debe ser >= 1")
+	it = iter(facts_iter)
+	if not processes or processes <= 1:
+		net = get_rule_network(load_knowledge_base())
+		for facts in it:
+			yield _forward_chain_typed(net, coerce_facts(facts, net.var_types))
+		return
+	with ProcessPoolExecutor(max_workers=processes) as pool:
+		in_flight: deque = deque()
+		max_in_flight = processes * 2
+		while True:
+			while len(in_flight) < max_in_flight:
+				chunk = list(islice(it, chunksize))
+				if not chunk:
+					break
+				in_flight.append(pool.submit(_forward_chain_chunk, chunk))
+			if not in_flight:
+				break
+			yield from in_flight.popleft().result()
+
+
+def backward_chain(goal: str, facts: dict[str, Any], *, infer: bool = True) -> dict[str, Any]:
+	"""Backward chaining con memoización (ver _backward_chain).
+
+	Con infer=False solo se chequean slots y dominios de la meta (sin forward
+	chaining ni cache): si está todo devuelve {status: ready}.
+	"""
+	kb = load_knowledge_base()
+	tables = get_goal_tables(kb)
+	if not infer:
+		return check_goal(tables, goal, facts) or {"status": "ready"}
+	cache = _cache
+	if cache is None:
+		return _backward_chain(tables, goal, facts)
+	net = get_rule_network(kb)
+	typed = coerce_facts(facts, net.var_types)
+	variables, presence = _cache_vars(_get_schedule(net), tables.slots)
+	key = _fact_key(typed, variables, presence)
+	if key is None:
+		return _backward_chain(tables, goal, facts)
+	cache.bind(net.fingerprint)
+	hit = cache.get(("bc", goal, key))
+	if hit is not MISS:
+		return _restore(hit, typed, net, variables, presence)
+	res = _backward_chain(tables, goal, facts)
+	cache.put(("bc", goal, key), _store(res, variables))
+	return res
+
+
+def _backward_chain(tables: GoalTables, goal: str, facts: dict[str, Any]) -> dict[str, Any]:
 	"""Backward chaining muy simple basado en slots faltantes.
 
+	Los requisitos por meta salen de docs/goals.json (ver goals.py), p.ej.:
 	- crear_aviso: requiere legajo, motivo, fecha_inicio, duracion_estimdays.
 	- adjuntar_certificado: requiere id_aviso o (legajo + fecha_inicio) y adjunto_certificado.
 
 	Devuelve {status: need_info|concluded|no_match, ask?: [slots]}
 	"""
-	# Requisitos por meta (desde docs/Arbol_Dialogo_v1.md)
-	if goal == "crear_aviso":
-		required = ["legajo", "motivo", "fecha_inicio", "duracion_estimdays"]
-		missing = [v for v in required if facts.get(v) in (None, "")]
-		# Regla específica: enfermedad_familiar requiere vinculo_familiar
-		if facts.get("motivo") == "enfermedad_familiar" and not facts.get("vinculo_familiar"):
-			missing.append("vinculo_familiar")
-		if missing:
-			return {"status": "need_info", "ask": missing}
-	elif goal == "adjuntar_certificado":
-		# id_aviso O (legajo y fecha_inicio) + adjunto_certificado
-		id_ok = bool(facts.get("id_aviso"))
-		alt_ok = bool(facts.get("legajo") and facts.get("fecha_inicio"))
-		adj = bool(facts.get("adjunto_certificado"))
-		ask: list[str] = []
-		if not (id_ok or alt_ok):
-			# pedir id_aviso y/o los alternativos
-			if not id_ok:
-				ask.append("id_aviso")
-			if not alt_ok:
-				# ambos porque la alternativa en docs requiere ambas
-				if not facts.get("legajo"):
-					ask.append("legajo")
-				if not facts.get("fecha_inicio"):
-					ask.append("fecha_inicio")
-		if not adj:
-			ask.append("adjunto_certificado")
-		if ask:
-			return {"status": "need_info", "ask": ask}
-	elif goal == "consultar_estado":
-		id_ok = bool(facts.get("id_aviso"))
-		leg_ok = bool(facts.get("legajo"))
-		if not (id_ok or leg_ok):
-			return {"status": "need_info", "ask": ["id_aviso", "legajo"]}
-	else:
-		# Meta desconocida → A CONFIRMAR
-		return {"status": "no_match", "ask": ["A CONFIRMAR"]}
+	res = check_goal(tables, goal, facts)
+	if res is not None:
+		return res
 	# Si está todo, intentar una pasada de forward
-	# Validación de dominio para vinculo_familiar si aplica
-	if facts.get("motivo") == "enfermedad_familiar":
-		valids = {"padre", "madre", "hijo/a", "cónyuge", "otro"}
-		if facts.get("vinculo_familiar") not in valids:
-			return {
-				"status": "no_match",
-				"traces": [{
-					"regla_id": "R-VINC-ENF-FAM",
-					"porque": "A CONFIRMAR: vinculo_familiar fuera de dominio",
-					"hechos_usados": {"vinculo_familiar": facts.get("vinculo_familiar")},
-				}]
-			}
 	fc = forward_chain(facts)
 	return {"status": "concluded", "facts": fc["facts"], "traces": fc["traces"]}
-
@@ -1,21 +1,48 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Literal
+from types import MappingProxyType
+from typing import Any, Literal, Mapping
 
+import hashlib
 import json
+import logging
+import threading
+import time
 
 
 GLOSSARY_PATH = Path(__file__).resolve().parents[2] / "docs" / "glossary.json"
 RULES_PATH = Path(__file__).resolve().parents[2] / "docs" / "rules.json"
+GOALS_PATH = Path(__file__).resolve().parents[2] / "docs" / "goals.json"
+
+
+def _freeze(value: Any) -> Any:
+	"""Copia de solo lectura de un documento JSON: dict → MappingProxyType, list → tuple."""
+	if isinstance(value, Mapping):
+		return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+	if isinstance(value, (list, tuple)):
+		return tuple(_freeze(v) for v in value)
+	return value
 
 
 @dataclass(frozen=True)
 class KnowledgeBase:
-	glossary: dict[str, Any]
-	rules: list[dict[str, Any]]
+	"""KB validada. Es compartida por todo el proceso, así que sus colecciones
+	se congelan al construirla (mappings de solo lectura y tuplas)."""
+
+	glossary: Mapping[str, Any]
+	rules: tuple[Mapping[str, Any], ...]
 	version: int
+	# sha256 del contenido de glossary.json + rules.json + goals.json (identifica la instancia cargada)
+	fingerprint: str = ""
+	# Requisitos de slots por meta (goals.json) para backward_chain
+	goals: Mapping[str, Any] = field(default_factory=dict)
+
+	def __post_init__(self) -> None:
+		object.__setattr__(self, "glossary", _freeze(self.glossary))
+		object.__setattr__(self, "rules", _freeze(self.rules))
+		object.__setattr__(self, "goals", _freeze(self.goals))
 
 
 def _validate_glossary(gl: dict[str, Any]) -> None:
@@ -60,17 +87,145 @@ def _validate_rules(rules_doc: dict[str, Any], glossary: dict[str, Any]) -> list
 	return rules
 
 
-def load_knowledge_base() -> KnowledgeBase:
-	"""Carga y valida glossary.json y rules.json.
+def _validate_goals(goals_doc: dict[str, Any], glossary: dict[str, Any]) -> dict[str, Any]:
+	if not isinstance(goals_doc, dict) or not isinstance(goals_doc.get("goals"), dict):
+		raise ValueError("goals.json inválido: falta 'goals'")
+	variables = glossary["variables"].keys()
+	# Slots que no están en el glosario pero se piden en el diálogo
+	extra_slots = {"id_aviso", "adjunto_certificado"}
 
-	Retorna un objeto KnowledgeBase con reglas y glosario.
-	"""
-	with GLOSSARY_PATH.open("r", encoding="utf-8") as f:
-		glossary = json.load(f)
+	def _check_slots(where: str, slots: Any) -> None:
+		if not isinstance(slots, list):
+			raise ValueError(f"{where}: se esperaba lista de slots")
+		for slot in slots:
+			if slot not in variables and slot not in extra_slots:
+				raise ValueError(f"{where}: slot desconocido {slot}")
+
+	def _check_when(where: str, conds: Any) -> None:
+		for cond in conds or []:
+			if "var" not in cond or "op" not in cond:
+				raise ValueError(f"{where}: condición inválida")
+			if cond["var"] not in variables:
+				raise ValueError(f"{where}: variable desconocida {cond['var']}")
+			if cond["op"] not in {"==", "!=", "in", ">=", "<="}:
+				raise ValueError(f"Operador no soportado en when: {cond['op']}")
+
+	for name, spec in goals_doc["goals"].items():
+		if spec.get("presence", "truthy") not in {"truthy", "filled"}:
+			raise ValueError(f"Meta {name}: 'presence' debe ser truthy o filled")
+		_check_slots(f"Meta {name}", spec.get("requires", []))
+		for group in spec.get("any_of", []):
+			_check_slots(f"Meta {name} (any_of)", group)
+		for cond in spec.get("conditional", []):
+			_check_when(f"Meta {name}", cond.get("when"))
+			_check_slots(f"Meta {name} (conditional)", cond.get("requires", []))
+	for val in goals_doc.get("validations", []):
+		if "id" not in val or val.get("domain") not in variables:
+			raise ValueError("Validación inválida: falta id o 'domain' desconocido")
+		if "values" not in glossary["variables"][val["domain"]]:
+			raise ValueError(f"Validación {val['id']}: '{val['domain']}' sin 'values' en glosario")
+		_check_when(f"Validación {val['id']}", val.get("when"))
+	return goals_doc
+
+
+# --- Cache de proceso ---
+# Una única KnowledgeBase compartida; se reemplaza completa (nunca se muta) cuando
+# cambian los archivos en disco o ante reload_knowledge_base().
+
+_log = logging.getLogger(__name__)
+_lock = threading.Lock()
+_cached_kb: KnowledgeBase | None = None
+_cached_stamp: tuple[tuple[int, int], ...] | None = None
+_stats: dict[str, Any] = {"hits": 0, "reloads": 0, "load_time_s": 0.0, "last_load_s": 0.0}
+
+
+def _files_stamp() -> tuple[tuple[int, int], ...]:
+	"""(mtime_ns, size) de cada archivo fuente; un stat es mucho más barato que parsear."""
+	stamp = []
+	for path in (GLOSSARY_PATH, RULES_PATH, GOALS_PATH):
+		st = path.stat()
+		stamp.append((st.st_mtime_ns, st.st_size))
+	return tuple(stamp)
+
+
+def _read_sources() -> tuple[bytes, bytes, bytes, str]:
+	"""Contenido crudo de glossary/rules/goals y su fingerprint."""
+	gl_raw = GLOSSARY_PATH.read_bytes()
+	rules_raw = RULES_PATH.read_bytes()
+	goals_raw = GOALS_PATH.read_bytes()
+	fingerprint = hashlib.sha256(gl_raw + b"\0" + rules_raw + b"\0" + goals_raw).hexdigest()
+	return gl_raw, rules_raw, goals_raw, fingerprint
+
+
+def _read_knowledge_base(sources: tuple[bytes, bytes, bytes, str] | None = None) -> KnowledgeBase:
+	"""Parsea y valida los archivos (sin cache)."""
+	gl_raw, rules_raw, goals_raw, fingerprint = sources or _read_sources()
+	glossary = json.loads(gl_raw.decode("utf-8"))
 	_validate_glossary(glossary)
-	with RULES_PATH.open("r", encoding="utf-8") as f:
-		rules_doc = json.load(f)
+	rules_doc = json.loads(rules_raw.decode("utf-8"))
 	rules = _validate_rules(rules_doc, glossary)
+	goals = _validate_goals(json.loads(goals_raw.decode("utf-8")), glossary)
 	version = int(rules_doc.get("version", 1))
-	return KnowledgeBase(glossary=glossary, rules=rules, version=version)
+	return KnowledgeBase(glossary=glossary, rules=rules, version=version, fingerprint=fingerprint, goals=goals)
+
+
+def _refresh_locked(stamp: tuple[tuple[int, int], ...], *, strict: bool) -> KnowledgeBase:
+	global _cached_kb, _cached_stamp
+	t0 = time.perf_counter()
+	try:
+		sources = _read_sources()
+		if _cached_kb is not None and sources[3] == _cached_kb.fingerprint:
+			# Solo cambió el mtime (o se forzó la recarga): mismo contenido, sin parsear
+			_cached_stamp = stamp
+			return _cached_kb
+		kb = _read_knowledge_base(sources)
+	except Exception:
+		if strict or _cached_kb is None:
+			raise
+		# Hot reload con archivo inválido (p.ej. a medio escribir): se mantiene la última
+		# versión válida y se reintenta cuando vuelva a cambiar el archivo.
+		_log.warning("KB inválida en disco; se mantiene la versión cargada", exc_info=True)
+		_cached_stamp = stamp
+		return _cached_kb
+	elapsed = time.perf_counter() - t0
+	_stats["load_time_s"] += elapsed
+	_stats["last_load_s"] = elapsed
+	if _cached_kb is not None:
+		_stats["reloads"] += 1
+	_cached_kb = kb
+	_cached_stamp = stamp
+	return _cached_kb
+
+
+def load_knowledge_base() -> KnowledgeBase:
+	"""Devuelve la KnowledgeBase compartida del proceso.
+
+	Solo relee glossary.json/rules.json/goals.json cuando cambia su mtime/tamaño (y el hash
+	del contenido); en el resto de las llamadas retorna la instancia cacheada.
+	La instancia es compartida; glossary/rules/goals son de solo lectura.
+	"""
+	stamp = _files_stamp()
+	kb = _cached_kb
+	if kb is not None and stamp == _cached_stamp:
+		_stats["hits"] += 1
+		return kb
+	with _lock:
+		if _cached_kb is not None and stamp == _cached_stamp:
+			_stats["hits"] += 1
+			return _cached_kb
+		return _refresh_locked(stamp, strict=False)
+
+
+def reload_knowledge_base() -> KnowledgeBase:
+	"""Fuerza la relectura desde disco. Propaga errores de validación."""
+	with _lock:
+		return _refresh_locked(_files_stamp(), strict=True)
+
 
+def kb_cache_stats() -> dict[str, Any]:
+	"""Métricas del cache: hits, reloads, tiempo de carga acumulado y versión vigente."""
+	kb = _cached_kb
+	return dict(_stats) | {
+		"version": kb.version if kb else None,
+		"fingerprint": kb.fingerprint if kb else None,
+	}
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+MISS = object()
+
+
+class TTLCache:
+	"""Cache LRU acotado con expiración por TTL y métricas.
+
+	- maxsize: máximo de entradas (se expulsa la menos usada).
+	- ttl: segundos de vida de cada entrada (None = sin expiración).
+	- bind(generation): si cambia la generación (p.ej. fingerprint de la KB) se
+	  vacía todo el cache.
+	"""
+
+	def __init__(self, maxsize: int = 4096, ttl: float | None = 600.0) -> None:
+		if maxsize < 1:
+			raise ValueError("maxsize debe ser >= 1")
+		self.maxsize = maxsize
+		self.ttl = ttl
+		self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+		self._lock = threading.Lock()
+		self._generation: Hashable = None
+		self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+	def bind(self, generation: Hashable) -> None:
+		if generation == self._generation:
+			return
+		with self._lock:
+			if generation != self._generation:
+				if self._data:
+					self._stats["invalidations"] += 1
+				self._data.clear()
+				self._generation = generation
+
+	def get(self, key: Hashable) -> Any:
+		"""Valor cacheado o MISS."""
+		with self._lock:
+			entry = self._data.get(key)
+			if entry is None:
+				self._stats["misses"] += 1
+				return MISS
+			expires, value = entry
+			if self.ttl is not None and expires < time.monotonic():
+				del self._data[key]
+				self._stats["expirations"] += 1
+				self._stats["misses"] += 1
+				return MISS
+			self._data.move_to_end(key)
+			self._stats["hits"] += 1
+			return value
+
+	def put(self, key: Hashable, value: Any) -> None:
+		expires = time.monotonic() + self.ttl if self.ttl is not None else 0.0
+		with self._lock:
+			self._data[key] = (expires, value)
+			self._data.move_to_end(key)
+			while len(self._data) > self.maxsize:
+				self._data.popitem(last=False)
+				self._stats["evictions"] += 1
+
+	def clear(self) -> None:
+		with self._lock:
+			self._data.clear()
+
+	def stats(self) -> dict[str, Any]:
+		with self._lock:
+			return dict(self._stats) | {"size": len(self._data), "maxsize": self.maxsize, "ttl": self.ttl}
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable
+
+from .facts import _parse_date, coerce_value, glossary_types
+from .kb_loader import KnowledgeBase
+
+
+# Compilación de reglas a una red indexada (estilo agenda/Rete simplificado):
+# - Cada condición distinta (var, op, value) se compila una sola vez a un predicado
+#   (memoria alfa compartida entre reglas).
+# - Las reglas quedan indexadas por las variables que leen, para que el motor solo
+#   reevalúe las reglas afectadas cuando cambia un hecho.
+
+
+@dataclass(frozen=True)
+class Predicate:
+	var: str
+	op: str
+	value: Any
+	test: Callable[[Any], bool]
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+	index: int
+	id: str
+	conditions: tuple[int, ...]  # índices en RuleNetwork.predicates
+	actions: tuple[dict[str, Any], ...]
+	explanation: str | None
+	reads: frozenset[str]
+	writes: frozenset[str]
+
+
+@dataclass(frozen=True)
+class RuleNetwork:
+	rules: tuple[CompiledRule, ...]
+	predicates: tuple[Predicate, ...]
+	rules_by_var: dict[str, tuple[int, ...]]  # var → reglas que la leen
+	writers_by_var: dict[str, tuple[int, ...]]  # var → reglas que la escriben
+	predicates_by_var: dict[str, tuple[int, ...]]  # var → predicados sobre ella
+	var_types: dict[str, str]  # var → type del glosario
+	fingerprint: str
+
+
+def _make_test(op: str, right: Any, type_name: str | None = None) -> Callable[[Any], bool]:
+	"""Resuelve el operador una sola vez y devuelve la función de test.
+
+	Los hechos llegan tipados (ver facts.py), así que la constante se convierte al
+	mismo tipo de la variable y las comparaciones nativas van por camino rápido.
+	"""
+	if op in {"==", "!="}:
+		right = coerce_value(type_name, right)
+	elif op == "in" and isinstance(right, (list, tuple, set)):
+		right = [coerce_value(type_name, v) for v in right]
+	if op == "==":
+		return lambda left: left == right
+	if op == "!=":
+		return lambda left: left != right
+	if op == "in":
+		if not isinstance(right, (list, tuple, set)):
+			return lambda left: False
+		try:
+			members: Any = frozenset(right)
+		except TypeError:
+			members = tuple(right)
+
+		def _in(left: Any) -> bool:
+			try:
+				return left in members
+			except TypeError:  # left no hasheable: no puede estar en un set de escalares
+				return False
+		return _in
+	if op in {">=", "<="}:
+		# Soporte numérico y fechas; el lado constante se parsea al compilar
+		r_dt = _parse_date(right)
+		try:
+			r_num: float | None = float(right)
+		except Exception:
+			r_num = None
+		ge = op == ">="
+
+		def _cmp(left: Any) -> bool:
+			t = type(left)
+			if t is date and r_dt is not None:
+				return left >= r_dt if ge else left <= r_dt
+			if (t is int or t is float) and r_num is not None:
+				return left >= r_num if ge else left <= r_num
+			if r_dt is not None:
+				l_dt = _parse_date(left)
+				if l_dt is not None:
+					return l_dt >= r_dt if ge else l_dt <= r_dt
+			if r_num is None:
+				return False
+			try:
+				l = float(left)
+			except Exception:
+				return False
+			return l >= r_num if ge else l <= r_num
+		return _cmp
+	return lambda left: False
+
+
+def _pred_key(cond: dict[str, Any]) -> tuple[str, str, Any]:
+	val = cond.get("value")
+	if isinstance(val, list):
+		val = tuple(val)
+	return (cond.get("var"), cond.get("op"), val)
+
+
+def compile_rules(kb: KnowledgeBase) -> RuleNetwork:
+	"""Compila kb.rules (ya validadas) a una RuleNetwork."""
+	predicates: list[Predicate] = []
+	pred_index: dict[tuple[str, str, Any], int] = {}
+	rules: list[CompiledRule] = []
+	rules_by_var: dict[str, list[int]] = {}
+	writers_by_var: dict[str, list[int]] = {}
+	preds_by_var: dict[str, list[int]] = {}
+	types = glossary_types(kb.glossary)
+
+	for i, rule in enumerate(kb.rules):
+		cond_ids: list[int] = []
+		for c in rule.get("when", []):
+			key = _pred_key(c)
+			pid = pred_index.get(key)
+			if pid is None:
+				pid = len(predicates)
+				pred_index[key] = pid
+				predicates.append(Predicate(var=c.get("var"), op=c.get("op"), value=c.get("value"), test=_make_test(c.get("op"), c.get("value"), types.get(c.get("var")))))
+				preds_by_var.setdefault(c.get("var"), []).append(pid)
+			cond_ids.append(pid)
+		reads = frozenset(predicates[p].var for p in cond_ids)
+		actions = tuple(rule.get("then", []))
+		writes = frozenset(a["var"] for a in actions)
+		rules.append(CompiledRule(
+			index=i,
+			id=rule.get("id", ""),
+			conditions=tuple(cond_ids),
+			actions=actions,
+			explanation=rule.get("explanation"),
+			reads=reads,
+			writes=writes,
+		))
+		for var in reads:
+			rules_by_var.setdefault(var, []).append(i)
+		for var in writes:
+			writers_by_var.setdefault(var, []).append(i)
+
+	return RuleNetwork(
+		rules=tuple(rules),
+		predicates=tuple(predicates),
+		rules_by_var={k: tuple(v) for k, v in rules_by_var.items()},
+		writers_by_var={k: tuple(v) for k, v in writers_by_var.items()},
+		predicates_by_var={k: tuple(v) for k, v in preds_by_var.items()},
+		var_types=types,
+		fingerprint=kb.fingerprint,
+	)
+
+
+_network_cache: tuple[KnowledgeBase, RuleNetwork] | None = None
+
+
+def get_rule_network(kb: KnowledgeBase) -> RuleNetwork:
+	"""Devuelve la red compilada para kb (se recompila solo si cambia la KB)."""
+	global _network_cache
+	cached = _network_cache
+	if cached is not None and cached[0] is kb:
+		return cached[1]
+	net = compile_rules(kb)
+	_network_cache = (kb, net)
+	return net
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from .network import RuleNetwork
+
+
+# Planificación del encadenamiento: nodos = reglas compiladas + derivaciones
+# auxiliares (código) con sus variables leídas/escritas declaradas. Se arma el
+# grafo escritor → lector, se agrupan ciclos (componentes fuertemente conexas) y
+# se asigna a cada nodo un rango topológico. El motor procesa los nodos en orden
+# de rango, así que fuera de los ciclos cada nodo se evalúa a lo sumo una vez.
+
+
+@dataclass(frozen=True)
+class Derivation:
+	id: str
+	fn: Callable[[dict[str, Any]], None]
+	reads: frozenset[str]
+	writes: frozenset[str]
+
+
+@dataclass(frozen=True)
+class Schedule:
+	net: RuleNetwork
+	derivations: tuple[Derivation, ...]
+	rank: tuple[int, ...]  # nodo → posición en el orden topológico
+	readers_by_var: dict[str, tuple[int, ...]]  # var → nodos que la leen
+	writers_by_var: dict[str, tuple[int, ...]]  # var → nodos que la escriben
+	cyclic: frozenset[int]  # nodos que pertenecen a un ciclo (requieren tope)
+	variables: frozenset[str]  # todo lo que el motor lee o escribe
+	null_tested: frozenset[str]  # vars que solo leen reglas comparándolas con None (importa la presencia)
+
+	@property
+	def n_rules(self) -> int:
+		return len(self.net.rules)
+
+	def node_id(self, node: int) -> str:
+		if node < self.n_rules:
+			return self.net.rules[node].id
+		return self.derivations[node - self.n_rules].id
+
+
+def _strongly_connected(n: int, succ: list[set[int]]) -> list[list[int]]:
+	"""Tarjan iterativo. Devuelve las componentes (cada una ordenada)."""
+	index: dict[int, int] = {}
+	low: dict[int, int] = {}
+	on_stack: set[int] = set()
+	stack: list[int] = []
+	comps: list[list[int]] = []
+	counter = 0
+	for root in range(n):
+		if root in index:
+			continue
+		work = [(root, iter(sorted(succ[root])))]
+		index[root] = low[root] = counter
+		counter += 1
+		stack.append(root)
+		on_stack.add(root)
+		while work:
+			v, it = work[-1]
+			advanced = False
+			for w in it:
+				if w not in index:
+					index[w] = low[w] = counter
+					counter += 1
+					stack.append(w)
+					on_stack.add(w)
+					work.append((w, iter(sorted(succ[w]))))
+					advanced = True
+					break
+				if w in on_stack:
+					low[v] = min(low[v], index[w])
+			if advanced:
+				continue
+			work.pop()
+			if work:
+				low[work[-1][0]] = min(low[work[-1][0]], low[v])
+			if low[v] == index[v]:
+				comp = []
+				while True:
+					w = stack.pop()
+					on_stack.discard(w)
+					comp.append(w)
+					if w == v:
+						break
+				comps.append(sorted(comp))
+	return comps
+
+
+def build_schedule(net: RuleNetwork, derivations: tuple[Derivation, ...]) -> Schedule:
+	n_rules = len(net.rules)
+	n = n_rules + len(derivations)
+	reads: list[frozenset[str]] = [r.reads for r in net.rules] + [d.reads for d in derivations]
+	writes: list[frozenset[str]] = [r.writes for r in net.rules] + [d.writes for d in derivations]
+
+	readers: dict[str, list[int]] = {}
+	writers: dict[str, list[int]] = {}
+	for node in range(n):
+		for var in reads[node]:
+			readers.setdefault(var, []).append(node)
+		for var in writes[node]:
+			writers.setdefault(var, []).append(node)
+
+	# Aristas escritor → lector (sin autoaristas: un nodo que lee lo que escribe
+	# calcula su propio valor final y no se redispara a sí mismo)
+	succ: list[set[int]] = [set() for _ in range(n)]
+	for var, ws in writers.items():
+		for w in ws:
+			succ[w].update(r for r in readers.get(var, ()) if r != w)
+
+	comps = _strongly_connected(n, succ)
+	comp_of = {node: ci for ci, comp in enumerate(comps) for node in comp}
+	cyclic = frozenset(node for comp in comps if len(comp) > 1 for node in comp)
+
+	# Orden topológico de componentes; desempate por el menor nodo (orden de rules.json,
+	# luego derivaciones en orden de declaración)
+	comp_succ: list[set[int]] = [set() for _ in comps]
+	indeg = [0] * len(comps)
+	for v in range(n):
+		for w in succ[v]:
+			a, b = comp_of[v], comp_of[w]
+			if a != b and b not in comp_succ[a]:
+				comp_succ[a].add(b)
+				indeg[b] += 1
+	ready = [(comps[ci][0], ci) for ci in range(len(comps)) if indeg[ci] == 0]
+	heapq.heapify(ready)
+	rank = [0] * n
+	pos = 0
+	while ready:
+		_, ci = heapq.heappop(ready)
+		for node in comps[ci]:
+			rank[node] = pos
+			pos += 1
+		for cj in comp_succ[ci]:
+			indeg[cj] -= 1
+			if indeg[cj] == 0:
+				heapq.heappush(ready, (comps[cj][0], cj))
+
+	return Schedule(
+		net=net,
+		derivations=derivations,
+		rank=tuple(rank),
+		readers_by_var={k: tuple(v) for k, v in readers.items()},
+		writers_by_var={k: tuple(v) for k, v in writers.items()},
+		cyclic=cyclic,
+		variables=frozenset(readers) | frozenset(writers),
+		null_tested=frozenset(
+			var
+			for var, rs in readers.items()
+			if var not in writers
+			and all(r < n_rules for r in rs)
+			and all(
+				net.predicates[pid].op in {"==", "!="} and net.predicates[pid].value is None
+				for pid in net.predicates_by_var.get(var, ())
+			)
+		),
+	)
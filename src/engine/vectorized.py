@@ -0,0 +1,571 @@
+from __future__ import annotations
+
+from operator import itemgetter
+from typing import Any, Sequence
+
+try:
+	import numpy as np
+except Exception:  # pragma: no cover - numpy es opcional (solo para auditorías masivas)
+	np = None  # type: ignore
+
+from .facts import coerce_facts
+from .inference import _MAX_CYCLE_EVALS, _MISSING, Conclusion, _apply_action, _get_schedule, _result
+from .kb_loader import KnowledgeBase, load_knowledge_base
+from .network import RuleNetwork, compile_rules, get_rule_network
+from .scheduler import Derivation, Schedule
+
+
+# Modo columnar para re-scoring masivo / simulaciones "what-if".
+# Cada variable del motor se codifica por diccionario sobre los hechos ya tipados
+# (_Column: código 0 = ausente). Cada predicado se evalúa UNA vez por valor
+# distinto (tabla de lookup) y la máscara de filas se obtiene con un gather
+# vectorizado; el resultado es exactamente el del predicado escalar, para
+# cualquier operador. Las máscaras de auditoría y forward_chain_columnar usan la
+# misma codificación.
+
+
+def _ensure_numpy() -> Any:
+	if np is None:
+		raise RuntimeError("numpy no está instalado. Es necesario para el modo columnar")
+	return np
+
+
+def _resolve(kb: KnowledgeBase | None) -> tuple[KnowledgeBase, RuleNetwork]:
+	if kb is None:
+		kb = load_knowledge_base()
+		return kb, get_rule_network(kb)
+	# KB alternativa (what-if): se compila aparte para no pisar la red compartida
+	return kb, compile_rules(kb)
+
+
+def predicate_masks(facts_list: Sequence[dict[str, Any]], kb: KnowledgeBase | None = None) -> "np.ndarray":
+	"""Matriz bool (n_predicados, n_filas) con el resultado de cada predicado compilado."""
+	_ensure_numpy()
+	_, net = _resolve(kb)
+	return _predicate_masks(net, facts_list)
+
+
+def _predicate_masks(net: RuleNetwork, facts_list: Sequence[dict[str, Any]]) -> "np.ndarray":
+	typed = [coerce_facts(f, net.var_types) for f in facts_list]
+	masks = np.zeros((len(net.predicates), len(typed)), dtype=bool)
+	for var, pids in net.predicates_by_var.items():
+		col = _Column([f.get(var, _MISSING) for f in typed])
+		for pid in pids:
+			test = net.predicates[pid].test
+			lut = np.fromiter((test(v) for v in col.vocab), dtype=bool, count=len(col.vocab))
+			masks[pid] = lut[col.codes]
+	return masks
+
+
+def rule_masks(facts_list: Sequence[dict[str, Any]], kb: KnowledgeBase | None = None) -> tuple[list[str], "np.ndarray"]:
+	"""Para auditorías: (ids de regla, matriz bool (n_reglas, n_filas)).
+
+	Indica qué reglas cumplen su `when` sobre los hechos de entrada de cada fila.
+	"""
+	_ensure_numpy()
+	_, net = _resolve(kb)
+	pm = _predicate_masks(net, facts_list)
+	out = np.ones((len(net.rules), len(facts_list)), dtype=bool)
+	for rule in net.rules:
+		for pid in rule.conditions:
+			out[rule.index] &= pm[pid]
+	return [r.id for r in net.rules], out
+
+
+def forward_chain_columnar(facts_list: Sequence[dict[str, Any]], kb: KnowledgeBase | None = None) -> list[dict[str, Any]]:
+	"""Equivalente a [forward_chain(f) for f in facts_list], ejecutado por columnas.
+
+	La agenda se recorre una vez para todo el lote (ver _ColumnarRun): cada paso
+	toma el nodo de menor rango pendiente y lo aplica a todas las filas que lo
+	tienen en cola a la vez, con máscaras para las condiciones y tablas por valor
+	distinto para acciones y derivaciones. `kb` permite simular con reglas
+	alternativas.
+	"""
+	_ensure_numpy()
+	kb, net = _resolve(kb)
+	typed = [coerce_facts(f, net.var_types) for f in facts_list]
+	if not typed:
+		return []
+	run = _ColumnarRun(_get_schedule(net), typed)
+	run.run()
+	return run.results()
+
+
+# --- Agenda por columnas ---
+# Reproduce _run_agenda fila por fila pero en bloque. Cada variable del motor es
+# una columna de códigos (0 = hecho ausente) sobre un vocabulario de valores.
+# - Condiciones: predicado evaluado una vez por valor del vocabulario + gather.
+# - Acciones: se aplican con el mismo código escalar (_apply_action) una vez por
+#   valor distinto de la columna y el resultado se reparte con la inversa de
+#   np.unique.
+# - Derivaciones (código Python): se corren una vez por combinación distinta de
+#   las variables que efectivamente leyeron (ver _Tracked); las filas que
+#   coinciden en esas variables siguen el mismo camino.
+# Los valores no hasheables reciben un código por fila, así que esas filas caen
+# naturalmente al camino escalar.
+# - Las listas se mutan en el lugar en el motor escalar (las conclusiones y
+#   hechos_usados ven el valor final): cada columna lleva una "generación" por
+#   fila que cambia cuando la variable pasa a ser otro objeto, y las referencias
+#   capturadas se resuelven al último valor de su generación.
+
+
+def _vkey(value: Any) -> Any:
+	if isinstance(value, (list, tuple)):
+		return (type(value), tuple(_vkey(v) for v in value))
+	return (type(value), value)
+
+
+def _thaw(value: Any) -> Any:
+	# Copia de listas: el código escalar las muta en el lugar
+	return list(value) if isinstance(value, list) else value
+
+
+class _Column:
+	__slots__ = ("vocab", "index", "is_list", "codes", "initial", "gen", "ended")
+
+	def __init__(self, values: list[Any]) -> None:
+		self.vocab: list[Any] = [None]  # código 0: hecho ausente
+		self.index: dict[Any, int] = {}
+		self.is_list: list[bool] = [False]
+		codes = []
+		index = self.index
+		for v in values:
+			if v is _MISSING:
+				codes.append(0)
+				continue
+			try:
+				codes.append(index[(type(v), v)])
+			except (KeyError, TypeError):  # valor nuevo o lista
+				codes.append(self.intern(v))
+		self.codes = np.array(codes, dtype=np.int32)
+		self.initial = self.codes.copy()
+		self.gen = np.zeros(len(values), dtype=np.int32)
+		self.ended: dict[tuple[int, int], int] = {}  # (fila, generación) → último código
+
+	def intern(self, value: Any) -> int:
+		if value is _MISSING:
+			return 0
+		try:
+			key = _vkey(value)
+			code = self.index.get(key)
+		except TypeError:  # no hasheable: código propio
+			key = code = None
+		if code is None:
+			code = len(self.vocab)
+			self.vocab.append(_thaw(value))
+			self.is_list.append(isinstance(value, list))
+			if key is not None:
+				self.index[key] = code
+		return code
+
+	def replace(self, rows: "np.ndarray", new_codes: "np.ndarray", new_object: "np.ndarray") -> None:
+		"""Asigna códigos; new_object marca las filas donde la variable pasa a ser otro objeto."""
+		old = self.codes[rows]
+		if new_object.any():
+			is_list = np.asarray(self.is_list, dtype=bool)
+			closing = new_object & is_list[old]
+			for row, code in zip(rows[closing].tolist(), old[closing].tolist()):
+				self.ended[(row, int(self.gen[row]))] = code
+			self.gen[rows[closing]] += 1
+		self.codes[rows] = new_codes
+
+	def value(self, row: int, code: int, gen: int) -> Any:
+		"""Valor de una referencia capturada (código y generación de la fila)."""
+		if self.is_list[code]:
+			if gen != self.gen[row]:
+				code = self.ended[(row, gen)]
+			else:
+				code = int(self.codes[row])
+		return _thaw(self.vocab[code])
+
+
+def _group(stacked: "np.ndarray", sizes: list[int]) -> tuple["np.ndarray", "np.ndarray"]:
+	"""Agrupa columnas iguales de stacked (códigos < sizes por fila): (primera aparición, inversa)."""
+	if float(np.prod(np.asarray(sizes, dtype=float))) < 2.0**62:
+		key = np.zeros(stacked.shape[1], dtype=np.int64)
+		for row, size in zip(stacked, sizes):
+			key = key * size + row
+		_, first, inv = np.unique(key, return_index=True, return_inverse=True)
+	else:
+		_, first, inv = np.unique(stacked, axis=1, return_index=True, return_inverse=True)
+	return first, inv.reshape(-1)
+
+
+class _Tracked(dict):
+	"""dict que registra qué claves lee y en qué orden asigna una derivación.
+
+	Recorrerlo (keys/items/len...) cuenta como leer todas las variables.
+	"""
+
+	__slots__ = ("names", "seen", "assigned")
+
+	def __init__(self, data: dict[str, Any], names: list[str]) -> None:
+		super().__init__(data)
+		self.names = names
+		self.seen: set[str] = set()
+		self.assigned: dict[str, int] = {}
+
+	def __getitem__(self, key: str) -> Any:
+		self.seen.add(key)
+		return dict.__getitem__(self, key)
+
+	def get(self, key: str, default: Any = None) -> Any:
+		self.seen.add(key)
+		return dict.get(self, key, default)
+
+	def __contains__(self, key: object) -> bool:
+		self.seen.add(key)  # type: ignore[arg-type]
+		return dict.__contains__(self, key)
+
+	def __setitem__(self, key: str, value: Any) -> None:
+		self.assigned.setdefault(key, len(self.assigned))
+		dict.__setitem__(self, key, value)
+
+	def setdefault(self, key: str, default: Any = None) -> Any:
+		if not dict.__contains__(self, key):
+			self[key] = default
+		return self[key]
+
+	def pop(self, key: str, *default: Any) -> Any:
+		self.seen.add(key)
+		return dict.pop(self, key, *default)
+
+	def _read_all(self) -> None:
+		self.seen.update(self.names)
+
+	def __iter__(self) -> Any:
+		self._read_all()
+		return dict.__iter__(self)
+
+	def __len__(self) -> int:
+		self._read_all()
+		return dict.__len__(self)
+
+	def keys(self) -> Any:
+		self._read_all()
+		return dict.keys(self)
+
+	def values(self) -> Any:
+		self._read_all()
+		return dict.values(self)
+
+	def items(self) -> Any:
+		self._read_all()
+		return dict.items(self)
+
+
+class _ColumnarRun:
+	def __init__(self, sched: Schedule, typed: list[dict[str, Any]]) -> None:
+		self.sched = sched
+		self.net = sched.net
+		self.typed = typed
+		n = len(typed)
+		self.n = n
+		self.cols = {v: _Column([f.get(v, _MISSING) for f in typed]) for v in sorted(sched.variables)}
+		n_nodes = sched.n_rules + len(sched.derivations)
+		self.node_at = [0] * n_nodes
+		for node, r in enumerate(sched.rank):
+			self.node_at[r] = node
+		self.queued = np.zeros((n_nodes, n), dtype=bool)
+		for node in range(sched.n_rules):
+			self.queued[sched.rank[node]] = True
+		self.evals = np.zeros((n_nodes, n), dtype=np.int32)
+		self.derive = np.zeros(n, dtype=bool)
+		self.cuts: dict[int, list[str]] = {}
+		self.step = 0
+		self.new_key = {v: np.full(n, -1, dtype=np.int64) for v in self.cols}  # orden de alta de hechos nuevos
+		self.pred_luts: dict[int, "np.ndarray"] = {}
+		# Conclusiones por variable: orden de alta, certeza, evento de la regla y valor capturado
+		self.c_order = {v: np.full(n, -1, dtype=np.int64) for v in self.cols}
+		self.c_cert = {v: np.zeros(n) for v in self.cols}
+		self.c_event = {v: np.full(n, -1, dtype=np.int32) for v in self.cols}
+		self.c_code = {v: np.zeros(n, dtype=np.int32) for v in self.cols}
+		self.c_gen = {v: np.zeros(n, dtype=np.int32) for v in self.cols}
+		# Disparos: (regla, filas, {var: (códigos, generaciones)} de hechos_usados)
+		self.events: list[tuple[int, "np.ndarray", dict[str, tuple["np.ndarray", "np.ndarray"]]]] = []
+
+	def run(self) -> None:
+		queued = self.queued
+		while True:
+			active = queued.any(axis=0)
+			if not active.any():
+				break
+			nxt = queued.argmax(axis=0)
+			r = int(nxt[active].min())
+			rows = np.flatnonzero(active & (nxt == r))
+			queued[r, rows] = False
+			node = self.node_at[r]
+			if node < self.sched.n_rules:
+				self._rule(node, r, rows)
+			else:
+				self._derivation(node, r, rows[self.derive[rows]])
+
+	def _count(self, node: int, rows: "np.ndarray") -> "np.ndarray":
+		if node not in self.sched.cyclic:
+			self.evals[node, rows] += 1
+			return rows
+		over = self.evals[node, rows] >= _MAX_CYCLE_EVALS
+		if over.any():
+			node_id = self.sched.node_id(node)
+			for row in rows[over].tolist():
+				cut = self.cuts.setdefault(row, [])
+				if node_id not in cut:
+					cut.append(node_id)
+			rows = rows[~over]
+		self.evals[node, rows] += 1
+		return rows
+
+	def _pred_lut(self, pid: int) -> "np.ndarray":
+		pred = self.net.predicates[pid]
+		vocab = self.cols[pred.var].vocab
+		lut = self.pred_luts.get(pid)
+		if lut is None or len(lut) < len(vocab):
+			done = 0 if lut is None else len(lut)
+			ext = np.fromiter((pred.test(v) for v in vocab[done:]), dtype=bool, count=len(vocab) - done)
+			lut = self.pred_luts[pid] = ext if lut is None else np.concatenate([lut, ext])
+		return lut
+
+	def _rule(self, node: int, r: int, rows: "np.ndarray") -> None:
+		rows = self._count(node, rows)
+		rule = self.net.rules[node]
+		for pid in rule.conditions:
+			if not len(rows):
+				return
+			rows = rows[self._pred_lut(pid)[self.cols[self.net.predicates[pid].var].codes[rows]]]
+		if not len(rows):
+			return
+		used = {}
+		for pid in rule.conditions:
+			var = self.net.predicates[pid].var
+			if var not in used:
+				col = self.cols[var]
+				used[var] = (col.codes[rows], col.gen[rows])
+		event = len(self.events)
+		self.events.append((node, rows, used))
+		changed: dict[str, "np.ndarray"] = {}
+		for act in rule.actions:
+			var = act["var"]
+			col = self.cols[var]
+			self.step += 1
+			old = col.codes[rows]
+			uniq, inv = np.unique(old, return_inverse=True)
+			out_code = np.empty(len(uniq), dtype=np.int32)
+			out_changed = np.empty(len(uniq), dtype=bool)
+			out_new = np.empty(len(uniq), dtype=bool)
+			for i, code in enumerate(uniq.tolist()):
+				scratch = {var: _thaw(col.vocab[code])} if code else {}
+				before = scratch.get(var, _MISSING)
+				out_changed[i] = _apply_action(scratch, act)
+				after = scratch.get(var, _MISSING)
+				out_new[i] = after is not before
+				out_code[i] = col.intern(after)
+			new_codes = out_code[inv]
+			col.replace(rows, new_codes, out_new[inv])
+			self._mark_new(var, rows, old, new_codes, self.step * 1024)
+			mask = out_changed[inv]
+			if mask.any():
+				prev = changed.get(var)
+				changed[var] = mask if prev is None else prev | mask
+			# Conclusión (misma combinación de certezas que _run_agenda)
+			certainty = float(act.get("certainty", 1.0))
+			has = self.c_order[var][rows] >= 0
+			self.c_cert[var][rows] = np.where(has, (self.c_cert[var][rows] + certainty) / 2.0, certainty)
+			self.c_order[var][rows[~has]] = self.step
+			self.c_event[var][rows] = event
+			self.c_code[var][rows] = new_codes
+			self.c_gen[var][rows] = col.gen[rows]
+		first = rows[~self.derive[rows]]
+		if len(first):
+			self.derive[first] = True
+			for d in range(self.sched.n_rules, self.sched.n_rules + len(self.sched.derivations)):
+				self.queued[self.sched.rank[d], first] = True
+		self._propagate(node, r, rows, changed)
+
+	def _derivation(self, node: int, r: int, rows: "np.ndarray") -> None:
+		rows = self._count(node, rows)
+		if not len(rows):
+			return
+		d = self.sched.derivations[node - self.sched.n_rules]
+		self.step += 1
+		names = sorted(d.reads | d.writes)
+		writes = sorted(d.writes)
+		stacked = np.stack([self.cols[v].codes[rows] for v in names])
+		m = len(rows)
+		# Por fila: código asignado (-1 = la derivación no tocó la variable), si
+		# pasó a ser otro objeto y orden de asignación dentro de la derivación
+		res_code = {v: np.full(m, -1, dtype=np.int32) for v in writes}
+		res_new = {v: np.zeros(m, dtype=bool) for v in writes}
+		res_order = {v: np.full(m, -1, dtype=np.int64) for v in writes}
+		pending = np.arange(m)
+		while len(pending):
+			# Las filas que coinciden en lo que la derivación efectivamente leyó
+			# siguen el mismo camino: se agrupan por esas variables
+			seen = self._trace(d, names, writes, stacked[:, pending[0]].tolist())[0]
+			keys = [names.index(v) for v in sorted(seen)]
+			first, ginv = _group(stacked[keys][:, pending], [len(self.cols[names[k]].vocab) for k in keys])
+			done = np.zeros(len(first), dtype=bool)
+			g_out = {v: np.full(len(first), -1, dtype=np.int32) for v in writes}
+			g_new = {v: np.zeros(len(first), dtype=bool) for v in writes}
+			g_order = {v: np.full(len(first), -1, dtype=np.int64) for v in writes}
+			alone: list[int] = []
+			for g, pos in enumerate(first.tolist()):
+				g_seen, outcome = self._trace(d, names, writes, stacked[:, pending[pos]].tolist())
+				if g_seen <= seen:
+					done[g] = True
+					target = (g_out, g_new, g_order, g)
+				else:
+					# Leyó más que el representante: vale solo para esta fila
+					alone.append(pending[pos])
+					target = (res_code, res_new, res_order, pending[pos])
+				out_code, out_new, out_order, at = target
+				for v, (code, is_new, order) in outcome.items():
+					out_code[v][at], out_new[v][at], out_order[v][at] = code, is_new, order
+			grouped = done[ginv]
+			members = pending[grouped]
+			for v in writes:
+				res_code[v][members] = g_out[v][ginv[grouped]]
+				res_new[v][members] = g_new[v][ginv[grouped]]
+				res_order[v][members] = g_order[v][ginv[grouped]]
+			resolved = grouped
+			if alone:
+				resolved = resolved | np.isin(pending, alone)
+			pending = pending[~resolved]
+		changed: dict[str, "np.ndarray"] = {}
+		for v in writes:
+			col = self.cols[v]
+			old = col.codes[rows]
+			touched = res_code[v] >= 0
+			new_codes = np.where(touched, res_code[v], old).astype(np.int32)
+			col.replace(rows, new_codes, res_new[v])
+			# Altas dentro de la derivación: en el orden en que se asignaron
+			self._mark_new(v, rows, old, new_codes, self.step * 1024 + res_order[v])
+			mask = touched & self._differs(col, old, new_codes)
+			if mask.any():
+				changed[v] = mask
+		self._propagate(node, r, rows, changed)
+
+	def _trace(
+		self, d: Derivation, names: list[str], writes: list[str], codes: list[int]
+	) -> tuple[set[str], dict[str, tuple[int, bool, int]]]:
+		"""Corre la derivación sobre una combinación de códigos.
+
+		Devuelve (variables leídas, {var escrita: (código, objeto nuevo, orden de asignación)}).
+		"""
+		scratch = _Tracked({v: _thaw(self.cols[v].vocab[c]) for v, c in zip(names, codes) if c}, names)
+		objs = {v: dict.get(scratch, v, _MISSING) for v in writes}
+		d.fn(scratch)
+		outcome = {}
+		for v in writes:
+			if v in scratch.seen or v in scratch.assigned:
+				after = dict.get(scratch, v, _MISSING)
+				is_new = v not in scratch.seen or after is not objs[v]
+				outcome[v] = (self.cols[v].intern(after), is_new, scratch.assigned.get(v, -1))
+		return scratch.seen, outcome
+
+	def _differs(self, col: _Column, old: "np.ndarray", new: "np.ndarray") -> "np.ndarray":
+		"""old != new comparando valores (como el motor escalar), por par distinto."""
+		diff = old != new
+		if not diff.any():
+			return diff
+		pairs = np.stack([old[diff], new[diff]])
+		first, inv = _group(pairs, [len(col.vocab)] * 2)
+		lut = np.fromiter(
+			((col.vocab[a] if a else _MISSING) != (col.vocab[b] if b else _MISSING) for a, b in pairs[:, first].T.tolist()),
+			dtype=bool,
+			count=len(first),
+		)
+		diff[diff] = lut[inv]
+		return diff
+
+	def _mark_new(self, var: str, rows: "np.ndarray", old: "np.ndarray", new: "np.ndarray", order: Any) -> None:
+		added = (old == 0) & (new != 0)
+		if added.any():
+			order = np.broadcast_to(order, rows.shape)
+			self.new_key[var][rows[added]] = order[added]
+
+	def _propagate(self, node: int, r: int, rows: "np.ndarray", changed: dict[str, "np.ndarray"]) -> None:
+		rank = self.sched.rank
+		for var, mask in changed.items():
+			hit = rows[mask]
+			for other in self.sched.readers_by_var.get(var, ()):
+				if other != node:
+					self.queued[rank[other], hit] = True
+			for other in self.sched.writers_by_var.get(var, ()):
+				if rank[other] > r:
+					self.queued[rank[other], hit] = True
+
+	def results(self) -> list[dict[str, Any]]:
+		net = self.net
+		# Solo las variables que escribe el motor pueden diferir de la entrada; los
+		# dicts tipados son copias propias (coerce_facts), se completan en el lugar
+		written = sorted(v for v in self.cols if self.sched.writers_by_var.get(v))
+		added: dict[int, list[tuple[int, str, Any]]] = {}
+		for var in written:
+			col = self.cols[var]
+			moved = np.flatnonzero(col.codes != col.initial)
+			for i, code, init, order in zip(
+				moved.tolist(), col.codes[moved].tolist(), col.initial[moved].tolist(), self.new_key[var][moved].tolist()
+			):
+				val = list(col.vocab[code]) if col.is_list[code] else col.vocab[code]
+				if init:
+					self.typed[i][var] = val
+				else:
+					added.setdefault(i, []).append((order, var, val))
+		events = []
+		for node, rows, used in self.events:
+			pos = np.full(self.n, -1, dtype=np.int64)
+			pos[rows] = np.arange(len(rows))
+			rule = net.rules[node]
+			events.append((rule.id, rule.explanation, pos.tolist(), [(self.cols[v], v, c.tolist(), g.tolist()) for v, (c, g) in used.items()]))
+		concl_cols = [
+			(
+				var,
+				self.cols[var],
+				self.c_order[var].tolist(),
+				self.c_cert[var].tolist(),
+				self.c_event[var].tolist(),
+				self.c_code[var].tolist(),
+				self.c_gen[var].tolist(),
+			)
+			for var in written
+			if (self.c_order[var] >= 0).any()
+		]
+		evals = self.evals.sum(axis=0).tolist()
+		by_order = itemgetter(0)
+		out = []
+		typed = self.typed
+		self.typed = []
+		for i, facts in enumerate(typed):
+			typed[i] = None  # serialize_facts copia: no retener ambos dicts
+			extra = added.get(i)
+			if extra:
+				for _, var, val in sorted(extra, key=by_order):
+					facts[var] = val
+			found = []
+			for entry in concl_cols:
+				order = entry[2][i]
+				if order >= 0:
+					found.append((order, entry))
+			if len(found) > 1:
+				found.sort(key=by_order)
+			concl: dict[str, Conclusion] = {}
+			for _, (var, col, _, cert, event, code, gen) in found:
+				regla_id, porque, pos, used = events[event[i]]
+				p = pos[i]
+				hechos = {}
+				for ucol, v, c, g in used:
+					uc = c[p]
+					hechos[v] = ucol.value(i, uc, g[p]) if ucol.is_list[uc] else ucol.vocab[uc]
+				vc = code[i]
+				concl[var] = Conclusion(
+					var,
+					col.value(i, vc, gen[i]) if col.is_list[vc] else col.vocab[vc],
+					cert[i],
+					regla_id,
+					hechos,
+					porque,
+				)
+			cut = self.cuts.get(i, [])
+			report = {"fixpoint": not cut, "ciclos_cortados": cut, "evaluaciones": evals[i]}
+			out.append(_result(net, facts, concl, report))
+		return out
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import defaultdict
+from datetime import date
+from typing import Any, Callable, Iterable, NamedTuple, Optional
+
+from sqlalchemy import select
+
+from .dao import session_scope
+from .models import Aviso, Employee
+
+
+# Índice en memoria de "quién está ausente" (fecha puntual o rango), por
+# area/turno. Cada grupo (area, turno) tiene un árbol de intervalos centrado
+# armado desde la BD; las altas posteriores van a una lista chica de pendientes
+# que se funde en el árbol al crecer. Consultas O(log n + k). Se recarga por TTL
+# o al invalidarlo (cambios fuera del DAO). Un aviso cubre [fecha_inicio,
+# fecha_fin] inclusive, igual que find_solape.
+
+
+class Ausencia(NamedTuple):
+	inicio: date
+	fin: date
+	legajo: str
+	id_aviso: str
+	motivo: str
+
+
+class _Node:
+	__slots__ = ("center", "by_start", "by_end", "left", "right")
+
+	def __init__(self, center: date, items: list[Ausencia], left: "Optional[_Node]", right: "Optional[_Node]") -> None:
+		self.center = center
+		self.by_start = sorted(items, key=lambda a: a.inicio)
+		self.by_end = sorted(items, key=lambda a: a.fin, reverse=True)
+		self.left = left
+		self.right = right
+
+
+def _build(items: list[Ausencia]) -> Optional[_Node]:
+	"""Árbol de intervalos centrado (la mediana de los extremos como centro)."""
+	if not items:
+		return None
+	points = sorted(p for a in items for p in (a.inicio, a.fin))
+	center = points[len(points) // 2]
+	left = [a for a in items if a.fin < center]
+	right = [a for a in items if a.inicio > center]
+	here = [a for a in items if a.inicio <= center <= a.fin]
+	return _Node(center, here, _build(left), _build(right))
+
+
+def _query(node: Optional[_Node], desde: date, hasta: date, out: list[Ausencia]) -> None:
+	while node is not None:
+		if hasta < node.center:
+			# Todos los del nodo terminan en/después del centro: solapan si empiezan <= hasta
+			for a in node.by_start:
+				if a.inicio > hasta:
+					break
+				out.append(a)
+			node = node.left
+		elif desde > node.center:
+			for a in node.by_end:
+				if a.fin < desde:
+					break
+				out.append(a)
+			node = node.right
+		else:
+			out.extend(node.by_start)
+			_query(node.left, desde, hasta, out)
+			node = node.right
+
+
+class _Group:
+	__slots__ = ("tree", "size", "pending")
+
+	def __init__(self, items: list[Ausencia]) -> None:
+		self.tree = _build(items)
+		self.size = len(items)
+		self.pending: list[Ausencia] = []
+
+	def add(self, item: Ausencia) -> None:
+		self.pending.append(item)
+		# Fusionar cuando los pendientes dejan de ser despreciables
+		if len(self.pending) > max(32, self.size // 8):
+			items: list[Ausencia] = []
+			_query(self.tree, date.min, date.max, items)
+			items.extend(self.pending)
+			self.tree, self.size, self.pending = _build(items), len(items), []
+
+	def query(self, desde: date, hasta: date, out: list[Ausencia]) -> None:
+		_query(self.tree, desde, hasta, out)
+		out.extend(a for a in self.pending if a.inicio <= hasta and a.fin >= desde)
+
+
+class AbsenceIndex:
+	def __init__(self, ttl: float = 600.0, *, clock: Callable[[], float] = time.monotonic) -> None:
+		self.ttl = ttl
+		self._clock = clock
+		self._lock = threading.Lock()
+		self._groups: dict[tuple[Optional[str], Optional[str]], _Group] = {}
+		self._employees: dict[str, tuple[str, Optional[str], Optional[str]]] = {}  # legajo → (nombre, area, turno)
+		self._ids: set[str] = set()  # id_aviso ya indexados
+		self._loaded_at: Optional[float] = None
+		self._stats = {"queries": 0, "refreshes": 0, "added": 0}
+
+	def _refresh_locked(self, now: float) -> None:
+		with session_scope() as s:
+			self._employees = {
+				leg: (nombre, area, turno)
+				for leg, nombre, area, turno in s.execute(select(Employee.legajo, Employee.nombre, Employee.area, Employee.turno))
+			}
+			rows = s.execute(select(Aviso.fecha_inicio, Aviso.fecha_fin, Aviso.legajo, Aviso.id_aviso, Aviso.motivo)).all()
+		by_group: dict[tuple[Optional[str], Optional[str]], list[Ausencia]] = defaultdict(list)
+		for r in rows:
+			by_group[self._group_of(r[2])].append(Ausencia(*r))
+		self._groups = {k: _Group(v) for k, v in by_group.items()}
+		self._ids = {r[3] for r in rows}
+		self._loaded_at = now
+		self._stats["refreshes"] += 1
+
+	def _group_of(self, legajo: str) -> tuple[Optional[str], Optional[str]]:
+		_, area, turno = self._employees.get(legajo, (None, None, None))
+		return area, turno
+
+	def _ensure_loaded_locked(self) -> None:
+		now = self._clock()
+		if self._loaded_at is None or now - self._loaded_at > self.ttl:
+			self._refresh_locked(now)
+
+	def add(self, avisos: Iterable[dict[str, Any]]) -> None:
+		"""Registra avisos ya confirmados (si el índice no está cargado, no hace nada).
+
+		Los id_aviso ya indexados se ignoran (p.ej. la recarga ya leyó el alta).
+		"""
+		with self._lock:
+			if self._loaded_at is None:
+				return
+			for av in avisos:
+				if av["id_aviso"] in self._ids:
+					continue
+				if av["legajo"] not in self._employees:
+					# Empleado nuevo: sin area/turno conocidos → recargar en la próxima consulta
+					self._loaded_at = None
+					return
+				item = Ausencia(av["fecha_inicio"], av["fecha_fin"], av["legajo"], av["id_aviso"], av["motivo"])
+				key = self._group_of(item.legajo)
+				group = self._groups.get(key)
+				if group is None:
+					group = self._groups[key] = _Group([])
+				group.add(item)
+				self._ids.add(item.id_aviso)
+				self._stats["added"] += 1
+
+	def ausentes(
+		self,
+		desde: date,
+		hasta: Optional[date] = None,
+		*,
+		area: Optional[str] = None,
+		turno: Optional[str] = None,
+	) -> list[dict[str, Any]]:
+		"""Avisos que cubren la fecha (o solapan [desde, hasta]), filtrando por area/turno."""
+		hasta = hasta or desde
+		found: list[Ausencia] = []
+		with self._lock:
+			self._ensure_loaded_locked()
+			self._stats["queries"] += 1
+			for (g_area, g_turno), group in self._groups.items():
+				if (area is None or g_area == area) and (turno is None or g_turno == turno):
+					group.query(desde, hasta, found)
+			employees = self._employees
+		found.sort(key=lambda a: (a.legajo, a.inicio))
+		out = []
+		for a in found:
+			nombre, e_area, e_turno = employees.get(a.legajo, (None, None, None))
+			out.append({
+				"legajo": a.legajo,
+				"nombre": nombre,
+				"area": e_area,
+				"turno": e_turno,
+				"motivo": a.motivo,
+				"id_aviso": a.id_aviso,
+				"fecha_inicio": a.inicio,
+				"fecha_fin": a.fin,
+			})
+		return out
+
+	def invalidate(self) -> None:
+		with self._lock:
+			self._loaded_at = None
+
+	def stats(self) -> dict[str, Any]:
+		with self._lock:
+			return dict(self._stats) | {
+				"groups": len(self._groups),
+				"avisos": sum(g.size + len(g.pending) for g in self._groups.values()),
+			}
+
+
+_index: AbsenceIndex | None = None
+_index_lock = threading.Lock()
+
+
+def absence_index() -> AbsenceIndex:
+	"""Índice compartido del proceso."""
+	global _index
+	if _index is None:
+		with _index_lock:
+			if _index is None:
+				_index = AbsenceIndex()
+	return _index
+
+
+def notify_avisos(avisos: Iterable[dict[str, Any]]) -> None:
+	"""Mantiene el índice al día tras confirmar altas de avisos."""
+	if _index is not None:
+		_index.add(avisos)
+
+
+def invalidate_absence_index() -> None:
+	if _index is not None:
+		_index.invalidate()
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+from collections import Counter
+from datetime import date, timedelta
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from .dao import _upsert_insert, session_scope
+from .models import Aviso, AusenciaDiaria, Employee
+
+
+# Capa de agregados para reportes: ausencias_diarias guarda, por día y por
+# (motivo, area, turno, estado_aviso), cuántas personas están ausentes y cuántos
+# avisos empiezan. Se mantiene en la misma transacción que create_aviso /
+# update_certificado / create_avisos_bulk, y rebuild_ausencias_diarias la
+# recalcula entera (p.ej. tras borrar avisos o cambiar el área de un empleado).
+# Un aviso cubre [fecha_inicio, fecha_fin] inclusive, igual que find_solape.
+
+DIMENSIONES = ("motivo", "area", "turno", "estado_aviso")
+
+# (dia, motivo, area, turno, estado_aviso)
+_Key = tuple[date, str, str, str, str]
+
+
+def _deltas(avisos: Iterable[dict[str, Any]], sign: int) -> dict[_Key, list[int]]:
+	"""{clave: [ausentes, inicios]} de un conjunto de avisos (con area/turno resueltos)."""
+	out: dict[_Key, list[int]] = {}
+	for av in avisos:
+		dims = (av["motivo"], av.get("area") or "", av.get("turno") or "", av.get("estado_aviso") or "")
+		fi, ff = av["fecha_inicio"], av["fecha_fin"]
+		for n in range((ff - fi).days + 1):
+			key = (fi + timedelta(days=n), *dims)
+			acc = out.get(key)
+			if acc is None:
+				acc = out[key] = [0, 0]
+			acc[0] += sign
+			if n == 0:
+				acc[1] += sign
+	return out
+
+
+def _with_employee_dims(session: Session, avisos: list[dict[str, Any]]) -> list[dict[str, Any]]:
+	legajos = {av["legajo"] for av in avisos if "area" not in av}
+	if not legajos:
+		return avisos
+	dims = {
+		leg: (area, turno)
+		for leg, area, turno in session.execute(
+			select(Employee.legajo, Employee.area, Employee.turno).where(Employee.legajo.in_(legajos))
+		)
+	}
+	out = []
+	for av in avisos:
+		if "area" not in av:
+			area, turno = dims.get(av["legajo"], (None, None))
+			av = av | {"area": area, "turno": turno}
+		out.append(av)
+	return out
+
+
+def _apply(session: Session, deltas: dict[_Key, list[int]]) -> None:
+	rows = [
+		{"dia": k[0], "motivo": k[1], "area": k[2], "turno": k[3], "estado_aviso": k[4], "ausentes": a, "inicios": i}
+		for k, (a, i) in deltas.items()
+		if a or i
+	]
+	if not rows:
+		return
+	upsert = _upsert_insert(session)
+	if upsert is not None:
+		stmt = upsert(AusenciaDiaria)
+		stmt = stmt.on_conflict_do_update(
+			index_elements=["dia", *DIMENSIONES],
+			set_={
+				"ausentes": AusenciaDiaria.ausentes + stmt.excluded.ausentes,
+				"inicios": AusenciaDiaria.inicios + stmt.excluded.inicios,
+			},
+		)
+		session.execute(stmt, rows)
+	else:
+		for r in rows:
+			upd = (
+				update(AusenciaDiaria)
+				.where(AusenciaDiaria.dia == r["dia"], *(getattr(AusenciaDiaria, d) == r[d] for d in DIMENSIONES))
+				.values(ausentes=AusenciaDiaria.ausentes + r["ausentes"], inicios=AusenciaDiaria.inicios + r["inicios"])
+			)
+			if session.execute(upd).rowcount == 0:
+				session.execute(insert(AusenciaDiaria).values(**r))
+	if any(r["ausentes"] < 0 or r["inicios"] < 0 for r in rows):
+		# Tras restar (cambio de estado) no dejar filas en cero
+		desde = min(r["dia"] for r in rows)
+		hasta = max(r["dia"] for r in rows)
+		session.execute(
+			delete(AusenciaDiaria)
+			.where(AusenciaDiaria.dia.between(desde, hasta))
+			.where(AusenciaDiaria.ausentes == 0, AusenciaDiaria.inicios == 0)
+		)
+
+
+def registrar_avisos(session: Session, avisos: list[dict[str, Any]], sign: int = 1) -> None:
+	"""Suma (sign=1) o resta (sign=-1) avisos al agregado, en la transacción del llamador.
+
+	Cada aviso: legajo, motivo, fecha_inicio, fecha_fin, estado_aviso (y opcionalmente area/turno).
+	"""
+	if avisos:
+		_apply(session, _deltas(_with_employee_dims(session, avisos), sign))
+
+
+def cambiar_estado(session: Session, aviso: dict[str, Any], estado_anterior: Optional[str]) -> None:
+	"""Mueve un aviso del estado anterior al actual (update_certificado)."""
+	if (estado_anterior or "") == (aviso.get("estado_aviso") or ""):
+		return
+	aviso = _with_employee_dims(session, [aviso])[0]
+	deltas = _deltas([aviso | {"estado_aviso": estado_anterior}], -1)
+	for k, (a, i) in _deltas([aviso], 1).items():
+		acc = deltas.setdefault(k, [0, 0])
+		acc[0] += a
+		acc[1] += i
+	_apply(session, deltas)
+
+
+def rebuild_ausencias_diarias(chunk_size: int = 5000) -> int:
+	"""Recalcula el agregado completo desde avisos + employees. Devuelve filas generadas.
+
+	Lectura y reescritura van en una sola transacción: un alta que confirme en
+	el medio no queda contada dos veces ni se pierde.
+	"""
+	q = (
+		select(Aviso.legajo, Aviso.motivo, Aviso.fecha_inicio, Aviso.fecha_fin, Aviso.estado_aviso, Employee.area, Employee.turno)
+		.join(Employee, Employee.legajo == Aviso.legajo, isouter=True)
+		.execution_options(yield_per=chunk_size)
+	)
+	acc: Counter[_Key] = Counter()
+	starts: Counter[_Key] = Counter()
+	with session_scope() as session:
+		for part in session.execute(q).partitions():
+			cols = ("legajo", "motivo", "fecha_inicio", "fecha_fin", "estado_aviso", "area", "turno")
+			for k, (a, i) in _deltas((dict(zip(cols, r)) for r in part), 1).items():
+				acc[k] += a
+				starts[k] += i
+		session.execute(delete(AusenciaDiaria))
+		_apply(session, {k: [a, starts[k]] for k, a in acc.items()})
+	return len(acc)
+
+
+def ausencias_por_dia(
+	desde: date,
+	hasta: date,
+	*,
+	group_by: Iterable[str] = ("motivo",),
+	por_dia: bool = True,
+	**filtros: Optional[str],
+) -> list[dict[str, Any]]:
+	"""Consulta el agregado: O(días × grupos), sin tocar avisos.
+
+	- group_by: subconjunto de DIMENSIONES.
+	- por_dia=False suma el rango (ausentes = días-persona).
+	- filtros: motivo/area/turno/estado_aviso = valor (None = sin dato).
+	Devuelve [{"dia"?, <dims>, "ausentes", "inicios"}].
+	"""
+	group_by = tuple(group_by)
+	bad = [d for d in (*group_by, *filtros) if d not in DIMENSIONES]
+	if bad:
+		raise ValueError(f"Dimensiones desconocidas: {bad}")
+	keys = [AusenciaDiaria.dia] if por_dia else []
+	keys += [getattr(AusenciaDiaria, d) for d in group_by]
+	q = (
+		select(*keys, func.sum(AusenciaDiaria.ausentes), func.sum(AusenciaDiaria.inicios))
+		.where(AusenciaDiaria.dia.between(desde, hasta))
+		.group_by(*keys)
+		.order_by(*keys)
+	)
+	for d, v in filtros.items():
+		q = q.where(getattr(AusenciaDiaria, d) == (v or ""))
+	names = (["dia"] if por_dia else []) + list(group_by)
+	with session_scope() as session:
+		rows = session.execute(q).all()
+	out = []
+	for r in rows:
+		item = {n: (v if n == "dia" else (v or None)) for n, v in zip(names, r)}
+		item["ausentes"], item["inicios"] = int(r[-2]), int(r[-1])
+		if item["ausentes"] or item["inicios"]:
+			out.append(item)
+	return out
@@ -1,15 +1,16 @@
 from __future__ import annotations
+from collections import defaultdict
 from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Iterator, Optional, Any, List
+from typing import Iterable, Iterator, Optional, Any, List
 
 from datetime import date, datetime, timedelta
 
-from sqlalchemy import create_engine, select, func
+from sqlalchemy import create_engine, exists, insert, select, update
 from sqlalchemy.orm import Session
 
 from ..config import settings
-from .models import Base, Employee, Aviso, Certificado
+from .models import Base, Employee, Aviso, Certificado, Notificacion, SecuenciaAviso
 
 
 _engine = create_engine(settings.DATABASE_URL, echo=False, future=True)
@@ -28,13 +29,56 @@ def session_scope() -> Iterator[Session]:
 		session.close()
 
 
+def _upsert_insert(session: Session) -> Optional[Any]:
+	"""insert() del dialecto con ON CONFLICT (SQLite/PostgreSQL) o None si no lo soporta."""
+	dialect = session.get_bind().dialect.name
+	if dialect == "sqlite":
+		from sqlalchemy.dialects.sqlite import insert as upsert
+	elif dialect == "postgresql":
+		from sqlalchemy.dialects.postgresql import insert as upsert
+	else:
+		return None
+	return upsert
+
+
+def _bump_secuencia(session: Session, dia: str, n: int) -> int:
+	"""Suma n al contador del día (creándolo si falta) y devuelve el nuevo último.
+
+	Es un upsert sobre la PK de secuencias_aviso dentro de la transacción del
+	llamador: dos altas concurrentes no pueden recibir el mismo número.
+	"""
+	upsert = _upsert_insert(session)
+	if upsert is not None:
+		stmt = (
+			upsert(SecuenciaAviso)
+			.values(dia=dia, ultimo=n)
+			.on_conflict_do_update(index_elements=[SecuenciaAviso.dia], set_={"ultimo": SecuenciaAviso.ultimo + n})
+			.returning(SecuenciaAviso.ultimo)
+		)
+		return session.execute(stmt).scalar_one()
+	# Otros motores: UPDATE atómico y alta del contador la primera vez
+	upd = update(SecuenciaAviso).where(SecuenciaAviso.dia == dia).values(ultimo=SecuenciaAviso.ultimo + n)
+	if session.execute(upd).rowcount == 0:
+		session.add(SecuenciaAviso(dia=dia, ultimo=n))
+		session.flush()
+	return session.execute(select(SecuenciaAviso.ultimo).where(SecuenciaAviso.dia == dia)).scalar_one()
+
+
+def reserve_ids_aviso(session: Session, fecha: date, n: int = 1) -> list[str]:
+	"""Reserva un bloque de n id_aviso consecutivos del día (para cargas masivas).
+
+	Si la transacción se revierte, el bloque se libera con ella.
+	"""
+	if n < 1:
+		raise ValueError("n debe ser >= 1")
+	dia = fecha.strftime("%Y%m%d")
+	ultimo = _bump_secuencia(session, dia, n)
+	return [f"A-{dia}-{seq:04d}" for seq in range(ultimo - n + 1, ultimo + 1)]
+
+
 def _gen_id_aviso(session: Session, fecha: date) -> str:
 	"""Genera id_aviso con formato A-YYYYMMDD-#### (#### secuencial por día)."""
-	prefix = fecha.strftime("A-%Y%m%d-")
-	q = select(func.count()).select_from(Aviso).where(Aviso.id_aviso.like(f"{prefix}%"))
-	n = session.execute(q).scalar_one()
-	seq = n + 1
-	return f"{prefix}{seq:04d}"
+	return reserve_ids_aviso(session, fecha, 1)[0]
 
 
 def _to_date_iso(d: Any) -> date:
@@ -45,17 +89,28 @@ def _to_date_iso(d: Any) -> date:
 	raise ValueError("fecha inválida")
 
 
+def _solape_where(legajo: str, fecha_inicio: date, fecha_fin: date) -> tuple[Any, ...]:
+	# Rangos cerrados que se tocan: inicio <= fin_nuevo y fin >= inicio_nuevo.
+	# Escrito así (sin NOT) usa ix_avisos_legajo_fechas.
+	return (
+		Aviso.legajo == str(legajo),
+		Aviso.fecha_inicio <= fecha_fin,
+		Aviso.fecha_fin >= fecha_inicio,
+	)
+
+
 def find_solape(session: Session, legajo: str, fecha_inicio: date, fecha_fin: date) -> Optional[Aviso]:
 	"""Busca un aviso que se solape para el mismo legajo y rango."""
-	q = (
-		select(Aviso)
-		.where(Aviso.legajo == legajo)
-		.where(~(Aviso.fecha_fin < fecha_inicio))
-		.where(~(Aviso.fecha_inicio > fecha_fin))
-	)
+	q = select(Aviso).where(*_solape_where(legajo, fecha_inicio, fecha_fin)).limit(1)
 	return session.execute(q).scalars().first()
 
 
+def exists_solape(session: Session, legajo: str, fecha_inicio: date, fecha_fin: date) -> bool:
+	"""True si hay un aviso solapado (solo existencia: no carga la fila)."""
+	q = select(exists().where(*_solape_where(legajo, fecha_inicio, fecha_fin)))
+	return bool(session.execute(q).scalar())
+
+
 def create_aviso(facts: dict[str, Any]) -> dict[str, Any]:
 	"""Crea aviso desde facts. Valida solape y genera id_aviso.
 
@@ -69,8 +124,7 @@ def create_aviso(facts: dict[str, Any]) -> dict[str, Any]:
 	ff = fi + timedelta(days=int(facts["duracion_estimdays"]))
 	with session_scope() as session:
 		# Validar solape
-		dup = find_solape(session, facts["legajo"], fi, ff)
-		if dup is not None:
+		if exists_solape(session, facts["legajo"], fi, ff):
 			raise ValueError("Solape detectado")
 		# Generar id
 		id_aviso = _gen_id_aviso(session, fi)
@@ -87,7 +141,35 @@ def create_aviso(facts: dict[str, Any]) -> dict[str, Any]:
 			adjunto=bool(facts.get("adjunto", False)),
 		)
 		session.add(av)
-		return {"id_aviso": id_aviso}
+		# Agregado diario (misma transacción)
+		from .analytics import registrar_avisos
+		registro = {
+			"id_aviso": id_aviso,
+			"legajo": av.legajo,
+			"motivo": av.motivo,
+			"fecha_inicio": fi,
+			"fecha_fin": ff,
+			"estado_aviso": av.estado_aviso,
+		}
+		registrar_avisos(session, [registro])
+	# Índice de ausencias: solo tras el commit
+	from .absence_index import notify_avisos
+	notify_avisos([registro])
+	return {"id_aviso": id_aviso}
+
+
+def _derivar_estados(adjunto: bool, valido: Optional[bool], documento_tipo: Optional[str]) -> tuple[str, str]:
+	"""(estado_certificado, estado_aviso) según adjunto, legibilidad y requerimiento documental."""
+	if adjunto:
+		estado_cert = "pendiente_revision" if valido is False else "validado"
+	else:
+		estado_cert = "pendiente"
+	# Estado aviso según requerimiento documental
+	if not documento_tipo or estado_cert == "validado":
+		estado_aviso = "completo"
+	else:
+		estado_aviso = "incompleto"
+	return estado_cert, estado_aviso
 
 
 def update_certificado(id_aviso: str, meta_doc: dict[str, Any]) -> dict[str, Any]:
@@ -118,27 +200,21 @@ def update_certificado(id_aviso: str, meta_doc: dict[str, Any]) -> dict[str, Any
 			fr = _to_date_iso(meta_doc["fecha_recepcion"])
 			cert.recibido_en = datetime.combine(fr, datetime.min.time())
 		# Derivar estado del certificado y reflejar en Aviso
-		if av.adjunto:
-			if cert.valido is False:
-				estado_cert = "pendiente_revision"
-			else:
-				estado_cert = "validado"
-		else:
-			estado_cert = "pendiente"
-		av.estado_certificado = estado_cert
+		estado_anterior = av.estado_aviso
+		av.estado_certificado, av.estado_aviso = _derivar_estados(av.adjunto, cert.valido, av.documento_tipo)
+		from .analytics import cambiar_estado
+		cambiar_estado(session, {
+			"legajo": av.legajo,
+			"motivo": av.motivo,
+			"fecha_inicio": av.fecha_inicio,
+			"fecha_fin": av.fecha_fin,
+			"estado_aviso": av.estado_aviso,
+		}, estado_anterior)
 		# Plazos y fuera de término: cálculo no persistente
 		fuera_de_termino = False
 		if cert.recibido_en and av.fecha_inicio:
 			delta = cert.recibido_en - datetime.combine(av.fecha_inicio, datetime.min.time())
 			fuera_de_termino = delta > timedelta(hours=int(meta_doc.get("plazo_cert_horas", 48)))
-		# Estado aviso según requerimiento documental
-		requiere_doc = bool(av.documento_tipo)
-		if not requiere_doc:
-			av.estado_aviso = "completo"
-		elif av.estado_certificado == "validado":
-			av.estado_aviso = "completo"
-		else:
-			av.estado_aviso = "incompleto"
 		return {
 			"estado_aviso": av.estado_aviso,
 			"estado_certificado": av.estado_certificado,
@@ -146,6 +222,163 @@ def update_certificado(id_aviso: str, meta_doc: dict[str, Any]) -> dict[str, Any
 		}
 
 
+_REQUIRED_AVISO = ("legajo", "motivo", "fecha_inicio", "duracion_estimdays")
+
+
+def _preparar_fila_bulk(facts: dict[str, Any]) -> dict[str, Any]:
+	"""Valida y arma las filas de aviso/certificado/notificaciones (ValueError si no sirve)."""
+	missing = [k for k in _REQUIRED_AVISO if not facts.get(k)]
+	if missing:
+		raise ValueError(f"Faltan campos: {missing}")
+	fi = _to_date_iso(facts["fecha_inicio"])
+	dur = int(facts["duracion_estimdays"])
+	aviso = {
+		"legajo": str(facts["legajo"]),
+		"motivo": str(facts["motivo"]),
+		"fecha_inicio": fi,
+		"fecha_fin": fi + timedelta(days=dur),
+		"duracion_estimdays": dur,
+		"documento_tipo": facts.get("documento_tipo"),
+		"estado_aviso": facts.get("estado_aviso"),
+		"estado_certificado": facts.get("estado_certificado"),
+		"adjunto": bool(facts.get("adjunto", False)),
+	}
+	cert = None
+	meta_doc = facts.get("certificado")
+	if meta_doc:
+		# Mismo formato y reglas que update_certificado
+		if meta_doc.get("archivo_nombre") is not None:
+			aviso["adjunto"] = bool(meta_doc["archivo_nombre"])
+		valido = bool(meta_doc["documento_legible"]) if "documento_legible" in meta_doc else None
+		recibido = None
+		if meta_doc.get("fecha_recepcion"):
+			recibido = datetime.combine(_to_date_iso(meta_doc["fecha_recepcion"]), datetime.min.time())
+		cert = {"tipo": meta_doc.get("documento_tipo"), "valido": valido, "recibido_en": recibido}
+		aviso["estado_certificado"], aviso["estado_aviso"] = _derivar_estados(
+			aviso["adjunto"], valido, aviso["documento_tipo"]
+		)
+	destinos = [str(d) for d in facts.get("notificaciones") or ()]
+	return {"aviso": aviso, "certificado": cert, "notificaciones": destinos}
+
+
+def _intervalos_existentes(
+	session: Session, legajos: list[str], desde: date, hasta: date, chunk: int = 500
+) -> dict[str, list[tuple[date, date]]]:
+	"""Rangos ya cargados por legajo que caen en [desde, hasta] (una consulta por bloque de legajos)."""
+	out: dict[str, list[tuple[date, date]]] = defaultdict(list)
+	for i in range(0, len(legajos), chunk):
+		q = (
+			select(Aviso.legajo, Aviso.fecha_inicio, Aviso.fecha_fin)
+			.where(Aviso.legajo.in_(legajos[i:i + chunk]))
+			.where(Aviso.fecha_inicio <= hasta)
+			.where(Aviso.fecha_fin >= desde)
+		)
+		for leg, fi, ff in session.execute(q):
+			out[leg].append((fi, ff))
+	return out
+
+
+def create_avisos_bulk(rows: Iterable[dict[str, Any]], *, chunk_size: int = 500) -> list[dict[str, Any]]:
+	"""Alta masiva de avisos (importaciones de RRHH/liquidación).
+
+	Cada fila son facts como en create_aviso, y opcionalmente:
+	- "certificado": meta_doc con el formato de update_certificado (deriva estados)
+	- "notificaciones": lista de destinos ("rrhh", "medico_laboral", ...)
+
+	Los solapes se validan en memoria contra los rangos existentes de los legajos
+	del lote (precargados) y contra las filas ya aceptadas del mismo lote. Los
+	id_aviso se reservan en bloques por día y las inserciones van por
+	executemany en transacciones de `chunk_size` avisos.
+
+	Devuelve un estado por fila, en el orden de entrada:
+	{"index", "status": "creado"|"solape"|"invalido"|"error", "id_aviso"?, "error"?}.
+	La validación de solape no bloquea altas concurrentes por otros caminos.
+	"""
+	report: list[dict[str, Any]] = []
+	prepared: list[tuple[int, dict[str, Any]]] = []
+	for i, facts in enumerate(rows):
+		try:
+			prepared.append((i, _preparar_fila_bulk(facts)))
+			report.append({"index": i, "status": "pendiente"})
+		except (ValueError, TypeError, KeyError) as e:
+			report.append({"index": i, "status": "invalido", "error": str(e)})
+	if not prepared:
+		return report
+
+	# Orden por legajo y fecha: los rangos de un legajo quedan contiguos
+	prepared.sort(key=lambda p: (p[1]["aviso"]["legajo"], p[1]["aviso"]["fecha_inicio"]))
+	legajos = sorted({p["aviso"]["legajo"] for _, p in prepared})
+	desde = min(p["aviso"]["fecha_inicio"] for _, p in prepared)
+	hasta = max(p["aviso"]["fecha_fin"] for _, p in prepared)
+	with session_scope() as session:
+		ocupados = _intervalos_existentes(session, legajos, desde, hasta)
+
+	aceptados: list[tuple[int, dict[str, Any]]] = []
+	for i, p in prepared:
+		av = p["aviso"]
+		rangos = ocupados[av["legajo"]]
+		if any(ini <= av["fecha_fin"] and fin >= av["fecha_inicio"] for ini, fin in rangos):
+			report[i] = {"index": i, "status": "solape", "error": "Solape detectado"}
+			continue
+		rangos.append((av["fecha_inicio"], av["fecha_fin"]))
+		aceptados.append((i, p))
+
+	for start in range(0, len(aceptados), chunk_size):
+		chunk = aceptados[start:start + chunk_size]
+		try:
+			with session_scope() as session:
+				# Un bloque de ids por día para todo el chunk
+				por_dia: dict[date, list[dict[str, Any]]] = defaultdict(list)
+				for _, p in chunk:
+					por_dia[p["aviso"]["fecha_inicio"]].append(p["aviso"])
+				for dia, avisos in por_dia.items():
+					for av, ida in zip(avisos, reserve_ids_aviso(session, dia, len(avisos))):
+						av["id_aviso"] = ida
+				certs: list[dict[str, Any]] = []
+				notifs: list[dict[str, Any]] = []
+				for _, p in chunk:
+					ida = p["aviso"]["id_aviso"]
+					if p["certificado"] is not None:
+						certs.append(p["certificado"] | {"id_aviso": ida})
+					notifs.extend({"id_aviso": ida, "destino": d} for d in p["notificaciones"])
+				session.execute(insert(Aviso), [p["aviso"] for _, p in chunk])
+				if certs:
+					session.execute(insert(Certificado), certs)
+				if notifs:
+					session.execute(insert(Notificacion), notifs)
+				from .analytics import registrar_avisos
+				registrar_avisos(session, [p["aviso"] for _, p in chunk])
+		except Exception as e:
+			for i, _ in chunk:
+				report[i] = {"index": i, "status": "error", "error": str(e)}
+			continue
+		from .absence_index import notify_avisos
+		notify_avisos(p["aviso"] for _, p in chunk)
+		for i, p in chunk:
+			report[i] = {"index": i, "status": "creado", "id_aviso": p["aviso"]["id_aviso"]}
+	return report
+
+
+def empleados_ausentes(
+	desde: Any,
+	hasta: Any = None,
+	*,
+	area: Optional[str] = None,
+	turno: Optional[str] = None,
+) -> list[dict[str, Any]]:
+	"""Quién está ausente en una fecha (o en el rango [desde, hasta]), opcionalmente por area/turno.
+
+	Responde desde el índice de intervalos en memoria (ver absence_index).
+	"""
+	from .absence_index import absence_index
+
+	d = _to_date_iso(desde)
+	h = _to_date_iso(hasta) if hasta is not None else d
+	if h < d:
+		raise ValueError("rango inválido")
+	return absence_index().ausentes(d, h, area=area, turno=turno)
+
+
 def historial_empleado(legajo: str, limit: int = 10) -> list[dict[str, Any]]:
 	"""Devuelve últimos avisos de un legajo (máx. limit)."""
 	with session_scope() as session:
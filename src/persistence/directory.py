@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable
+
+from sqlalchemy import select
+
+from .dao import session_scope
+from .models import Employee
+
+
+# Directorio de empleados en memoria para el gate de legajo: se precarga el set de
+# legajos activos con UNA consulta y se refresca por TTL (o al invalidarlo tras
+# escribir empleados). Un legajo que no está en el set se busca puntualmente una
+# vez (puede ser un alta reciente) y, si tampoco existe, queda en cache negativo.
+
+
+class EmployeeDirectory:
+	def __init__(
+		self,
+		ttl: float = 300.0,
+		negative_ttl: float = 60.0,
+		*,
+		clock: Callable[[], float] = time.monotonic,
+	) -> None:
+		self.ttl = ttl
+		self.negative_ttl = negative_ttl
+		self._clock = clock
+		self._lock = threading.Lock()
+		self._refresh_lock = threading.Lock()
+		self._epoch = 0  # se incrementa en cada invalidate
+		self._active: frozenset[str] = frozenset()
+		self._loaded_at: float | None = None
+		self._negative: dict[str, float] = {}  # legajo → vencimiento
+		self._stats = {"hits": 0, "negative_hits": 0, "lookups": 0, "refreshes": 0}
+
+	def _load_active(self) -> frozenset[str]:
+		from .seed import ensure_schema_once
+
+		ensure_schema_once()
+		with session_scope() as s:
+			rows = s.execute(select(Employee.legajo, Employee.activo)).all()
+		# activo NULL (filas previas a la columna) cuenta como activo
+		return frozenset(str(leg) for leg, activo in rows if activo is not False)
+
+	def _lookup(self, legajo: str) -> bool:
+		with session_scope() as s:
+			activo = s.execute(select(Employee.activo).where(Employee.legajo == legajo)).first()
+		return activo is not None and activo[0] is not False
+
+	def _fresh(self, now: float) -> bool:
+		return self._loaded_at is not None and now - self._loaded_at <= self.ttl
+
+	def _ensure_loaded(self) -> None:
+		# Doble chequeo: las consultas van fuera de _lock (que solo protege el estado)
+		# y _refresh_lock evita que varios hilos recarguen a la vez.
+		with self._lock:
+			if self._fresh(self._clock()):
+				return
+		with self._refresh_lock:
+			with self._lock:
+				if self._fresh(self._clock()):
+					return
+				epoch = self._epoch
+			active = self._load_active()
+			with self._lock:
+				self._active = active
+				self._negative.clear()
+				self._stats["refreshes"] += 1
+				# Un invalidate durante la consulta deja la carga marcada como vencida
+				if epoch == self._epoch:
+					self._loaded_at = self._clock()
+
+	def is_valid(self, legajo: str) -> bool:
+		"""True si el legajo existe y está activo."""
+		legajo = str(legajo)
+		self._ensure_loaded()
+		with self._lock:
+			if legajo in self._active:
+				self._stats["hits"] += 1
+				return True
+			expires = self._negative.get(legajo)
+			if expires is not None and expires > self._clock():
+				self._stats["negative_hits"] += 1
+				return False
+			self._stats["lookups"] += 1
+			epoch = self._epoch
+		found = self._lookup(legajo)
+		with self._lock:
+			if epoch != self._epoch:
+				return found
+			if found:
+				self._active = self._active | {legajo}
+				self._negative.pop(legajo, None)
+			else:
+				self._negative[legajo] = self._clock() + self.negative_ttl
+		return found
+
+	def invalidate(self) -> None:
+		"""Fuerza recarga en la próxima consulta (llamar tras altas/bajas de empleados)."""
+		with self._lock:
+			self._loaded_at = None
+			self._negative.clear()
+			self._epoch += 1
+
+	def stats(self) -> dict[str, Any]:
+		with self._lock:
+			return dict(self._stats) | {"active": len(self._active), "negative": len(self._negative)}
+
+
+_directory: EmployeeDirectory | None = None
+_directory_lock = threading.Lock()
+
+
+def employee_directory() -> EmployeeDirectory:
+	"""Directorio compartido del proceso."""
+	global _directory
+	if _directory is None:
+		with _directory_lock:
+			if _directory is None:
+				_directory = EmployeeDirectory()
+	return _directory
+
+
+def invalidate_employee_directory() -> None:
+	if _directory is not None:
+		_directory.invalidate()
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import func, select
+
+from .dao import session_scope
+from .export_powerbi import EXPORT_TABLES, _ensure_dir, _export_table
+from .models import Aviso, Auditoria, Certificado, Notificacion
+
+
+# Export incremental para Power BI. Por tabla se guarda una marca de agua (la
+# columna más alta ya exportada) y cada corrida escribe solo lo nuevo o
+# modificado en un archivo delta append-only:
+#   <out_dir>/<tabla>.csv                 snapshot completo (base)
+#   <out_dir>/<tabla>/delta-<ts>.csv      cambios desde el snapshot, en orden
+#   <out_dir>/_watermarks.json            estado de las marcas
+# Cada `compact_every` corridas (o si no hay estado) se rehace el snapshot y se
+# borran los deltas. Un delta puede repetir filas (lookback, snapshot en curso):
+# el consumidor se queda con la última versión por clave.
+
+STATE_FILE = "_watermarks.json"
+
+# tabla → (columna de marca de agua, es timestamp). employees no tiene marca:
+# es una dimensión chica y va completa en cada corrida.
+_WATERMARKS: dict[str, tuple[Any, bool]] = {
+	"avisos": (Aviso.updated_at, True),
+	"certificados": (Certificado.updated_at, True),
+	"notificaciones": (Notificacion.id, False),
+	"auditoria": (Auditoria.id, False),
+}
+
+
+def _load_state(out_dir: str) -> dict[str, Any]:
+	path = os.path.join(out_dir, STATE_FILE)
+	if not os.path.isfile(path):
+		return {}
+	with open(path, encoding="utf-8") as f:
+		return json.load(f)
+
+
+def _save_state(out_dir: str, state: dict[str, Any]) -> None:
+	path = os.path.join(out_dir, STATE_FILE)
+	with open(path + ".tmp", "w", encoding="utf-8") as f:
+		json.dump(state, f, ensure_ascii=False, indent=2)
+	os.replace(path + ".tmp", path)
+
+
+def _encode(value: Any) -> Any:
+	return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _decode(value: Any, is_ts: bool) -> Any:
+	return datetime.fromisoformat(value) if is_ts and value is not None else value
+
+
+def _current_max(column: Any) -> Any:
+	with session_scope() as session:
+		return session.execute(select(func.max(column))).scalar()
+
+
+def _clear_deltas(table_dir: str) -> None:
+	if os.path.isdir(table_dir):
+		for name in os.listdir(table_dir):
+			if name.startswith("delta-"):
+				os.remove(os.path.join(table_dir, name))
+
+
+def export_incremental(
+	out_dir: str = "./exports",
+	*,
+	compress: bool = False,
+	compact_every: int = 24,
+	force_full: bool = False,
+	lookback_s: float = 60.0,
+) -> dict[str, Any]:
+	"""Exporta solo lo nuevo/modificado desde la corrida anterior.
+
+	- compact_every: cada cuántas corridas incrementales se rehace el snapshot.
+	- lookback_s: margen hacia atrás para marcas por timestamp (transacciones que
+	  confirman con un updated_at anterior a la última marca).
+	Devuelve {"mode": "full"|"delta", "files": [...], "rows": {tabla: n}}.
+	"""
+	_ensure_dir(out_dir)
+	state = _load_state(out_dir)
+	full = force_full or not state or state.get("runs_since_full", 0) >= compact_every
+	ext = ".csv.gz" if compress else ".csv"
+	stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+	files: list[str] = []
+	rows: dict[str, int] = {}
+	marks: dict[str, Any] = dict(state.get("watermarks", {}))
+
+	for name, (model, fieldnames) in EXPORT_TABLES.items():
+		wm = _WATERMARKS.get(name)
+		table_dir = os.path.join(out_dir, name)
+		if wm is None or full:
+			# La marca se toma antes del snapshot: lo que entre durante la
+			# exportación sale también en el próximo delta (duplicado inocuo)
+			if wm is not None:
+				marks[name] = _encode(_current_max(wm[0]))
+			path = os.path.join(out_dir, name + ext)
+			rows[name] = _export_table(model, fieldnames, path, compress=compress)
+			files.append(path)
+			if full:
+				_clear_deltas(table_dir)
+			continue
+		column, is_ts = wm
+		upper = _current_max(column)
+		lower = _decode(marks.get(name), is_ts)
+		if upper is None or upper == lower:
+			rows[name] = 0  # sin cambios desde la corrida anterior
+			continue
+		where = column <= upper
+		if lower is not None:
+			if is_ts:
+				lower = lower - timedelta(seconds=lookback_s)
+			where = where & (column > lower)
+		_ensure_dir(table_dir)
+		path = os.path.join(table_dir, f"delta-{stamp}{ext}")
+		n = _export_table(model, fieldnames, path, compress=compress, where=where)
+		if n:
+			files.append(path)
+		else:
+			os.remove(path)
+		rows[name] = n
+		marks[name] = _encode(upper)
+
+	_save_state(out_dir, {
+		"watermarks": marks,
+		"runs_since_full": 0 if full else state.get("runs_since_full", 0) + 1,
+		"last_run": stamp,
+		"last_full": stamp if full else state.get("last_full"),
+	})
+	return {"mode": "full" if full else "delta", "files": files, "rows": rows}
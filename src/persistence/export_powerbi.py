@@ -1,13 +1,60 @@
 from __future__ import annotations
 import os
 import csv
+import gzip
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
-from typing import Iterable
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from sqlalchemy import JSON, Boolean, Date, DateTime, Integer, select
 
 from .dao import session_scope
-from .models import Employee, Aviso, Certificado, Notificacion, Auditoria
+from .models import Employee, Aviso, Certificado, Notificacion, Auditoria, AusenciaDiaria
 import json
 
+try:
+	import pyarrow as pa
+except Exception:  # pragma: no cover - pyarrow es opcional (solo export columnar)
+	pa = None  # type: ignore
+try:
+	import pyarrow.parquet as pq
+except Exception:  # pragma: no cover - build de pyarrow sin Parquet → Arrow IPC
+	pq = None  # type: ignore
+
+
+# Tablas exportadas (en este orden) y sus columnas
+EXPORT_TABLES: dict[str, tuple[type, list[str]]] = {
+	"employees": (Employee, ["legajo", "nombre", "area", "puesto", "fecha_ingreso", "turno", "activo"]),
+	"avisos": (Aviso, [
+		"id_aviso",
+		"legajo",
+		"motivo",
+		"fecha_inicio",
+		"fecha_fin",
+		"duracion_estimdays",
+		"estado_aviso",
+		"estado_certificado",
+		"documento_tipo",
+		"adjunto",
+		"created_at",
+	]),
+	"certificados": (Certificado, ["id", "id_aviso", "tipo", "recibido_en", "valido", "notas"]),
+	"notificaciones": (Notificacion, ["id", "id_aviso", "destino", "enviado_en", "canal", "payload"]),
+	"auditoria": (Auditoria, ["id", "entidad", "entidad_id", "accion", "ts", "actor", "detalle"]),
+}
+
+# Agregados precalculados (ver analytics): opcionales con include_analytics=True
+ANALYTICS_TABLES: dict[str, tuple[type, list[str]]] = {
+	"ausencias_diarias": (AusenciaDiaria, ["dia", "motivo", "area", "turno", "estado_aviso", "ausentes", "inicios"]),
+}
+
+CHUNK_SIZE = 5000
+
+
+def _tables(include_analytics: bool) -> dict[str, tuple[type, list[str]]]:
+	return EXPORT_TABLES | ANALYTICS_TABLES if include_analytics else EXPORT_TABLES
+
 
 def _ensure_dir(path: str) -> None:
 	if not os.path.isdir(path):
@@ -22,68 +69,243 @@ def _iso(v):
 	return v
 
 
-def _export_table(query, fieldnames: list[str], out_path: str) -> None:
+def _converter(column: Any) -> Optional[Callable[[Any], Any]]:
+	"""Conversión a texto según el tipo declarado de la columna (None = tal cual)."""
+	if isinstance(column.type, (Date, DateTime)):
+		return lambda v: v.isoformat() if v is not None else None
+	if isinstance(column.type, JSON):
+		return _iso
+	return None
+
+
+def iter_table_chunks(model: type, fieldnames: list[str], chunk_size: int = CHUNK_SIZE, where: Any = None) -> Iterator[list[tuple]]:
+	"""Filas de la tabla como tuplas (columnas planas), en bloques de chunk_size.
+
+	Usa yield_per (cursor en streaming): la memoria depende del bloque, no de la tabla.
+	"""
+	cols = [getattr(model, k) for k in fieldnames]
+	q = select(*cols)
+	if where is not None:
+		q = q.where(where)
 	with session_scope() as session:
-		objects = [row[0] for row in session.execute(query).all()]
-	with open(out_path, "w", newline="", encoding="utf-8") as f:
+		result = session.execute(q.execution_options(yield_per=chunk_size))
+		for part in result.partitions():
+			yield [tuple(r) for r in part]
+
+
+def _csv_rows(model: type, fieldnames: list[str], chunk: list[tuple]) -> list[tuple] | list[list]:
+	convs = [(i, c) for i, c in enumerate(_converter(model.__table__.c[k]) for k in fieldnames) if c is not None]
+	if not convs:
+		return chunk
+	out = []
+	for row in chunk:
+		row = list(row)
+		for i, conv in convs:
+			row[i] = conv(row[i])
+		out.append(row)
+	return out
+
+
+def _open_text(path: str, compress: bool):
+	if compress:
+		return gzip.open(path, "wt", newline="", encoding="utf-8", compresslevel=6)
+	return open(path, "w", newline="", encoding="utf-8")
+
+
+@contextmanager
+def _atomic_path(out_path: str) -> Iterator[str]:
+	"""Ruta temporal que se renombra a out_path al terminar: un lector nunca ve un archivo a medias."""
+	tmp_path = out_path + ".tmp"
+	try:
+		yield tmp_path
+		os.replace(tmp_path, out_path)
+	except BaseException:
+		if os.path.exists(tmp_path):
+			os.remove(tmp_path)
+		raise
+
+
+def _export_table(model: type, fieldnames: list[str], out_path: str, *, compress: bool = False, chunk_size: int = CHUNK_SIZE, where: Any = None) -> int:
+	"""Escribe la tabla en CSV por bloques; devuelve la cantidad de filas."""
+	rows = 0
+	with _atomic_path(out_path) as tmp_path, _open_text(tmp_path, compress) as f:
 		w = csv.writer(f, delimiter=",")
 		w.writerow(fieldnames)
-		for obj in objects:
-			w.writerow([_iso(getattr(obj, k)) for k in fieldnames])
+		for chunk in iter_table_chunks(model, fieldnames, chunk_size, where):
+			w.writerows(_csv_rows(model, fieldnames, chunk))
+			rows += len(chunk)
+	return rows
 
 
-def export_all_csv(out_dir: str = "./exports") -> list[str]:
+def export_all_csv(
+	out_dir: str = "./exports",
+	*,
+	compress: bool = False,
+	max_workers: int = 4,
+	chunk_size: int = CHUNK_SIZE,
+	include_analytics: bool = False,
+) -> list[str]:
 	"""Exporta todas las tablas en CSV con separador coma y fechas en ISO.
 
+	Las tablas se exportan en paralelo (una conexión de lectura por tabla) y en
+	streaming; con compress=True se escriben como .csv.gz. include_analytics
+	agrega ausencias_diarias.
 	Devuelve lista de rutas de archivos generados.
 	"""
 	_ensure_dir(out_dir)
-	from sqlalchemy import select
+	ext = ".csv.gz" if compress else ".csv"
+	jobs = [
+		(model, fieldnames, os.path.join(out_dir, name + ext))
+		for name, (model, fieldnames) in _tables(include_analytics).items()
+	]
+	with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs))), thread_name_prefix="export") as ex:
+		futures = [ex.submit(_export_table, m, fn, p, compress=compress, chunk_size=chunk_size) for m, fn, p in jobs]
+		for fut in futures:
+			fut.result()
+	return [p for _, _, p in jobs]
 
-	outputs: list[str] = []
 
-	# employees
-	fn = ["legajo", "nombre", "area", "puesto", "fecha_ingreso", "turno", "activo"]
-	p = os.path.join(out_dir, "employees.csv")
-	_export_table(select(Employee), fn, p)
-	outputs.append(p)
+# --- Export columnar (Parquet / Arrow IPC) ---
 
-	# avisos
-	fn = [
-		"id_aviso",
-		"legajo",
-		"motivo",
-		"fecha_inicio",
-		"fecha_fin",
-		"duracion_estimdays",
-		"estado_aviso",
-		"estado_certificado",
-		"documento_tipo",
-		"adjunto",
-		"created_at",
-	]
-	p = os.path.join(out_dir, "avisos.csv")
-	_export_table(select(Aviso), fn, p)
-	outputs.append(p)
+# Columnas de valores repetidos: se escriben con codificación de diccionario
+DICTIONARY_COLUMNS: dict[str, set[str]] = {
+	"employees": {"area", "turno"},
+	"avisos": {"motivo", "estado_aviso", "estado_certificado", "documento_tipo"},
+	"certificados": {"tipo"},
+	"notificaciones": {"destino", "canal"},
+	"auditoria": {"entidad", "accion", "actor"},
+	"ausencias_diarias": {"motivo", "area", "turno", "estado_aviso"},
+}
+
+ROW_GROUP_SIZE = 64_000
+
+
+def _ensure_pyarrow() -> Any:
+	if pa is None:
+		raise RuntimeError("pyarrow no está instalado. Instalar 'pyarrow' para exportar en Parquet/Arrow")
+	return pa
+
+
+class _DictEncoder:
+	"""Diccionario acumulado entre bloques: cada bloque extiende al anterior
+	(requisito de Arrow IPC, que solo admite deltas de diccionario)."""
 
-	# certificados
-	fn = ["id", "id_aviso", "tipo", "recibido_en", "valido", "notas"]
-	p = os.path.join(out_dir, "certificados.csv")
-	_export_table(select(Certificado), fn, p)
-	outputs.append(p)
+	def __init__(self) -> None:
+		self.index: dict[str, int] = {}
+		self.values: list[str] = []
 
-	# notificaciones
-	fn = ["id", "id_aviso", "destino", "enviado_en", "canal", "payload"]
-	p = os.path.join(out_dir, "notificaciones.csv")
-	_export_table(select(Notificacion), fn, p)
-	outputs.append(p)
+	def encode(self, col: tuple) -> Any:
+		idx = self.index
+		codes: list[Optional[int]] = []
+		for v in col:
+			if v is None:
+				codes.append(None)
+				continue
+			i = idx.get(v)
+			if i is None:
+				i = idx[v] = len(self.values)
+				self.values.append(v)
+			codes.append(i)
+		return pa.DictionaryArray.from_arrays(pa.array(codes, pa.int32()), pa.array(self.values, pa.string()))
 
-	# auditoria
-	fn = ["id", "entidad", "entidad_id", "accion", "ts", "actor", "detalle"]
-	p = os.path.join(out_dir, "auditoria.csv")
-	_export_table(select(Auditoria), fn, p)
-	outputs.append(p)
 
-	return outputs
+def _arrow_schema(name: str, model: type, fieldnames: list[str]) -> Any:
+	dict_cols = DICTIONARY_COLUMNS.get(name, set())
+	fields = []
+	for k in fieldnames:
+		ctype = model.__table__.c[k].type
+		if k in dict_cols:
+			t = pa.dictionary(pa.int32(), pa.string())
+		elif isinstance(ctype, DateTime):
+			t = pa.timestamp("us")
+		elif isinstance(ctype, Date):
+			t = pa.date32()
+		elif isinstance(ctype, Boolean):
+			t = pa.bool_()
+		elif isinstance(ctype, Integer):
+			t = pa.int64()
+		else:  # String, Text y JSON (como texto JSON)
+			t = pa.string()
+		fields.append(pa.field(k, t))
+	return pa.schema(fields)
 
 
+def _export_table_columnar(
+	name: str,
+	model: type,
+	fieldnames: list[str],
+	out_path: str,
+	fmt: str,
+	*,
+	row_group_size: int = ROW_GROUP_SIZE,
+	compression: str = "zstd",
+) -> int:
+	"""Escribe la tabla en Parquet (un row group por bloque) o Arrow IPC; devuelve filas."""
+	schema = _arrow_schema(name, model, fieldnames)
+	encoders = {k: _DictEncoder() for k in fieldnames if pa.types.is_dictionary(schema.field(k).type)}
+	json_cols = {k for k in fieldnames if isinstance(model.__table__.c[k].type, JSON)}
+	rows = 0
+	with _atomic_path(out_path) as tmp_path:
+		if fmt == "parquet":
+			writer = pq.ParquetWriter(tmp_path, schema, compression=compression)
+		else:
+			options = pa.ipc.IpcWriteOptions(compression=compression, emit_dictionary_deltas=True)
+			writer = pa.ipc.new_file(tmp_path, schema, options=options)
+		try:
+			chunks = iter_table_chunks(model, fieldnames, row_group_size)
+			for chunk in chunks:
+				arrays = []
+				for k, col in zip(fieldnames, zip(*chunk)):
+					if k in encoders:
+						arrays.append(encoders[k].encode(col))
+					else:
+						if k in json_cols:
+							col = tuple(_iso(v) for v in col)
+						arrays.append(pa.array(col, schema.field(k).type))
+				batch = pa.RecordBatch.from_arrays(arrays, schema=schema)
+				if fmt == "parquet":
+					writer.write_batch(batch, row_group_size=row_group_size)
+				else:
+					writer.write_batch(batch)
+				rows += len(chunk)
+		finally:
+			writer.close()
+	return rows
+
+
+def export_all_columnar(
+	out_dir: str = "./exports",
+	*,
+	fmt: str = "auto",
+	row_group_size: int = ROW_GROUP_SIZE,
+	compression: str = "zstd",
+	max_workers: int = 4,
+	include_analytics: bool = False,
+) -> list[str]:
+	"""Exporta las mismas tablas que export_all_csv en formato columnar tipado.
+
+	- fmt: "parquet", "arrow" (IPC/Feather v2) o "auto" (Parquet si está disponible).
+	- Fechas, booleanos y enteros con tipo nativo; enums con diccionario; JSON como texto.
+	- include_analytics agrega ausencias_diarias.
+	Devuelve lista de rutas de archivos generados.
+	"""
+	_ensure_pyarrow()
+	if fmt == "auto":
+		fmt = "parquet" if pq is not None else "arrow"
+	if fmt not in ("parquet", "arrow"):
+		raise ValueError(f"formato desconocido: {fmt}")
+	if fmt == "parquet" and pq is None:
+		raise RuntimeError("pyarrow se instaló sin soporte Parquet; usar fmt='arrow'")
+	_ensure_dir(out_dir)
+	jobs = [
+		(name, model, fieldnames, os.path.join(out_dir, f"{name}.{fmt}"))
+		for name, (model, fieldnames) in _tables(include_analytics).items()
+	]
+	with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs))), thread_name_prefix="export") as ex:
+		futures = [
+			ex.submit(_export_table_columnar, n, m, fn, p, fmt, row_group_size=row_group_size, compression=compression)
+			for n, m, fn, p in jobs
+		]
+		for fut in futures:
+			fut.result()
+	return [p for *_, p in jobs]
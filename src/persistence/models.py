@@ -1,7 +1,7 @@
 from __future__ import annotations
 from typing import Optional
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from sqlalchemy import String, Integer, Date, Boolean, Text, DateTime, JSON, ForeignKey
+from sqlalchemy import String, Integer, Date, Boolean, Text, DateTime, JSON, ForeignKey, Index
 from datetime import datetime, date
 
 
@@ -24,6 +24,12 @@ class Employee(Base):
 
 class Aviso(Base):
 	__tablename__ = "avisos"
+	__table_args__ = (
+		# Chequeo de solape: legajo + rango (fecha_fin queda cubierta por el índice)
+		Index("ix_avisos_legajo_fechas", "legajo", "fecha_inicio", "fecha_fin"),
+		# Historial del empleado ordenado por creación
+		Index("ix_avisos_legajo_created", "legajo", "created_at"),
+	)
 
 	# id_aviso como PK textual
 	id_aviso: Mapped[str] = mapped_column(String(64), primary_key=True)
@@ -38,10 +44,35 @@ class Aviso(Base):
 	documento_tipo: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
 	adjunto: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
 	created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+	# Última modificación (marca de agua del export incremental); NULL en filas previas
+	updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True)
+
+
+class SecuenciaAviso(Base):
+	__tablename__ = "secuencias_aviso"
+
+	# Último número entregado por día (dia = YYYYMMDD del prefijo de id_aviso)
+	dia: Mapped[str] = mapped_column(String(8), primary_key=True)
+	ultimo: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class AusenciaDiaria(Base):
+	__tablename__ = "ausencias_diarias"
+
+	# Agregado por día y dimensiones ("" = sin dato; las PK no admiten NULL)
+	dia: Mapped[date] = mapped_column(Date, primary_key=True)
+	motivo: Mapped[str] = mapped_column(String(50), primary_key=True)
+	area: Mapped[str] = mapped_column(String(100), primary_key=True, default="")
+	turno: Mapped[str] = mapped_column(String(50), primary_key=True, default="")
+	estado_aviso: Mapped[str] = mapped_column(String(50), primary_key=True, default="")
+	# Personas ausentes ese día (sumado en un rango = días-persona) y avisos que empiezan ese día
+	ausentes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+	inicios: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
 
 
 class Certificado(Base):
 	__tablename__ = "certificados"
+	__table_args__ = (Index("ix_certificados_id_aviso", "id_aviso"),)
 
 	id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
 	id_aviso: Mapped[str] = mapped_column(String(64), ForeignKey("avisos.id_aviso"), nullable=False)
@@ -49,10 +80,12 @@ class Certificado(Base):
 	recibido_en: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
 	valido: Mapped[Optional[bool]] = mapped_column(Boolean, nullable=True)
 	notas: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+	updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True)
 
 
 class Notificacion(Base):
 	__tablename__ = "notificaciones"
+	__table_args__ = (Index("ix_notificaciones_id_aviso", "id_aviso"),)
 
 	id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
 	id_aviso: Mapped[str] = mapped_column(String(64), ForeignKey("avisos.id_aviso"), nullable=False)
@@ -1,9 +1,13 @@
 from __future__ import annotations
 from random import choice, randint
 
-from .models import Base, Employee
-from .dao import session_scope, _engine
-from sqlalchemy import text
+import threading
+
+from .models import Aviso, Base, Employee, SecuenciaAviso
+from .dao import _upsert_insert, session_scope, _engine
+from .directory import invalidate_employee_directory
+from sqlalchemy import Integer, case, cast, func, insert, select, text
+from sqlalchemy.orm import Session
 
 try:
 	from faker import Faker
@@ -42,6 +46,7 @@ def ensure_schema() -> None:
 		for coldef in (
 			"fecha_fin DATE",
 			"adjunto BOOLEAN DEFAULT 0",
+			"updated_at DATETIME",
 		):
 			add_column_if_missing("avisos", coldef)
 		# Si existe columna antigua obligatoria, intentar relajarlo creando si falta y dejando NULL permitido.
@@ -53,6 +58,7 @@ def ensure_schema() -> None:
 			"recibido_en DATETIME",
 			"valido BOOLEAN",
 			"notas TEXT",
+			"updated_at DATETIME",
 		):
 			add_column_if_missing("certificados", coldef)
 
@@ -75,6 +81,71 @@ def ensure_schema() -> None:
 		):
 			add_column_if_missing("auditoria", coldef)
 
+		# Índices declarados en los modelos: create_all solo los crea junto con
+		# tablas nuevas, en bases existentes se agregan acá
+		for table in Base.metadata.sorted_tables:
+			for index in table.indexes:
+				index.create(bind=conn, checkfirst=True)
+
+	# secuencias_aviso recién creada en una base con avisos: alinear contadores
+	with session_scope() as session:
+		_backfill_secuencias(session)
+
+	# ausencias_diarias recién creada en una base con avisos: calcular el agregado
+	with _engine.connect() as conn:
+		sin_agregado = conn.exec_driver_sql(
+			"SELECT EXISTS (SELECT 1 FROM avisos) AND NOT EXISTS (SELECT 1 FROM ausencias_diarias)"
+		).scalar()
+	if sin_agregado:
+		from .analytics import rebuild_ausencias_diarias
+		rebuild_ausencias_diarias()
+
+
+def _backfill_secuencias(session: Session) -> None:
+	"""Carga secuencias_aviso desde los avisos existentes si la tabla está vacía.
+
+	A-YYYYMMDD-####: el día son los caracteres 3..10, el número desde el 12.
+	"""
+	if session.execute(select(SecuenciaAviso.dia).limit(1)).first() is not None:
+		return
+	dia = func.substr(Aviso.id_aviso, 3, 8)
+	rows = [
+		{"dia": d, "ultimo": ultimo}
+		for d, ultimo in session.execute(
+			select(dia, func.max(cast(func.substr(Aviso.id_aviso, 12), Integer)))
+			.where(Aviso.id_aviso.like("A-________-%"))
+			.group_by(dia)
+		)
+	]
+	if not rows:
+		return
+	upsert = _upsert_insert(session)
+	if upsert is None:
+		session.execute(insert(SecuenciaAviso), rows)
+		return
+	# Un alta concurrente pudo crear el contador del día entre el chequeo y acá
+	stmt = upsert(SecuenciaAviso)
+	stmt = stmt.on_conflict_do_update(
+		index_elements=[SecuenciaAviso.dia],
+		set_={"ultimo": case((stmt.excluded.ultimo > SecuenciaAviso.ultimo, stmt.excluded.ultimo), else_=SecuenciaAviso.ultimo)},
+	)
+	session.execute(stmt, rows)
+
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def ensure_schema_once() -> None:
+	"""ensure_schema una sola vez por proceso (arranque); llamadas siguientes no tocan la BD."""
+	global _schema_ready
+	if _schema_ready:
+		return
+	with _schema_lock:
+		if not _schema_ready:
+			ensure_schema()
+			_schema_ready = True
+
 
 def seed_employees() -> None:
 	with session_scope() as session:
@@ -87,6 +158,7 @@ def seed_employees() -> None:
 			for i in range(10)
 		]
 		session.add_all(empleados)
+	invalidate_employee_directory()
 
 
 def seed_employees_synthetic(n: int = 200) -> int:
@@ -130,6 +202,8 @@ def seed_employees_synthetic(n: int = 200) -> int:
 			)
 			session.add(e)
 			created += 1
+	if created:
+		invalidate_employee_directory()
 	return created
 
 
@@ -11,6 +11,7 @@ except Exception:  # pragma: no cover
 
 from .models import Employee, Aviso, Certificado, Notificacion
 from .dao import session_scope
+from .directory import invalidate_employee_directory
 from .seed import ensure_schema
 
 
@@ -53,6 +54,8 @@ def seed_employees_synthetic(n: int = 200) -> int:
 			)
 			s.add(emp)
 			created += 1
+	if created:
+		invalidate_employee_directory()
 	return created
 
 
@@ -85,17 +88,19 @@ _DOC_MAP = {
 def seed_absences_synthetic(m: int = 150) -> int:
 	"""Crea avisos sintéticos y, si corresponde, certificados y notificaciones.
 
-	- Usa create_aviso/update_certificado cuando aplica para respetar reglas
+	- Carga todo con create_avisos_bulk (mismas reglas que create_aviso/update_certificado)
 	- Idempotente: id_aviso es único, solapes son evitados por DAO (se saltean)
 	"""
+	from .dao import create_avisos_bulk
+
 	ensure_schema()
-	fake = _ensure_faker()
-	created = 0
+	_ensure_faker()
 	with session_scope() as s:
 		legajos = [row[0] for row in s.query(Employee.legajo).all()]
 		if not legajos:
 			return 0
 
+	rows = []
 	for _ in range(m):
 		leg = random.choice(legajos)
 		motivo = _pick_motivo_weighted()
@@ -112,41 +117,27 @@ def seed_absences_synthetic(m: int = 150) -> int:
 		}
 		if doc_tipo:
 			facts["documento_tipo"] = doc_tipo
-		try:
-			from .dao import create_aviso, update_certificado
-			res = create_aviso(facts)
-			ida = res.get("id_aviso")
-			# Certificado (si aplica)
-			if doc_tipo is not None:
-				# 70% adjunta, 30% pendiente
-				if random.random() < 0.7:
-					legible = random.random() < 0.8
-					recibida_en = (fi + timedelta(days=random.randint(0, 5))).isoformat()
-					update_certificado(ida, {
-						"archivo_nombre": f"{doc_tipo}.pdf",
-						"documento_legible": legible,
-						"fecha_recepcion": recibida_en,
-						"plazo_cert_horas": 72,
-					})
-				# else: queda pendiente/incompleto
-			# Notificaciones mínimas (directas)
-			with session_scope() as s2:
-				# rrhh siempre
-				s2.add(Notificacion(id_aviso=ida, destino="rrhh"))
-				if motivo in {"enfermedad_inculpable", "art"}:
-					s2.add(Notificacion(id_aviso=ida, destino="medico_laboral"))
-				if motivo == "fallecimiento":
-					s2.add(Notificacion(id_aviso=ida, destino="supervisor"))
-				if motivo == "permiso_gremial":
-					s2.add(Notificacion(id_aviso=ida, destino="delegado_gremial"))
-			created += 1
-		except ValueError:
-			# Solape u otros errores de validación → omitir
-			continue
-		except Exception:
-			# Error inesperado → omitir para robustez de semillas
-			continue
-	return created
+			# Certificado: 70% adjunta, 30% queda pendiente/incompleto
+			if random.random() < 0.7:
+				legible = random.random() < 0.8
+				recibida_en = (fi + timedelta(days=random.randint(0, 5))).isoformat()
+				facts["certificado"] = {
+					"archivo_nombre": f"{doc_tipo}.pdf",
+					"documento_legible": legible,
+					"fecha_recepcion": recibida_en,
+				}
+		# Notificaciones mínimas: rrhh siempre
+		destinos = ["rrhh"]
+		if motivo in {"enfermedad_inculpable", "art"}:
+			destinos.append("medico_laboral")
+		if motivo == "fallecimiento":
+			destinos.append("supervisor")
+		if motivo == "permiso_gremial":
+			destinos.append("delegado_gremial")
+		facts["notificaciones"] = destinos
+		rows.append(facts)
+	# Solapes u otros errores de validación → se omiten
+	return sum(1 for r in create_avisos_bulk(rows) if r["status"] == "creado")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Iterable
+
+
+logger = logging.getLogger(__name__)
+
+
+# Backends de persistencia para SessionStore. El store mantiene las sesiones
+# vivas en memoria; el backend guarda una copia serializada para sobrevivir a
+# reinicios y compartir estado entre workers. Las escrituras se encolan y un
+# hilo las baja en lotes (la última versión de cada clave gana).
+
+
+def dumps_session(value: Any, transient: Iterable[str] = ()) -> bytes:
+	"""JSON compacto sin las claves transitorias; zlib si el payload es grande."""
+	if isinstance(value, dict) and transient:
+		value = {k: v for k, v in value.items() if k not in transient}
+	raw = json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+	if len(raw) > 512:
+		return b"z" + zlib.compress(raw)
+	return b"j" + raw
+
+
+def loads_session(data: bytes) -> Any:
+	if data[:1] == b"z":
+		return json.loads(zlib.decompress(data[1:]).decode("utf-8"))
+	return json.loads(data[1:].decode("utf-8"))
+
+
+class SessionBackend:
+	"""Interfaz de persistencia (por espacio de nombres: "dialogo", "legajos", ...)."""
+
+	def load(self, namespace: str, key: str, max_age: float | None = None) -> Any:
+		"""Valor guardado o None (también si es más viejo que max_age segundos)."""
+		return None
+
+	def save(self, namespace: str, key: str, value: Any, transient: Iterable[str] = ()) -> None:
+		pass
+
+	def delete(self, namespace: str, key: str) -> None:
+		pass
+
+	def flush(self) -> None:
+		pass
+
+	def close(self) -> None:
+		pass
+
+
+class MemoryBackend(SessionBackend):
+	"""Default: sin persistencia (el estado vive solo en el SessionStore)."""
+
+
+class SQLiteSessionBackend(SessionBackend):
+	"""Sesiones en un archivo SQLite, con escritura asincrónica por lotes.
+
+	- save/delete encolan la operación (se serializa en el momento, así cambios
+	  posteriores de la sesión no se mezclan) y vuelven enseguida.
+	- Un hilo baja la cola cada `flush_interval` segundos o al juntar
+	  `batch_size` operaciones, en una sola transacción.
+	- load lee directo del archivo (primero mira la cola pendiente).
+	- Si un lote falla (p.ej. "database is locked" con varios workers sobre el
+	  mismo archivo) sus operaciones vuelven a la cola, salvo las claves que ya
+	  tienen una escritura más nueva, y se reintentan en el próximo ciclo.
+	"""
+
+	def __init__(self, path: str | Path, *, flush_interval: float = 0.5, batch_size: int = 200) -> None:
+		self.path = str(path)
+		self.flush_interval = flush_interval
+		self.batch_size = batch_size
+		self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+		self._conn.execute("PRAGMA journal_mode=WAL")
+		self._conn.execute("PRAGMA synchronous=NORMAL")
+		self._conn.execute(
+			"CREATE TABLE IF NOT EXISTS sessions ("
+			"ns TEXT NOT NULL, key TEXT NOT NULL, data BLOB NOT NULL, updated_at REAL NOT NULL, "
+			"PRIMARY KEY (ns, key)) WITHOUT ROWID"
+		)
+		self._db_lock = threading.Lock()
+		# (ns, key) → (payload | None para borrar, timestamp)
+		self._pending: dict[tuple[str, str], tuple[bytes | None, float]] = {}
+		self._cond = threading.Condition()
+		self._flushing = False
+		self._flush_requested = False
+		self._closed = False
+		self._failures = 0  # lotes fallidos seguidos
+		self.stats = {"writes": 0, "deletes": 0, "batches": 0, "loads": 0, "load_hits": 0, "errors": 0, "requeued": 0}
+		self._thread = threading.Thread(target=self._writer, name="session-writer", daemon=True)
+		self._thread.start()
+		atexit.register(self.close)
+
+	# --- API ---
+
+	def load(self, namespace: str, key: str, max_age: float | None = None) -> Any:
+		self.stats["loads"] += 1
+		with self._cond:
+			pending = self._pending.get((namespace, key))
+		if pending is not None:
+			data, ts = pending
+		else:
+			with self._db_lock:
+				row = self._conn.execute(
+					"SELECT data, updated_at FROM sessions WHERE ns = ? AND key = ?", (namespace, key)
+				).fetchone()
+			if row is None:
+				return None
+			data, ts = row
+		if data is None or (max_age is not None and time.time() - ts > max_age):
+			return None
+		self.stats["load_hits"] += 1
+		return loads_session(data)
+
+	def save(self, namespace: str, key: str, value: Any, transient: Iterable[str] = ()) -> None:
+		self._enqueue(namespace, key, dumps_session(value, transient))
+
+	def delete(self, namespace: str, key: str) -> None:
+		self._enqueue(namespace, key, None)
+
+	def flush(self) -> None:
+		"""Bloquea hasta que todo lo encolado esté escrito.
+
+		Si un lote falla vuelve igual: lo pendiente queda en la cola para el
+		próximo reintento.
+		"""
+		with self._cond:
+			failures = self.stats["errors"]
+			while (self._pending or self._flushing) and self.stats["errors"] == failures:
+				self._flush_requested = True
+				self._cond.notify_all()
+				self._cond.wait(0.05)
+
+	def close(self) -> None:
+		if self._closed:
+			return
+		self.flush()
+		with self._cond:
+			self._closed = True
+			self._cond.notify_all()
+		self._thread.join(timeout=5)
+		with self._db_lock:
+			self._conn.close()
+
+	# --- Escritura en lotes ---
+
+	def _enqueue(self, namespace: str, key: str, data: bytes | None) -> None:
+		with self._cond:
+			self._pending[(namespace, key)] = (data, time.time())
+			if len(self._pending) >= self.batch_size:
+				self._cond.notify_all()
+
+	def _writer(self) -> None:
+		while True:
+			with self._cond:
+				deadline = time.monotonic() + self.flush_interval
+				# Tras un lote fallido se espera el intervalo completo antes de reintentar
+				while not (
+					self._closed
+					or (not self._failures and (self._flush_requested or len(self._pending) >= self.batch_size))
+				):
+					remaining = deadline - time.monotonic()
+					if remaining <= 0:
+						break
+					self._cond.wait(remaining)
+				if self._closed and not self._pending:
+					return
+				batch, self._pending = self._pending, {}
+				self._flush_requested = False
+				self._flushing = bool(batch)
+			ok = self._write_batch(batch) if batch else True
+			with self._cond:
+				if ok:
+					self._failures = 0
+				else:
+					self._failures += 1
+					self._requeue_locked(batch)
+				self._flushing = False
+				self._cond.notify_all()
+				if not ok and self._closed:
+					# Cierre con la base inaccesible: último intento hecho, no reintentar más
+					logger.error("Se descartan %d sesiones sin persistir al cerrar", len(self._pending))
+					self._pending.clear()
+					return
+
+	def _requeue_locked(self, batch: dict[tuple[str, str], tuple[bytes | None, float]]) -> None:
+		# Lo encolado mientras se escribía el lote es más nuevo: gana sobre el lote fallido
+		for k, entry in batch.items():
+			if k not in self._pending:
+				self._pending[k] = entry
+				self.stats["requeued"] += 1
+
+	def _write_batch(self, batch: dict[tuple[str, str], tuple[bytes | None, float]]) -> bool:
+		upserts = [(ns, key, data, ts) for (ns, key), (data, ts) in batch.items() if data is not None]
+		deletes = [(ns, key) for (ns, key), (data, _) in batch.items() if data is None]
+		try:
+			with self._db_lock:
+				self._conn.execute("BEGIN")
+				if upserts:
+					self._conn.executemany(
+						"INSERT INTO sessions (ns, key, data, updated_at) VALUES (?, ?, ?, ?) "
+						"ON CONFLICT (ns, key) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+						upserts,
+					)
+				if deletes:
+					self._conn.executemany("DELETE FROM sessions WHERE ns = ? AND key = ?", deletes)
+				self._conn.execute("COMMIT")
+			self.stats["writes"] += len(upserts)
+			self.stats["deletes"] += len(deletes)
+			self.stats["batches"] += 1
+			return True
+		except Exception:
+			logger.exception("No se pudo persistir un lote de %d sesiones (se reintenta)", len(batch))
+			try:
+				with self._db_lock:
+					self._conn.execute("ROLLBACK")
+			except Exception:
+				pass
+			with self._cond:
+				self.stats["errors"] += 1
+			return False
+
+
+def make_session_backend(kind: str, path: str | Path | None = None) -> SessionBackend:
+	"""Backend según configuración: "memory" (default) o "sqlite"."""
+	kind = (kind or "memory").lower()
+	if kind == "memory":
+		return MemoryBackend()
+	if kind == "sqlite":
+		return SQLiteSessionBackend(path or "./sessions.db")
+	raise ValueError(f"SESSION_BACKEND desconocido: {kind}")
@@ -1,23 +1,254 @@
 from __future__ import annotations
 
-from typing import Dict, Optional
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional
 
+from .session_backends import SessionBackend, make_session_backend
 
-_legajo_by_user: Dict[str, str] = {}
+
+_MISSING: Any = object()
+
+
+def _estimate_bytes(value: Any, _depth: int = 0) -> int:
+	"""Estimación aproximada (recursiva, acotada) del tamaño en memoria."""
+	size = sys.getsizeof(value)
+	if _depth > 6:
+		return size
+	if isinstance(value, dict):
+		return size + sum(_estimate_bytes(k, _depth + 1) + _estimate_bytes(v, _depth + 1) for k, v in value.items())
+	if isinstance(value, (list, tuple, set, frozenset)):
+		return size + sum(_estimate_bytes(v, _depth + 1) for v in value)
+	if hasattr(value, "__dict__"):
+		return size + _estimate_bytes(vars(value), _depth + 1)
+	return size
+
+
+class SessionStore:
+	"""Store de sesiones acotado: TTL por inactividad + expulsión LRU + métricas.
+
+	- maxsize: máximo de sesiones vivas (se expulsa la usada hace más tiempo).
+	- ttl: segundos sin actividad tras los cuales la sesión expira (None = nunca).
+	- transient/compact_after: claves reconstruibles (p.ej. "_inference") que se
+	  descartan de las sesiones inactivas más de `compact_after` segundos.
+	- backend/namespace: persistencia opcional (ver session_backends). Una clave
+	  que no está en memoria se carga del backend en el primer acceso; set/persist
+	  escriben (en lotes, asincrónico) y la expiración por TTL la borra. La
+	  expulsión LRU solo libera memoria: la sesión sigue en el backend.
+	Leer una sesión (get/[]) cuenta como actividad.
+	"""
+
+	def __init__(
+		self,
+		maxsize: int = 10_000,
+		ttl: float | None = 6 * 3600.0,
+		*,
+		transient: Iterable[str] = (),
+		compact_after: float | None = None,
+		backend: SessionBackend | None = None,
+		namespace: str = "default",
+		clock: Callable[[], float] = time.monotonic,
+	) -> None:
+		if maxsize < 1:
+			raise ValueError("maxsize debe ser >= 1")
+		self.maxsize = maxsize
+		self.ttl = ttl
+		self.transient = tuple(transient)
+		self.compact_after = compact_after
+		self.backend = backend
+		self.namespace = namespace
+		self._clock = clock
+		self._data: OrderedDict[str, list[Any]] = OrderedDict()  # key → [último acceso, valor]
+		self._lock = threading.RLock()
+		self._last_sweep = clock()
+		self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "compactions": 0, "loads": 0}
+
+	# --- Acceso ---
+
+	def _expired(self, last: float, now: float) -> bool:
+		return self.ttl is not None and now - last > self.ttl
+
+	def get(self, key: str, default: Any = None) -> Any:
+		key = str(key)
+		with self._lock:
+			now = self._clock()
+			entry = self._data.get(key)
+			if entry is None:
+				value = self._load(key)
+				if value is None:
+					self._stats["misses"] += 1
+					return default
+				return value
+			if self._expired(entry[0], now):
+				del self._data[key]
+				self._forget(key)
+				self._stats["expirations"] += 1
+				self._stats["misses"] += 1
+				return default
+			entry[0] = now
+			self._data.move_to_end(key)
+			self._stats["hits"] += 1
+			return entry[1]
+
+	def get_or_create(self, key: str, factory: Callable[[], Any]) -> Any:
+		with self._lock:
+			value = self.get(key, _MISSING)
+			if value is _MISSING:
+				value = factory()
+				self[key] = value
+			return value
+
+	def __getitem__(self, key: str) -> Any:
+		value = self.get(key, _MISSING)
+		if value is _MISSING:
+			raise KeyError(key)
+		return value
+
+	def __setitem__(self, key: str, value: Any) -> None:
+		key = str(key)
+		with self._lock:
+			self._put(key, value)
+			if self.backend is not None:
+				self.backend.save(self.namespace, key, value, self.transient)
+
+	def _put(self, key: str, value: Any) -> None:
+		now = self._clock()
+		self._data[key] = [now, value]
+		self._data.move_to_end(key)
+		while len(self._data) > self.maxsize:
+			self._data.popitem(last=False)
+			self._stats["evictions"] += 1
+		self._maybe_sweep(now)
+
+	def _load(self, key: str) -> Any:
+		if self.backend is None:
+			return None
+		value = self.backend.load(self.namespace, key, max_age=self.ttl)
+		if value is not None:
+			self._stats["loads"] += 1
+			self._put(key, value)
+		return value
+
+	def _forget(self, key: str) -> None:
+		if self.backend is not None:
+			self.backend.delete(self.namespace, key)
+
+	def persist(self, key: str) -> None:
+		"""Encola la versión actual de la sesión (tras modificarla en el lugar)."""
+		if self.backend is None:
+			return
+		key = str(key)
+		with self._lock:
+			entry = self._data.get(key)
+			if entry is not None:
+				self.backend.save(self.namespace, key, entry[1], self.transient)
+
+	def __contains__(self, key: object) -> bool:
+		return self.get(str(key), _MISSING) is not _MISSING
+
+	def __len__(self) -> int:
+		return len(self._data)
+
+	def pop(self, key: str, default: Any = None) -> Any:
+		with self._lock:
+			entry = self._data.pop(str(key), None)
+			self._forget(str(key))
+			return default if entry is None else entry[1]
+
+	def clear(self) -> None:
+		"""Vacía la memoria (lo persistido en el backend se conserva)."""
+		with self._lock:
+			self._data.clear()
+
+	def keys(self) -> list[str]:
+		with self._lock:
+			return list(self._data)
+
+	# --- Mantenimiento ---
+
+	def _maybe_sweep(self, now: float) -> None:
+		interval = min(x for x in (self.ttl, self.compact_after, 60.0) if x is not None)
+		if now - self._last_sweep >= interval:
+			self.sweep(now)
+
+	def sweep(self, now: float | None = None) -> int:
+		"""Elimina sesiones expiradas y compacta las inactivas. Devuelve cuántas expiraron."""
+		with self._lock:
+			now = self._clock() if now is None else now
+			self._last_sweep = now
+			expired = 0
+			# El orden LRU garantiza que las más viejas están al principio
+			for key, entry in list(self._data.items()):
+				idle = now - entry[0]
+				if self.ttl is not None and idle > self.ttl:
+					del self._data[key]
+					self._forget(key)
+					expired += 1
+					continue
+				if self.compact_after is None or idle <= self.compact_after:
+					break
+				value = entry[1]
+				if isinstance(value, dict) and any(k in value for k in self.transient):
+					for k in self.transient:
+						value.pop(k, None)
+					self._stats["compactions"] += 1
+			self._stats["expirations"] += expired
+			return expired
+
+	def stats(self, *, with_bytes: bool = True) -> dict[str, Any]:
+		"""Métricas: sesiones vivas, hits/misses, expulsiones y tamaño estimado."""
+		with self._lock:
+			out: dict[str, Any] = dict(self._stats) | {"live": len(self._data), "maxsize": self.maxsize, "ttl": self.ttl}
+			if with_bytes:
+				out["bytes_estimate"] = sum(_estimate_bytes(k) + _estimate_bytes(e[1]) for k, e in self._data.items())
+			return out
+
+
+_backend: SessionBackend | None = None
+
+
+def get_session_backend() -> SessionBackend:
+	"""Backend del proceso según SESSION_BACKEND/SESSION_DB_PATH (se crea una vez)."""
+	global _backend
+	if _backend is None:
+		from .config import settings
+		configure_session_backend(make_session_backend(settings.SESSION_BACKEND, settings.SESSION_DB_PATH))
+	return _backend  # type: ignore[return-value]
+
+
+def configure_session_backend(backend: SessionBackend) -> None:
+	"""Reemplaza el backend del proceso (también lo usa el store de legajos)."""
+	global _backend
+	_backend = backend
+	_legajo_by_user.backend = backend
+
+
+# Legajo preferido por usuario/chat (sobrevive a la sesión de diálogo)
+_legajo_by_user = SessionStore(maxsize=50_000, ttl=30 * 86400.0, namespace="legajos")
+
+
+def _legajos() -> SessionStore:
+	if _backend is None:
+		get_session_backend()
+	return _legajo_by_user
 
 
 def set_legajo(user_id: str, legajo: str) -> None:
-	"""Guarda el legajo preferido para un usuario/chat en memoria."""
-	_legajo_by_user[str(user_id)] = str(legajo)
+	"""Guarda el legajo preferido para un usuario/chat."""
+	_legajos()[str(user_id)] = str(legajo)
 
 
 def get_legajo(user_id: str) -> Optional[str]:
 	"""Obtiene el legajo guardado para un usuario/chat si existe."""
-	return _legajo_by_user.get(str(user_id))
+	return _legajos().get(str(user_id))
+
+
+def legajo_store_stats() -> Dict[str, Any]:
+	return _legajo_by_user.stats()
 
 
 def clear_store() -> None:
 	"""Limpia el store en memoria (útil para tests)."""
 	_legajo_by_user.clear()
-
-
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Optional
 
@@ -13,16 +14,18 @@ except Exception:  # aiogram no instalado aún
 	Bot = Dispatcher = Message = object  # type: ignore
 
 from ..dialogue.manager import DialogueManager
+from ..dialogue.async_manager import BUSY_REPLY, AsyncDialogueManager
+from ..dialogue.dispatcher import DispatcherBusy
 from ..session_store import set_legajo
-from ..persistence.seed import ensure_schema
-from ..persistence.dao import session_scope
-from ..persistence.models import Employee
+from ..persistence.seed import ensure_schema_once
+from ..persistence.directory import employee_directory
 from ..config import settings
 
 logging.basicConfig(level=logging.INFO)
 
 
-_dm = DialogueManager()
+# El diálogo (motor + BD) corre en un pool de hilos, fuera del event loop
+_dm = AsyncDialogueManager()
 
 
 async def start_bot(token: str) -> None:
@@ -31,6 +34,8 @@ async def start_bot(token: str) -> None:
 		print("aiogram no está disponible. Instálalo con requirements.txt")
 		return
 	
+	# Esquema de BD una sola vez al arrancar (no por mensaje)
+	ensure_schema_once()
 	print(f"Inicializando DialogueManager...")
 	try:
 		_dm_test = DialogueManager()
@@ -56,33 +61,66 @@ async def start_bot(token: str) -> None:
 			if not legajo_digits:
 				await msg.reply("Formato inválido. Usá /id 1234 (4 dígitos)")
 				return
-			# Validar en BD mínima
-			ensure_schema()
-			with session_scope() as s:
-				emp = s.query(Employee).filter(Employee.legajo == legajo_digits).first()
-			if not emp:
+			# Validar contra el directorio de empleados (cacheado)
+			if not await _dm.run(employee_directory().is_valid, legajo_digits):
 				await msg.reply("No encontré ese legajo en el sistema. Revisá y volvé a intentar.")
 				return
 			set_legajo(str(msg.chat.id), legajo_digits)
-			_dm.set_legajo_validado(str(msg.chat.id), legajo_digits)
+			await _dm.set_legajo_validado(str(msg.chat.id), legajo_digits)
 			await msg.reply(f"Listo, legajo {legajo_digits} verificado ✅")
+		except DispatcherBusy:
+			await msg.reply(BUSY_REPLY)
 		except Exception as e:
 			await msg.reply(f"No pude guardar el legajo: {e}")
 
-	# Comando /export_csv (solo demo)
-	@dp.message(Command("export_csv"))
-	async def handle_export(msg: Message) -> None:
+	# Comando /ausentes [fecha] [área]: quién falta (índice de intervalos en memoria)
+	@dp.message(Command("ausentes"))
+	async def handle_ausentes(msg: Message) -> None:
 		try:
-			if not settings.DEMO_EXPORT:
-				await msg.reply("Comando no disponible en este entorno.")
+			from ..persistence.dao import empleados_ausentes
+			from ..utils.normalize import parse_date
+			parts = (msg.text or "").split(maxsplit=2)[1:]
+			fecha = parse_date(parts[0]) if parts else parse_date("hoy")
+			if fecha is None:
+				# Sin fecha reconocible: todo es el área, para hoy
+				fecha, area = parse_date("hoy"), " ".join(parts) or None
+			else:
+				area = parts[1] if len(parts) > 1 else None
+			rows = await _dm.run(empleados_ausentes, fecha, area=area)
+			if not rows:
+				await msg.reply(f"No hay ausencias registradas para {fecha}" + (f" en {area}" if area else "") + ".")
 				return
-			ensure_schema()
+			lines = [f"• {r['legajo']} {r['nombre'] or ''} ({r['area'] or '-'}, {r['turno'] or '-'}): {r['motivo']}" for r in rows[:30]]
+			if len(rows) > 30:
+				lines.append(f"… y {len(rows) - 30} más")
+			await msg.reply(f"Ausentes {fecha}" + (f" · {area}" if area else "") + f" ({len(rows)}):\n" + "\n".join(lines))
+		except Exception as e:
+			await msg.reply(f"No pude consultar ausencias: {e}")
+
+	# Comando /export_csv (solo demo): corre en segundo plano y avisa al terminar
+	export_tasks: set[asyncio.Task] = set()
+
+	async def _run_export(msg: Message) -> None:
+		try:
 			from ..persistence.export_powerbi import export_all_csv
-			export_all_csv(out_dir="./exports")
+			await asyncio.to_thread(export_all_csv, out_dir="./exports")
 			await msg.reply("Export listo en /exports (employees.csv, avisos.csv, certificados.csv, notificaciones.csv, auditoria.csv)")
 		except Exception as e:
 			await msg.reply(f"Error en export: {e}")
 
+	@dp.message(Command("export_csv"))
+	async def handle_export(msg: Message) -> None:
+		if not settings.DEMO_EXPORT:
+			await msg.reply("Comando no disponible en este entorno.")
+			return
+		if export_tasks:
+			await msg.reply("Ya hay un export en curso, te aviso cuando termine.")
+			return
+		task = asyncio.create_task(_run_export(msg))
+		export_tasks.add(task)
+		task.add_done_callback(export_tasks.discard)
+		await msg.reply("Generando export en /exports, te aviso cuando esté listo ⏳")
+
 	# Handler simplificado para testing
 	@dp.message()
 	async def handle_message(msg: Message) -> None:
@@ -94,11 +132,11 @@ async def start_bot(token: str) -> None:
 			if msg.text and msg.text.startswith('/start'):
 				await msg.reply("🤖 Bot funcionando! Soy el sistema de ausencias.")
 			elif msg.text and msg.text.startswith('/help'):
-				await msg.reply("📋 Puedo ayudarte con avisos de ausencias. Enviá tu legajo y motivo.")
+				await msg.reply("📋 Puedo ayudarte con avisos de ausencias. Enviá tu legajo y motivo.\n/ausentes [fecha] [área]: quién falta ese día.")
 			elif msg.text:
 				print(f"💬 Procesando con DialogueManager: {msg.text}")
 				session_id = str(msg.chat.id)
-				result = _dm.process_message(session_id, msg.text)
+				result = await _dm.process_message(session_id, msg.text)
 				print(f"📤 Respuesta del sistema: {result}")
 				
 				reply_text = result.get("reply_text", "Sistema procesado")
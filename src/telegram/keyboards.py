@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Iterable, Sequence
+from typing import Any, Iterable, Mapping, Sequence
 
 try:
 	from aiogram.types import (
@@ -24,7 +24,7 @@ def _ensure_sequence(values: Any) -> list[str]:
 	"""
 	if values is None:
 		return []
-	if isinstance(values, dict):
+	if isinstance(values, Mapping):
 		# Intento estándar del glosario: variables -> motivo -> values
 		try:
 			motivos = values["variables"]["motivo"]["values"]
@@ -5,6 +5,7 @@ import unicodedata
 from datetime import date, timedelta
 from typing import Iterable, Any
 
+from rapidfuzz import fuzz, process
 from rapidfuzz.distance import Levenshtein
 
 
@@ -18,6 +19,8 @@ def normalize_text(text: str) -> str:
 
 def _strip_accents(text: str) -> str:
 	"""Elimina diacríticos para comparar/matchear sin acentos."""
+	if text.isascii():
+		return text
 	return "".join(
 		c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c)
 	)
@@ -31,6 +34,110 @@ def similarity(a: str, b: str) -> float:
 	return 1 - (Levenshtein.distance(a, b) / max_len)
 
 
+# --- Mensaje tokenizado ---
+# El mensaje se normaliza UNA vez (trim + lower + sin acentos) y cada clase de
+# token (números, fechas, "xNd", legajo, pares "var: valor") se extrae con un
+# regex precompilado la primera vez que algún extractor la pide; el resultado
+# queda en el objeto y lo comparten todos los extractores del turno.
+
+_PAIR_RE = re.compile(r"([a-zA-Z_]+)\s*:\s*([^\n;]+)")
+_INT_RE = re.compile(r"\d+")
+_XND_RE = re.compile(r"x(\d+)d\b")
+_XND_WORD_RE = re.compile(r"\bx\d+d\b")
+_DMY_RE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})")
+_ISO_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_LEGAJO_ONLY_RE = re.compile(r"\d{4}")
+_LEGAJO_RE = re.compile(r"\blegajo[:\s]+(\d{4})\b")
+_LEGAJO_REF_RE = re.compile(r"\blegajo\b[^\d]{0,10}(\d{4})\b")
+_DAYS_WORDS = ("dia", "duracion")  # sobre texto sin acentos cubre día/días/duración
+
+_UNSET: Any = object()
+
+
+def _dmy_to_iso(d: str, mth: str, y: str) -> str | None:
+	try:
+		return date(int(y), int(mth), int(d)).isoformat()
+	except ValueError:
+		return None
+
+
+class Lexed:
+	"""Mensaje normalizado una vez, con tokens tipados extraídos bajo demanda."""
+
+	__slots__ = ("raw", "text", "flat", "_pairs", "_int", "_xnd", "_date", "_legajo")
+
+	def __init__(self, raw: str) -> None:
+		self.raw = raw
+		self.text = raw.strip().lower()
+		self.flat = _strip_accents(self.text)
+		self._pairs = self._int = self._xnd = self._date = self._legajo = _UNSET
+
+	@property
+	def pairs(self) -> list[tuple[str, str]]:
+		"""Pares "var: valor" del texto original (el valor conserva mayúsculas)."""
+		if self._pairs is _UNSET:
+			self._pairs = _PAIR_RE.findall(self.raw) if ":" in self.raw else []
+		return self._pairs
+
+	@property
+	def first_int(self) -> int | None:
+		if self._int is _UNSET:
+			m = _INT_RE.search(self.flat)
+			self._int = int(m.group()) if m else None
+		return self._int
+
+	@property
+	def first_xnd(self) -> int | None:
+		"""N de la primera forma "xNd"."""
+		if self._xnd is _UNSET:
+			m = _XND_RE.search(self.flat) if "x" in self.flat else None
+			self._xnd = int(m.group(1)) if m else None
+		return self._xnd
+
+	@property
+	def first_date(self) -> str | None:
+		"""Primera fecha DD/MM/AAAA del mensaje, en ISO (None si no hay o es inválida)."""
+		if self._date is _UNSET:
+			m = _DMY_RE.search(self.flat) if "/" in self.flat else None
+			self._date = _dmy_to_iso(*m.groups()) if m else None
+		return self._date
+
+	@property
+	def legajo(self) -> str | None:
+		"""Legajo de 4 dígitos (texto completo o tras la palabra "legajo")."""
+		if self._legajo is _UNSET:
+			self._legajo = _find_legajo(self.text)
+		return self._legajo
+
+	def has_days_hint(self) -> bool:
+		flat = self.flat
+		return any(k in flat for k in _DAYS_WORDS) or ("x" in flat and bool(_XND_WORD_RE.search(flat)))
+
+
+def _find_legajo(content: str) -> str | None:
+	# 4 dígitos exacto
+	if _LEGAJO_ONLY_RE.fullmatch(content):
+		return content
+	if "legajo" not in content:
+		return None
+	# frase con prefijo legajo
+	m = _LEGAJO_RE.search(content)
+	if m:
+		return m.group(1)
+	# variantes naturales: "mi legajo es 1234", "legajo es 1234", "legajo nro 1234"
+	m2 = _LEGAJO_REF_RE.search(content)
+	if m2:
+		return m2.group(1)
+	return None
+
+
+def tokenize(text: Any) -> Lexed:
+	"""Normaliza el mensaje una vez (los extractores aceptan el resultado)."""
+	if isinstance(text, Lexed):
+		return text
+	return Lexed("" if text is None else str(text))
+
+
 # --- Normalizaciones específicas según docs/ ---
 
 _MOTIVOS = {
@@ -59,31 +166,29 @@ def parse_date(value: Any, *, today: date | None = None) -> str | None:
 	- Formato DD/MM/AAAA → ISO
 	- Si ya viene en ISO, la retorna
 	- Si recibe date, lo convierte a ISO
+	Acepta también un mensaje ya tokenizado (Lexed).
 	"""
 	if value is None:
 		return None
 	if isinstance(value, date):
 		return value.isoformat()
-	text = normalize_text(str(value))
+	lex = tokenize(value)
 	today = today or date.today()
-	no_acc = _strip_accents(text)
+	no_acc = lex.flat
 	if no_acc == "hoy":
 		return today.isoformat()
 	if no_acc == "manana":
 		return (today + timedelta(days=1)).isoformat()
 	if no_acc == "ayer":
 		return (today - timedelta(days=1)).isoformat()
+	text = lex.text
 	# ISO directo
-	if re.fullmatch(r"\d{4}-\d{2}-\d{2}", text):
+	if _ISO_RE.fullmatch(text):
 		return text
 	# DD/MM/AAAA
-	m = re.fullmatch(r"(\d{1,2})/(\d{1,2})/(\d{4})", text)
+	m = _DMY_RE.fullmatch(text)
 	if m:
-		d, mth, y = map(int, m.groups())
-		try:
-			return date(y, mth, d).isoformat()
-		except ValueError:
-			return None
+		return _dmy_to_iso(*m.groups())
 	return None
 
 
@@ -91,20 +196,83 @@ def normalize_motivo(value: Any) -> str | None:
 	"""Normaliza motivo al dominio del glosario.
 
 	Mapea sinónimos: "enf", "licencia médica", "enfermedad" → "enfermedad_inculpable".
-	Soporta separar por espacios/underscores y eliminación de acentos.
+	Soporta separar por espacios/underscores, eliminación de acentos y errores de
+	tipeo (ver match_motivo).
+	"""
+	return match_motivo(value)[0]
+
+
+# Matching aproximado: claves plegadas (sin acentos, "_" → " ") de los motivos del
+# glosario + sinónimos, precalculadas una vez por KB. Textos cortos no se
+# aproximan ("arte" no es "art").
+_FUZZY_CUTOFF = 85.0
+_FUZZY_MIN_LEN = 5
+
+_motivo_index: tuple[Any, tuple[tuple[str, ...], tuple[str, ...]]] | None = None
+
+
+def _fold(text: str) -> str:
+	return _strip_accents(normalize_text(text)).replace("_", " ")
+
+
+def _glossary_motivos() -> tuple[Any, list[str]]:
+	try:
+		from ..engine.kb_loader import load_knowledge_base
+		kb = load_knowledge_base()
+	except Exception:
+		return None, []
+	return kb, list(kb.glossary.get("variables", {}).get("motivo", {}).get("values", []))
+
+
+def _get_motivo_index() -> tuple[tuple[str, ...], tuple[str, ...]]:
+	"""(claves plegadas, motivo de cada clave); se recalcula solo si cambia la KB."""
+	global _motivo_index
+	kb, values = _glossary_motivos()
+	cached = _motivo_index
+	if cached is not None and cached[0] is kb:
+		return cached[1]
+	entries: dict[str, str] = {}
+	for motivo in sorted(_MOTIVOS.union(values)):
+		entries.setdefault(_fold(motivo), motivo)
+	for syn, motivo in _MOTIVO_SYNONYMS.items():
+		entries.setdefault(_fold(syn), motivo)
+	index = (tuple(entries), tuple(entries.values()))
+	_motivo_index = (kb, index)
+	return index
+
+
+def register_motivo_synonym(text: str, motivo: str) -> None:
+	"""Agrega un sinónimo (p.ej. "carpeta médica" → enfermedad_inculpable)."""
+	_MOTIVO_SYNONYMS[_strip_accents(normalize_text(text))] = motivo
+	global _motivo_index
+	_motivo_index = None
+
+
+def match_motivo(value: Any) -> tuple[str | None, float]:
+	"""(motivo, confianza en [0,1]); 1.0 = valor del dominio o sinónimo exacto.
+
+	Si no hay match exacto se busca el más parecido (Levenshtein normalizado) y
+	se acepta solo por encima de _FUZZY_CUTOFF.
 	"""
 	if value is None:
-		return None
-	text = normalize_text(str(value))
-	no_acc = _strip_accents(text)
+		return None, 0.0
+	no_acc = value.flat if isinstance(value, Lexed) else _strip_accents(normalize_text(str(value)))
 	# Intento directo al formato con underscore
 	candidate = no_acc.replace(" ", "_")
 	if candidate in _MOTIVOS:
-		return candidate
+		return candidate, 1.0
 	# Sinónimos
 	if no_acc in _MOTIVO_SYNONYMS:
-		return _MOTIVO_SYNONYMS[no_acc]
-	return None
+		return _MOTIVO_SYNONYMS[no_acc], 1.0
+	key = no_acc.replace("_", " ")
+	if len(key) < _FUZZY_MIN_LEN:
+		return None, 0.0
+	keys, targets = _get_motivo_index()
+	best = process.extractOne(key, keys, scorer=fuzz.ratio, processor=None, score_cutoff=_FUZZY_CUTOFF)
+	if best is None:
+		return None, 0.0
+	_, score, idx = best
+	return targets[idx], round(score / 100.0, 3)
 
 
 _NUM_TEXT = {
@@ -119,36 +287,32 @@ def sanitize_number_of_days(value: Any) -> int | None:
 	"""
 	if value is None:
 		return None
-	text = normalize_text(str(value))
-	no_acc = _strip_accents(text)
+	lex = tokenize(value)
 	# x3d
-	m = re.search(r"x(\d+)d\b", no_acc)
-	if m:
-		return int(m.group(1))
+	if lex.first_xnd is not None:
+		return lex.first_xnd
 	# número explícito
-	m = re.search(r"(\d+)", no_acc)
-	if m:
-		return int(m.group(1))
+	if lex.first_int is not None:
+		return lex.first_int
 	# texto simple (limitado a docs)
-	if no_acc in _NUM_TEXT:
-		return _NUM_TEXT[no_acc]
-	return None
+	return _NUM_TEXT.get(lex.flat)
 
 
 _KNOWN_VARS = {"legajo", "motivo", "fecha_inicio", "duracion_estimdays"}
 
 
-def extract_pairs(text: str) -> dict[str, Any]:
+def extract_pairs(text: str | Lexed) -> dict[str, Any]:
 	"""Extrae pares var: valor y frases conocidas.
 
 	- Pares "var: valor" para {legajo, motivo, fecha_inicio, duracion_estimdays}
 	- Frases: "me caso" → motivo=matrimonio (del dominio)
 	- Detecta "N días" y "xNd" si no se informó duracion_estimdays explícito
+	Acepta el texto o un mensaje ya tokenizado (Lexed).
 	"""
 	result: dict[str, Any] = {}
-	content = text or ""
+	lex = tokenize(text)
 	# 1) Pares "var: valor"
-	for var, val in re.findall(r"([a-zA-Z_]+)\s*:\s*([^\n;]+)", content):
+	for var, val in lex.pairs:
 		var_l = normalize_text(var)
 		if var_l not in _KNOWN_VARS:
 			continue
@@ -169,19 +333,16 @@ def extract_pairs(text: str) -> dict[str, Any]:
 			result["legajo"] = val.strip()
 
 	# 2) Frases: "me caso" → motivo=matrimonio y posible fecha
-	flat = normalize_text(_strip_accents(content))
-	if "me caso" in flat:
+	if "me caso" in lex.flat:
 		result.setdefault("motivo", "matrimonio")
 		# intentar fecha en la misma frase
-		m = re.search(r"(\d{1,2}/\d{1,2}/\d{4})", flat)
-		if m:
-			fd = parse_date(m.group(1))
-			if fd:
-				result.setdefault("fecha_inicio", fd)
+		fd = lex.first_date
+		if fd:
+			result.setdefault("fecha_inicio", fd)
 
 	# 2.b) Si hay un legajo de 4 dígitos aislado, mapearlo a 'legajo'.
 	# Evita que respuestas como "1111" se confundan con días.
-	leg_cand = parse_legajo(content)
+	leg_cand = parse_legajo(lex)
 	if leg_cand and "legajo" not in result:
 		result["legajo"] = leg_cand
 
@@ -189,19 +350,15 @@ def extract_pairs(text: str) -> dict[str, Any]:
 	# (palabras clave o formato xNd). De este modo, un legajo de 4 dígitos no
 	# se interpreta erróneamente como duración.
 	if "duracion_estimdays" not in result:
-		has_days_hint = (
-			bool(re.search(r"\bx\d+d\b", flat))
-			or any(k in flat for k in ["dia", "dias", "día", "días", "duracion", "duración"])
-		)
-		if has_days_hint:
-			cand = sanitize_number_of_days(flat)
+		if lex.has_days_hint():
+			cand = sanitize_number_of_days(lex)
 			if cand is not None:
 				result["duracion_estimdays"] = cand
 
 	return result
 
 
-def parse_legajo(text: str | None) -> str | None:
+def parse_legajo(text: str | Lexed | None) -> str | None:
 	"""Extrae un legajo de 4 dígitos desde texto.
 
 	Reglas:
@@ -211,16 +368,5 @@ def parse_legajo(text: str | None) -> str | None:
 	"""
 	if not text:
 		return None
-	content = normalize_text(str(text))
-	# 4 dígitos exacto
-	if re.fullmatch(r"\d{4}", content):
-		return content
-	# frase con prefijo legajo
-	m = re.search(r"\blegajo[:\s]+(\d{4})\b", content)
-	if m:
-		return m.group(1)
-	# variantes naturales: "mi legajo es 1234", "legajo es 1234", "legajo nro 1234"
-	m2 = re.search(r"\blegajo\b[^\d]{0,10}(\d{4})\b", content)
-	if m2:
-		return m2.group(1)
-	return None
+	lex = tokenize(text)
+	return lex.legajo if lex.raw else None
@@ -0,0 +1,40 @@
+from benchmarks.runner import Case, compare, measure
+from benchmarks.workloads import fact_sets
+
+
+def test_measure_reporta_metricas_y_cargas_deterministas():
+	assert fact_sets(20, seed=7) == fact_sets(20, seed=7)
+	res = measure(Case("noop", lambda x: x, [1, 2, 3]), iterations=50, rounds=2)
+	assert res["iterations"] == 50
+	assert res["ops_per_sec"] > 0
+	assert res["p50_us"] <= res["p99_us"]
+
+
+def test_compare_detecta_regresion_por_umbral():
+	base = {"fc": {"ops_per_sec": 1000.0, "p50_us": 100.0, "p99_us": 200.0, "peak_kb": 10.0}}
+	ok = {"fc": {"ops_per_sec": 900.0, "p50_us": 110.0, "p99_us": 210.0, "peak_kb": 11.0}}
+	assert compare(ok, base, threshold=0.30) == []
+	bad = {"fc": {"ops_per_sec": 500.0, "p50_us": 200.0, "p99_us": 210.0, "peak_kb": 11.0}}
+	regs = compare(bad, base, threshold=0.30)
+	assert any(r.startswith("fc.ops_per_sec") for r in regs)
+	assert any(r.startswith("fc.p50_us") for r in regs)
+	# Casos sin baseline no se comparan
+	assert compare({"nuevo": bad["fc"]}, base) == []
+
+
+def test_compare_escala_tiempos_por_el_caso_de_referencia():
+	from benchmarks.runner import REFERENCE_CASE
+
+	base = {
+		REFERENCE_CASE: {"p50_us": 50.0},
+		"fc": {"ops_per_sec": 1000.0, "p50_us": 100.0, "p99_us": 200.0, "peak_kb": 10.0},
+	}
+	# Máquina 2x más lenta: todo tarda el doble pero no es regresión
+	lenta = {
+		REFERENCE_CASE: {"p50_us": 100.0},
+		"fc": {"ops_per_sec": 500.0, "p50_us": 200.0, "p99_us": 400.0, "peak_kb": 10.0},
+	}
+	assert compare(lenta, base) == []
+	# En la misma máquina lenta, el doble otra vez sí lo es
+	peor = {REFERENCE_CASE: {"p50_us": 100.0}, "fc": dict(lenta["fc"], p50_us=400.0)}
+	assert [r.split(":")[0] for r in compare(peor, base)] == ["fc.p50_us"]
@@ -42,3 +42,95 @@ def test_flujo_mixto_legajo_luego_campos():
 	assert "Días: 1111" not in res2.get("reply_text")
 
 
+
+
+def test_async_manager_orden_por_chat_y_backpressure():
+	import asyncio
+	import threading
+
+	from src.dialogue.async_manager import AsyncDialogueManager
+
+	gate = threading.Event()
+
+	class _Controlado:
+		def __init__(self):
+			self.log = []
+			self.lock = threading.Lock()
+
+		def process_message(self, session_id, incoming):
+			if incoming == "a0":
+				gate.wait(5)  # el chat "a" queda bloqueado hasta liberarlo
+			with self.lock:
+				self.log.append((session_id, incoming))
+			return {"reply_text": incoming}
+
+		def set_legajo_validado(self, session_id, legajo):
+			with self.lock:
+				self.log.append((session_id, "legajo " + legajo))
+
+	ctl = _Controlado()
+	adm = AsyncDialogueManager(ctl, max_workers=4, max_pending=7)
+
+	async def main():
+		a = [asyncio.ensure_future(adm.process_message("a", f"a{i}")) for i in range(3)]
+		a.append(asyncio.ensure_future(adm.set_legajo_validado("a", "1111")))
+		b = [asyncio.ensure_future(adm.process_message("b", f"b{i}")) for i in range(3)]
+		await asyncio.sleep(0)  # las tareas encolan sus pedidos
+		# El octavo pedido excede el tope y se rechaza sin bloquear
+		c = await adm.process_message("c", "c0")
+		# Chats distintos corren en paralelo: "b" termina con "a" todavía bloqueado
+		res_b = await asyncio.wait_for(asyncio.gather(*b), timeout=5)
+		assert not any(f.done() for f in a)
+		gate.set()
+		res_a = await asyncio.wait_for(asyncio.gather(*a), timeout=5)
+		return res_a, res_b, c
+
+	res_a, res_b, c = asyncio.run(main())
+	adm.shutdown()
+	assert c.get("busy") is True
+	assert [r["reply_text"] for r in res_a[:3]] == ["a0", "a1", "a2"]
+	assert [r["reply_text"] for r in res_b] == ["b0", "b1", "b2"]
+	# Dentro de cada chat se respeta el orden de llegada (la validación del legajo incluida)
+	assert [m for s, m in ctl.log if s == "a"] == ["a0", "a1", "a2", "legajo 1111"]
+	assert [m for s, m in ctl.log if s == "b"] == ["b0", "b1", "b2"]
+	m = adm.metrics()
+	assert m["processed"] == 7 and m["rejected"] == 1 and m["pending"] == 0 and m["active_chats"] == 0
+
+
+def test_dispatcher_agrupa_rafagas_y_reporta_profundidad():
+	import asyncio
+	import threading
+
+	from src.dialogue.async_manager import AsyncDialogueManager
+
+	gate = threading.Event()
+	vistos = []
+
+	class _Bloqueado:
+		def process_message(self, session_id, incoming):
+			gate.wait(2)
+			vistos.append(incoming)
+			if incoming == "boom":
+				raise ValueError(incoming)
+			return {"reply_text": incoming}
+
+	adm = AsyncDialogueManager(_Bloqueado(), max_workers=2, max_pending=50)
+
+	async def main():
+		primero = adm.dispatcher.submit("a", "m0")
+		await asyncio.sleep(0.01)  # m0 ya está en el pool
+		resto = [adm.dispatcher.submit("a", t) for t in ("m1", "boom", "m3")]
+		m = adm.metrics()
+		assert m["queued"] == 3 and m["in_flight"] == 1 and m["max_depth"] == 3
+		assert adm.dispatcher.depths() == [("a", 3)]
+		gate.set()
+		return await asyncio.gather(primero, *resto, return_exceptions=True)
+
+	res = asyncio.run(main())
+	adm.shutdown()
+	assert vistos == ["m0", "m1", "boom", "m3"]
+	assert res[0]["reply_text"] == "m0" and res[3]["reply_text"] == "m3"
+	assert isinstance(res[2], ValueError)
+	m = adm.metrics()
+	# m1, boom y m3 viajaron juntos en un segundo lote
+	assert m["bursts"] == 2 and m["coalesced"] == 2 and m["errors"] == 1 and m["pending"] == 0
@@ -1,5 +1,7 @@
 from datetime import date, timedelta
 
+import pytest
+
 from src.engine.kb_loader import load_knowledge_base
 from src.engine.inference import forward_chain, backward_chain
 
@@ -175,3 +177,301 @@ def test_backward_enfermedad_familiar_pide_vinculo():
 	res = backward_chain("crear_aviso", facts)
 	assert res["status"] == "need_info"
 	assert "vinculo_familiar" in res["ask"]
+
+
+def test_kb_cache_comparte_instancia_y_recarga_si_cambia(tmp_path, monkeypatch):
+	import shutil
+	from src.engine import kb_loader
+
+	gl = tmp_path / "glossary.json"
+	rl = tmp_path / "rules.json"
+	shutil.copy(kb_loader.GLOSSARY_PATH, gl)
+	shutil.copy(kb_loader.RULES_PATH, rl)
+	monkeypatch.setattr(kb_loader, "GLOSSARY_PATH", gl)
+	monkeypatch.setattr(kb_loader, "RULES_PATH", rl)
+
+	kb1 = kb_loader.reload_knowledge_base()
+	hits = kb_loader.kb_cache_stats()["hits"]
+	assert load_knowledge_base() is kb1
+	assert kb_loader.kb_cache_stats()["hits"] == hits + 1
+
+	# Cambio de contenido → nueva instancia
+	rl.write_text(rl.read_text(encoding="utf-8").replace('"version": 1', '"version": 22'), encoding="utf-8")
+	kb2 = load_knowledge_base()
+	assert kb2 is not kb1
+	assert kb2.version == 22
+	assert kb2.fingerprint != kb1.fingerprint
+
+
+def test_kb_compartida_es_de_solo_lectura():
+	kb = load_knowledge_base()
+	with pytest.raises(TypeError):
+		kb.glossary["variables"]["motivo"] = {}
+	with pytest.raises(TypeError):
+		kb.rules[0]["then"] = []
+	with pytest.raises(AttributeError):
+		kb.rules[0]["when"].append({"var": "motivo", "op": "==", "value": "x"})
+	with pytest.raises(TypeError):
+		kb.goals["goals"]["crear_aviso"] = {}
+	assert isinstance(kb.glossary["variables"]["motivo"]["values"], tuple)
+
+
+def test_red_de_reglas_indexada_por_variable():
+	from src.engine.network import get_rule_network
+
+	kb = load_knowledge_base()
+	net = get_rule_network(kb)
+	assert get_rule_network(kb) is net
+	ids_motivo = {net.rules[i].id for i in net.rules_by_var["motivo"]}
+	assert {"R-DOC-MAP-ENF", "R-NOTIF-ML-ENF", "R-ART-ESTADOS"} <= ids_motivo
+	# Condiciones idénticas comparten predicado (memoria alfa)
+	enf = [r for r in net.rules if r.id in {"R-DOC-MAP-ENF", "R-NOTIF-ML-ENF"}]
+	assert enf[0].conditions == enf[1].conditions
+	assert len(net.predicates) < sum(len(r.conditions) for r in net.rules)
+
+
+def test_forward_chain_batch_igual_a_llamadas_individuales():
+	from src.engine.inference import forward_chain_batch
+
+	lote = [
+		_base_facts_ok(),
+		_base_facts_ok() | {"motivo": "art"},
+		_base_facts_ok() | {"motivo": "fallecimiento", "adjunto_certificado": "acta.pdf"},
+		{"legajo": "9999", "motivo": "matrimonio"},
+	]
+	esperado = [forward_chain(f) for f in lote]
+	assert list(forward_chain_batch(lote)) == esperado
+	assert list(forward_chain_batch(iter(lote), processes=2, chunksize=1)) == esperado
+
+
+def test_forward_chain_columnar_igual_a_escalar():
+	import pytest
+	pytest.importorskip("numpy")
+	from src.engine.vectorized import forward_chain_columnar, rule_masks
+
+	lote = [
+		_base_facts_ok(),
+		_base_facts_ok() | {"motivo": "art", "area": "ventas"},
+		_base_facts_ok() | {"motivo": "fallecimiento", "adjunto_certificado": "acta.pdf", "duracion_estimdays": 5},
+		{"legajo": "9999", "motivo": "matrimonio"},
+		{"motivo": "otro", "duracion_estimdays": "x"},
+	]
+	# Listas que el motor extiende en el lugar, solapes y valores no hasheables
+	lote += [
+		_base_facts_ok() | {"notificar_a": ["rrhh"], "motivo": "art"},
+		_base_facts_ok() | {"avisos_abiertos": [{"legajo": "1234", "inicio": date.today().isoformat(), "fin": date.today().isoformat()}]},
+		_base_facts_ok() | {"notificar_a": "supervisor", "estado_aviso": "pendiente_validacion"},
+	] * 3
+	assert forward_chain_columnar(lote) == [forward_chain(f) for f in lote]
+	ids, fired = rule_masks(lote)
+	assert fired.shape == (len(ids), len(lote))
+	# Misma codificación que el modo columnar: cada máscara es el predicado escalar
+	from src.engine.facts import coerce_facts
+	from src.engine.network import get_rule_network
+	from src.engine.vectorized import predicate_masks
+
+	net = get_rule_network(load_knowledge_base())
+	typed = [coerce_facts(f, net.var_types) for f in lote]
+	esperado = [[p.test(f.get(p.var)) for f in typed] for p in net.predicates]
+	assert predicate_masks(lote).tolist() == esperado
+	assert bool(fired[ids.index("R-PROD-5D-JP"), 2]) is True
+	assert bool(fired[ids.index("R-ID-PEND-LEG"), 3]) is True
+
+
+def test_inference_session_incremental_entre_turnos():
+	from src.engine.inference import InferenceSession
+
+	inf = InferenceSession()
+	turno1 = {"legajo": "1234", "empleado_nombre": "Juan Perez", "motivo": "enfermedad_inculpable"}
+	turno2 = {"fecha_inicio": date.today().isoformat(), "duracion_estimdays": 2, "adjunto_certificado": "cert.pdf"}
+	inf.update(turno1)
+	res = inf.update(turno2)
+	assert inf.stats == {"incremental": 1, "full": 1}
+	assert res["facts"] == forward_chain(turno1 | turno2)["facts"]
+	assert res["facts"]["estado_aviso"] == "completo"
+
+	# Cambiar el motivo retracta lo derivado del motivo anterior
+	res = inf.update({"motivo": "matrimonio"})
+	assert inf.stats["full"] == 2
+	assert res["facts"]["documento_tipo"] == "acta_matrimonio"
+	assert "medico_laboral" not in res["facts"]["notificar_a"]
+
+
+def test_inference_session_excepcion_no_deja_estado_a_medias():
+	from src.engine.inference import InferenceSession
+
+	inf = InferenceSession()
+	turno1 = {"legajo": "1234", "empleado_nombre": "Juan Perez", "motivo": "enfermedad_inculpable"}
+	turno2 = {"fecha_inicio": date.today().isoformat(), "duracion_estimdays": 2, "adjunto_certificado": "cert.pdf"}
+	inf.update(turno1)
+	inf.update(turno2)
+	antes = (dict(inf.facts), dict(inf.conclusions))
+
+	# D-FECHA-FIN desborda a mitad de turno (incremental y recálculo completo)
+	with pytest.raises(OverflowError):
+		inf.update({"duracion_estimdays": 10**9})
+	with pytest.raises(OverflowError):
+		inf.update({"motivo": "matrimonio", "duracion_estimdays": 10**9})
+	assert (inf.facts, inf.conclusions) == antes
+
+	res = inf.sync(dict(inf.facts) | {"motivo": "matrimonio"})
+	assert res["facts"]["documento_tipo"] == "acta_matrimonio"
+	assert res == forward_chain(turno1 | turno2 | {"motivo": "matrimonio"})
+
+
+def test_inference_session_incremental_igual_a_completo():
+	from src.engine.inference import InferenceSession
+
+	turnos = [
+		{"legajo": "1234", "empleado_nombre": "Juan Perez"},
+		{"motivo": "fallecimiento"},
+		{"fecha_inicio": (date.today() - timedelta(days=3)).isoformat(), "duracion_estimdays": 2},
+		{"avisos_abiertos": [{"id_aviso": "A1", "fecha_inicio": date.today().isoformat(), "fecha_fin": date.today().isoformat()}]},
+	]
+	inf = InferenceSession()
+	acumulado: dict = {}
+	for turno in turnos:
+		acumulado |= turno
+		res = inf.update(turno)
+		full = forward_chain(acumulado)
+		# Mismo orden de notificar_a y misma atribución de conclusiones
+		assert res["facts"] == full["facts"]
+		assert res["conclusiones"] == full["conclusiones"]
+	assert inf.stats["incremental"] >= 1
+
+
+def test_hechos_tipados_por_glosario_y_salida_iso():
+	inicio = date.today() - timedelta(days=5)
+	facts = _base_facts_ok() | {
+		"fecha_inicio": inicio,
+		"duracion_estimdays": "3",
+		"adjunto_certificado": "cert.pdf",
+		"fecha_recepcion": (inicio + timedelta(days=4)).isoformat(),
+		"plazo_cert_horas": "72",
+	}
+	vars_dict = forward_chain(facts)["facts"]
+	assert vars_dict["fecha_inicio"] == inicio.isoformat()
+	assert vars_dict["duracion_estimdays"] == 3
+	assert vars_dict["fecha_fin_estimada"] == (inicio + timedelta(days=3)).isoformat()
+	assert vars_dict["fuera_de_termino"] is True
+	assert "jefe_produccion" in vars_dict["notificar_a"]
+
+
+def test_planificador_punto_fijo_y_ciclo_cortado(monkeypatch):
+	from src.engine import inference
+	from src.engine.kb_loader import KnowledgeBase
+
+	res = forward_chain(_base_facts_ok())
+	assert res["fixpoint"]["alcanzado"] is True
+	assert res["fixpoint"]["ciclos_cortados"] == []
+
+	# Reglas que se realimentan sin converger: el ciclo se detecta y se corta
+	kb = load_knowledge_base()
+	loop = [
+		{"id": "L-A", "when": [{"var": "area", "op": "==", "value": "x"}], "then": [{"var": "empleado_nombre", "op": "set", "value": "n1"}]},
+		{"id": "L-B", "when": [{"var": "empleado_nombre", "op": "==", "value": "n1"}], "then": [{"var": "area", "op": "set", "value": "y"}]},
+		{"id": "L-C", "when": [{"var": "area", "op": "==", "value": "y"}], "then": [{"var": "empleado_nombre", "op": "set", "value": "n2"}]},
+		{"id": "L-D", "when": [{"var": "empleado_nombre", "op": "==", "value": "n2"}], "then": [{"var": "area", "op": "set", "value": "x"}]},
+	]
+	kb_loop = KnowledgeBase(glossary=kb.glossary, rules=loop, version=kb.version, fingerprint="loop")
+	monkeypatch.setattr(inference, "load_knowledge_base", lambda: kb_loop)
+	res = forward_chain({"area": "x"})
+	assert res["fixpoint"]["alcanzado"] is False
+	assert res["fixpoint"]["ciclos_cortados"]
+	# El tope solo alcanza a los nodos del ciclo (las derivaciones no están en él)
+	sched = inference._get_schedule(inference.get_rule_network(kb_loop))
+	assert {sched.node_id(n) for n in sched.cyclic} == {"L-A", "L-B", "L-C", "L-D"}
+	assert set(res["fixpoint"]["ciclos_cortados"]) <= {"L-A", "L-B", "L-C", "L-D"}
+
+	pytest.importorskip("numpy")
+	from src.engine.vectorized import forward_chain_columnar
+	lote = [{"area": "x"}, {"area": "y", "motivo": "matrimonio"}, {"area": "z"}, {"empleado_nombre": "n2"}]
+	assert forward_chain_columnar(lote, kb_loop) == [forward_chain(f) for f in lote]
+
+
+def test_cache_de_inferencia_desactivado_por_defecto_y_fuera_del_lote():
+	from src.engine import inference
+	from src.engine.inference import forward_chain_batch
+
+	assert inference.inference_cache_stats() == {"enabled": False}
+	inference.configure_inference_cache(maxsize=8, ttl=None)
+	try:
+		lote = [_base_facts_ok(), _base_facts_ok()]
+		assert list(forward_chain_batch(lote)) == [forward_chain(f) for f in lote]
+		# Solo las dos llamadas a forward_chain pasan por el cache
+		stats = inference.inference_cache_stats()
+		assert stats["hits"] + stats["misses"] == 2
+	finally:
+		inference.configure_inference_cache(maxsize=0)
+
+
+def test_cache_de_inferencia_clave_por_presencia():
+	from src.engine import inference
+
+	inference.configure_inference_cache(maxsize=8, ttl=None)
+	try:
+		# empleado_nombre solo se compara con None: otro nombre reutiliza la entrada
+		forward_chain(_base_facts_ok() | {"empleado_nombre": "Ana"})
+		beto = _base_facts_ok() | {"empleado_nombre": "Beto"}
+		res = forward_chain(beto)
+		assert inference.inference_cache_stats()["hits"] == 1
+		net = inference.get_rule_network(load_knowledge_base())
+		assert res == inference._forward_chain_typed(net, inference.coerce_facts(beto, net.var_types))
+		# Sin nombre es otra clave (dispara R-ID-PEND-LEG)
+		res = forward_chain(_base_facts_ok() | {"empleado_nombre": None})
+		assert inference.inference_cache_stats()["hits"] == 1
+		assert res["facts"]["estado_aviso"] == "pendiente_validacion"
+	finally:
+		inference.configure_inference_cache(maxsize=0)
+
+
+def test_cache_de_inferencia_hits_aislamiento_e_invalidacion():
+	from src.engine import inference
+
+	inference.configure_inference_cache(maxsize=2, ttl=None)
+	f1 = _base_facts_ok() | {"id_aviso": "A-1"}
+	f2 = _base_facts_ok() | {"id_aviso": "A-2"}  # id_aviso no lo lee el motor → mismo fingerprint
+	r1 = forward_chain(f1)
+	r1["facts"]["notificar_a"].append("x")
+	r2 = forward_chain(f2)
+	stats = inference.inference_cache_stats()
+	assert stats["hits"] == 1 and stats["misses"] == 1
+	assert r2["facts"]["id_aviso"] == "A-2"
+	assert "x" not in r2["facts"]["notificar_a"]
+	inference.clear_inference_cache()
+	assert forward_chain(f2) == r2
+
+	# El llamador no puede alterar la entrada cacheada (ni en un miss ni en un hit)
+	esperado = forward_chain(f1)
+	hit = forward_chain(f1)
+	assert hit == esperado
+	hit["facts"]["notificar_a"].append("y")
+	hit["conclusiones"][0]["hechos_usados"]["motivo"] = "otro"
+	hit["traces"].clear()
+	assert forward_chain(f1) == esperado
+	with pytest.raises(TypeError):
+		inference._store(hit, frozenset(hit["facts"]))["facts"]["motivo"] = "otro"
+
+	# Tamaño acotado (LRU)
+	forward_chain(_base_facts_ok() | {"motivo": "art"})
+	forward_chain(_base_facts_ok() | {"motivo": "matrimonio"})
+	assert inference.inference_cache_stats()["evictions"] >= 1
+
+	# Cambio de KB (otro fingerprint) → cache invalidado
+	inference._cache.bind("otra-kb")
+	assert inference.inference_cache_stats()["size"] == 0
+	inference.configure_inference_cache(maxsize=0)
+
+
+def test_metas_desde_tablas_y_camino_solo_slots():
+	from src.engine.goals import get_goal_tables
+
+	tables = get_goal_tables(load_knowledge_base())
+	assert {"crear_aviso", "adjuntar_certificado", "consultar_estado"} <= set(tables.goals)
+	res = backward_chain("adjuntar_certificado", {"legajo": "1234"}, infer=False)
+	assert res == {"status": "need_info", "ask": ["id_aviso", "fecha_inicio", "adjunto_certificado"]}
+	# Todo presente: sin forward chaining
+	assert backward_chain("crear_aviso", _base_facts_ok(), infer=False) == {"status": "ready"}
+	res = backward_chain("crear_aviso", _base_facts_ok() | {"motivo": "enfermedad_familiar", "vinculo_familiar": "tio"}, infer=False)
+	assert res["status"] == "no_match" and res["traces"][0]["regla_id"] == "R-VINC-ENF-FAM"
+	assert backward_chain("otra_meta", {}, infer=False)["status"] == "no_match"
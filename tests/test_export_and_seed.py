@@ -1,6 +1,8 @@
 from __future__ import annotations
 import os
 
+import pytest
+
 from src.persistence.seed import ensure_schema, seed_employees_synthetic
 from src.persistence.dao import session_scope
 from src.persistence.models import Employee
@@ -24,3 +26,86 @@ def test_export_all_csv_genera_5_archivos(tmp_path):
 		assert os.path.isfile(fp)
 
 
+def test_export_streaming_gzip_y_por_bloques(tmp_path):
+	import csv
+	import gzip
+
+	from src.persistence.models import Aviso
+
+	ensure_schema()
+	plain = export_all_csv(out_dir=str(tmp_path / "plain"))
+	comp = export_all_csv(out_dir=str(tmp_path / "gz"), compress=True, chunk_size=3, max_workers=2)
+	assert [os.path.basename(p) for p in comp][0] == "employees.csv.gz"
+	for p, g in zip(plain, comp):
+		with open(p, encoding="utf-8", newline="") as f1, gzip.open(g, "rt", encoding="utf-8", newline="") as f2:
+			assert f1.read() == f2.read()
+	with open(plain[1], encoding="utf-8", newline="") as f:
+		filas = list(csv.reader(f))
+	with session_scope() as s:
+		assert len(filas) - 1 == s.query(Aviso).count()
+	assert not any(n.endswith(".tmp") for n in os.listdir(tmp_path / "gz"))
+
+
+@pytest.fixture
+def bd_temporal(tmp_path, monkeypatch):
+	"""Base SQLite propia del test: no toca la test.db compartida."""
+	from sqlalchemy import create_engine
+
+	from src.persistence import absence_index, dao, seed
+
+	engine = create_engine(f"sqlite:///{tmp_path / 'temporal.db'}", future=True)
+	monkeypatch.setattr(dao, "_engine", engine)
+	monkeypatch.setattr(seed, "_engine", engine)
+	monkeypatch.setattr(absence_index, "_index", None)
+	ensure_schema()
+	yield engine
+	engine.dispose()
+
+
+def test_export_incremental_deltas_y_compactacion(tmp_path, bd_temporal):
+	import csv
+
+	from src.persistence.dao import create_aviso, update_certificado
+	from src.persistence.export_incremental import export_incremental
+
+	out = str(tmp_path / "inc")
+	r0 = export_incremental(out, compact_every=2)
+	assert r0["mode"] == "full" and len(r0["files"]) == 5
+	# Sin cambios: no hay deltas (employees va completo siempre)
+	r1 = export_incremental(out, compact_every=2)
+	assert r1["mode"] == "delta" and r1["rows"]["avisos"] == 0
+	ida = create_aviso({
+		"legajo": "L1008", "motivo": "enfermedad_inculpable", "fecha_inicio": "2033-04-01",
+		"duracion_estimdays": 1, "documento_tipo": "certificado_medico",
+	})["id_aviso"]
+	update_certificado(ida, {"archivo_nombre": "c.pdf", "documento_legible": True})
+	r2 = export_incremental(out, compact_every=2)
+	assert r2["mode"] == "delta" and r2["rows"]["avisos"] >= 1 and r2["rows"]["certificados"] >= 1
+	delta = next(p for p in r2["files"] if os.sep + "avisos" + os.sep in p)
+	with open(delta, encoding="utf-8", newline="") as f:
+		ids = [row[0] for row in list(csv.reader(f))[1:]]
+	assert ida in ids
+	# Tercera corrida: toca compactar (snapshot nuevo, sin deltas viejos)
+	r3 = export_incremental(out, compact_every=2)
+	assert r3["mode"] == "full"
+	assert not os.listdir(os.path.join(out, "avisos"))
+
+
+def test_export_columnar_tipado(tmp_path):
+	import pytest
+
+	pa = pytest.importorskip("pyarrow")
+	from src.persistence.export_powerbi import export_all_columnar
+	from src.persistence.models import Aviso
+
+	ensure_schema()
+	files = export_all_columnar(out_dir=str(tmp_path / "col"), fmt="arrow", row_group_size=2)
+	assert [os.path.basename(p) for p in files] == [
+		"employees.arrow", "avisos.arrow", "certificados.arrow", "notificaciones.arrow", "auditoria.arrow",
+	]
+	t = pa.ipc.open_file(files[1]).read_all()
+	assert pa.types.is_date32(t.schema.field("fecha_inicio").type)
+	assert pa.types.is_boolean(t.schema.field("adjunto").type)
+	assert pa.types.is_dictionary(t.schema.field("motivo").type)
+	with session_scope() as s:
+		assert t.num_rows == s.query(Aviso).count()
@@ -89,3 +89,34 @@ def test_parse_legajo_variants():
 	assert parse_legajo("L1000") is None
 
 
+
+
+def test_mensaje_tokenizado_compartido_entre_extractores():
+	from src.utils.normalize import parse_legajo, tokenize
+	lex = tokenize("  Mi LEGAJO es 1234, me caso el 17/08/2025 x3d  ")
+	assert lex.flat == "mi legajo es 1234, me caso el 17/08/2025 x3d"
+	assert tokenize(lex) is lex
+	assert lex.first_date == "2025-08-17"
+	assert lex.first_xnd == 3
+	res = extract_pairs(lex)
+	assert res == {"motivo": "matrimonio", "fecha_inicio": "2025-08-17", "legajo": "1234", "duracion_estimdays": 3}
+	assert parse_legajo(lex) == "1234"
+	assert sanitize_number_of_days(tokenize("durará 10 días")) == 10
+	assert parse_date(tokenize("17/08/2025")) == "2025-08-17"
+
+
+def test_match_motivo_aproximado_con_confianza(monkeypatch):
+	from src.utils import normalize
+	from src.utils.normalize import match_motivo, register_motivo_synonym
+	monkeypatch.setattr(normalize, "_MOTIVO_SYNONYMS", dict(normalize._MOTIVO_SYNONYMS))
+	assert match_motivo("fallecimiento") == ("fallecimiento", 1.0)
+	mot, conf = match_motivo("enfermedda")
+	assert mot == "enfermedad_inculpable" and 0.85 <= conf < 1.0
+	assert normalize_motivo("matrimnio") == "matrimonio"
+	# Textos cortos o lejanos no se aproximan
+	assert match_motivo("arte") == (None, 0.0)
+	assert match_motivo("quiero avisar") == (None, 0.0)
+	register_motivo_synonym("carpeta médica", "enfermedad_inculpable")
+	assert normalize_motivo("carpeta medica") == "enfermedad_inculpable"
+	assert normalize_motivo("carpeta medca") == "enfermedad_inculpable"
+	normalize._motivo_index = None
@@ -78,3 +78,263 @@ def test_adjuntar_certificado_y_cambiar_estado():
 	})
 	assert upd["estado_certificado"] == "validado"
 	assert upd["estado_aviso"] == "completo"
+
+
+def test_directorio_empleados_cache_y_negativo():
+	from src.persistence.directory import EmployeeDirectory
+	from src.persistence.models import Employee
+
+	ensure_schema()
+	with session_scope() as s:
+		if not s.get(Employee, "7001"):
+			s.add(Employee(legajo="7001", nombre="Activo", activo=True))
+		if not s.get(Employee, "7002"):
+			s.add(Employee(legajo="7002", nombre="Inactivo", activo=False))
+	d = EmployeeDirectory(ttl=300.0, negative_ttl=60.0)
+	assert d.is_valid("7001") and d.is_valid("7001")
+	assert not d.is_valid("7002")
+	assert not d.is_valid("7999") and not d.is_valid("7999")
+	st = d.stats()
+	assert st["refreshes"] == 1 and st["hits"] == 2 and st["negative_hits"] == 1
+	# Alta posterior a la carga: se encuentra con una consulta puntual
+	with session_scope() as s:
+		if not s.get(Employee, "7003"):
+			s.add(Employee(legajo="7003", nombre="Nuevo", activo=True))
+	assert d.is_valid("7003")
+	assert d.stats()["refreshes"] == 1
+
+
+def test_directorio_empleados_consulta_fuera_del_lock():
+	import threading
+
+	from src.persistence.directory import EmployeeDirectory
+	from src.persistence.models import Employee
+
+	ensure_schema()
+	with session_scope() as s:
+		if not s.get(Employee, "7001"):
+			s.add(Employee(legajo="7001", nombre="Activo", activo=True))
+	d = EmployeeDirectory()
+	assert d.is_valid("7001")
+	en_consulta, seguir = threading.Event(), threading.Event()
+	lookup = d._lookup
+
+	def lookup_lento(legajo):
+		en_consulta.set()
+		assert seguir.wait(5)
+		return lookup(legajo)
+
+	d._lookup = lookup_lento
+	t = threading.Thread(target=d.is_valid, args=("7998",))
+	t.start()
+	assert en_consulta.wait(5)
+	# Mientras un hilo consulta la base, los aciertos en cache no esperan
+	assert d.is_valid("7001")
+	d.invalidate()  # lo que devuelva la consulta en vuelo no se publica
+	seguir.set()
+	t.join(5)
+	assert "7998" not in d._negative
+	assert d.is_valid("7001") and d.stats()["refreshes"] == 2
+
+
+def test_secuencia_id_aviso_por_dia_y_bloques():
+	from src.persistence.dao import reserve_ids_aviso
+	from src.persistence.models import SecuenciaAviso
+
+	ensure_schema()
+	dia = date(2031, 1, 2)
+	with session_scope() as s:
+		s.query(Aviso).filter(Aviso.id_aviso.like("A-20310102-%")).delete(synchronize_session=False)
+		s.query(SecuenciaAviso).delete()  # tabla recién creada
+		s.add(Aviso(
+			id_aviso="A-20310102-0007", legajo="L1003", motivo="matrimonio",
+			fecha_inicio=dia, fecha_fin=dia, duracion_estimdays=1,
+		))
+	# Un aviso previo a la tabla de secuencias: ensure_schema alinea el contador
+	ensure_schema()
+	with session_scope() as s:
+		assert s.get(SecuenciaAviso, "20310102").ultimo == 7
+		assert reserve_ids_aviso(s, dia) == ["A-20310102-0008"]
+	# Con la tabla ya cargada no se vuelve a recorrer avisos
+	with session_scope() as s:
+		s.get(SecuenciaAviso, "20310102").ultimo = 0
+	ensure_schema()
+	with session_scope() as s:
+		assert s.get(SecuenciaAviso, "20310102").ultimo == 0
+		s.get(SecuenciaAviso, "20310102").ultimo = 8
+	with session_scope() as s:
+		assert reserve_ids_aviso(s, dia, 3) == ["A-20310102-0009", "A-20310102-0010", "A-20310102-0011"]
+	# Un bloque revertido no consume números
+	try:
+		with session_scope() as s:
+			reserve_ids_aviso(s, dia, 5)
+			raise RuntimeError("abortar")
+	except RuntimeError:
+		pass
+	with session_scope() as s:
+		assert reserve_ids_aviso(s, dia) == ["A-20310102-0012"]
+		s.query(Aviso).filter(Aviso.id_aviso.like("A-20310102-%")).delete(synchronize_session=False)
+
+
+def test_indices_y_solape_por_existencia():
+	from src.persistence.dao import _engine, exists_solape
+
+	ensure_schema()
+	with _engine.connect() as conn:
+		idx = {r[1] for r in conn.exec_driver_sql("PRAGMA index_list(avisos)").fetchall()}
+		assert {"ix_avisos_legajo_fechas", "ix_avisos_legajo_created"} <= idx
+		for table in ("certificados", "notificaciones"):
+			idx = {r[1] for r in conn.exec_driver_sql(f"PRAGMA index_list({table})").fetchall()}
+			assert f"ix_{table}_id_aviso" in idx
+		plan = conn.exec_driver_sql(
+			"EXPLAIN QUERY PLAN SELECT 1 FROM avisos WHERE legajo = 'L1004' "
+			"AND fecha_inicio <= '2025-09-05' AND fecha_fin >= '2025-09-01'"
+		).fetchall()
+		assert "ix_avisos_legajo_fechas" in " ".join(str(r[-1]) for r in plan)
+	with session_scope() as s:
+		s.query(Aviso).filter(Aviso.legajo == "L1004").delete()
+	create_aviso({"legajo": "L1004", "motivo": "matrimonio", "fecha_inicio": "2025-09-01", "duracion_estimdays": 2})
+	with session_scope() as s:
+		assert exists_solape(s, "L1004", date(2025, 9, 3), date(2025, 9, 5))  # toca el último día
+		assert not exists_solape(s, "L1004", date(2025, 9, 4), date(2025, 9, 6))
+		assert not exists_solape(s, "L1005", date(2025, 9, 1), date(2025, 9, 2))
+
+
+def test_create_avisos_bulk_reporte_por_fila():
+	from src.persistence.dao import create_avisos_bulk
+	from src.persistence.models import Certificado, Notificacion
+
+	ensure_schema()
+	with session_scope() as s:
+		s.query(Aviso).filter(Aviso.legajo.in_(["L1006", "L1007"])).delete(synchronize_session=False)
+	create_aviso({"legajo": "L1006", "motivo": "matrimonio", "fecha_inicio": "2032-03-01", "duracion_estimdays": 2})
+	rows = [
+		{"legajo": "L1007", "motivo": "art", "fecha_inicio": "2032-03-10", "duracion_estimdays": 3, "notificaciones": ["rrhh", "medico_laboral"]},
+		{"legajo": "L1006", "motivo": "art", "fecha_inicio": "2032-03-02", "duracion_estimdays": 1},  # solapa con la BD
+		{"legajo": "L1007", "motivo": "art", "fecha_inicio": "2032-03-12", "duracion_estimdays": 1},  # solapa con la fila 0
+		{"legajo": "L1007", "motivo": "enfermedad_inculpable"},
+		{
+			"legajo": "L1006", "motivo": "enfermedad_inculpable", "fecha_inicio": "2032-03-10", "duracion_estimdays": 1,
+			"documento_tipo": "certificado_medico",
+			"certificado": {"archivo_nombre": "c.pdf", "documento_legible": True, "fecha_recepcion": "2032-03-11"},
+		},
+	]
+	rep = create_avisos_bulk(rows, chunk_size=1)
+	assert [r["status"] for r in rep] == ["creado", "solape", "solape", "invalido", "creado"]
+	assert [r["index"] for r in rep] == [0, 1, 2, 3, 4]
+	assert rep[0]["id_aviso"].startswith("A-20320310-") and rep[4]["id_aviso"].startswith("A-20320310-")
+	assert rep[0]["id_aviso"] != rep[4]["id_aviso"]
+	with session_scope() as s:
+		av = s.get(Aviso, rep[4]["id_aviso"])
+		assert (av.adjunto, av.estado_certificado, av.estado_aviso) == (True, "validado", "completo")
+		assert s.query(Certificado).filter(Certificado.id_aviso == av.id_aviso).count() == 1
+		destinos = {n.destino for n in s.query(Notificacion).filter(Notificacion.id_aviso == rep[0]["id_aviso"])}
+		assert destinos == {"rrhh", "medico_laboral"}
+
+
+def test_create_avisos_bulk_fila_sin_fecha_inicio_no_corta_el_lote():
+	from src.persistence.dao import create_avisos_bulk
+
+	ensure_schema()
+	with session_scope() as s:
+		s.query(Aviso).filter(Aviso.legajo == "L1009").delete(synchronize_session=False)
+	rows = [
+		{"legajo": "L1009", "motivo": "matrimonio", "duracion_estimdays": 2},
+		{"legajo": "L1009", "motivo": "matrimonio", "fecha_inicio": "2032-05-01", "duracion_estimdays": 2},
+	]
+	rep = create_avisos_bulk(rows)
+	assert [r["status"] for r in rep] == ["invalido", "creado"]
+	assert "fecha_inicio" in rep[0]["error"]
+	with session_scope() as s:
+		assert s.query(Aviso).filter(Aviso.legajo == "L1009").count() == 1
+		s.query(Aviso).filter(Aviso.legajo == "L1009").delete(synchronize_session=False)
+
+
+def test_ausencias_diarias_incremental_y_rebuild():
+	from src.persistence.analytics import ausencias_por_dia, rebuild_ausencias_diarias
+	from src.persistence.models import Employee
+
+	ensure_schema()
+	with session_scope() as s:
+		s.query(Aviso).filter(Aviso.legajo.in_(["8001", "8002"])).delete(synchronize_session=False)
+		for leg, area in (("8001", "ventas"), ("8002", "logística")):
+			if not s.get(Employee, leg):
+				s.add(Employee(legajo=leg, nombre=f"Emp {leg}", area=area, turno="mañana"))
+	rebuild_ausencias_diarias()
+	d0, d9 = date(2034, 5, 1), date(2034, 5, 31)
+	a = create_aviso({
+		"legajo": "8001", "motivo": "enfermedad_inculpable", "fecha_inicio": "2034-05-01",
+		"duracion_estimdays": 2, "documento_tipo": "certificado_medico", "estado_aviso": "incompleto",
+	})
+	create_aviso({"legajo": "8002", "motivo": "matrimonio", "fecha_inicio": "2034-05-02", "duracion_estimdays": 1, "estado_aviso": "completo"})
+	por_area = ausencias_por_dia(d0, d9, group_by=("area",))
+	assert [(r["dia"].day, r["area"], r["ausentes"], r["inicios"]) for r in por_area] == [
+		(1, "ventas", 1, 1), (2, "logística", 1, 1), (2, "ventas", 1, 0), (3, "logística", 1, 0), (3, "ventas", 1, 0),
+	]
+	# El certificado validado mueve los días del aviso a estado "completo"
+	update_certificado(a["id_aviso"], {"archivo_nombre": "c.pdf", "documento_legible": True})
+	total = ausencias_por_dia(d0, d9, group_by=("estado_aviso",), por_dia=False)
+	assert total == [{"estado_aviso": "completo", "ausentes": 5, "inicios": 2}]
+	rebuild_ausencias_diarias()
+	assert ausencias_por_dia(d0, d9, group_by=("estado_aviso",), por_dia=False) == total
+	assert ausencias_por_dia(d0, d9, group_by=(), por_dia=False, area="ventas") == [{"ausentes": 3, "inicios": 1}]
+
+
+def test_indice_ausencias_por_fecha_rango_y_area():
+	from src.persistence.absence_index import AbsenceIndex, _build, _query, Ausencia
+	from src.persistence.dao import empleados_ausentes
+	from src.persistence.models import Employee
+
+	# Árbol contra fuerza bruta
+	import random
+	rnd = random.Random(7)
+	base = date(2035, 1, 1)
+	items = []
+	for i in range(300):
+		ini = base + timedelta(days=rnd.randrange(120))
+		items.append(Ausencia(ini, ini + timedelta(days=rnd.choice([0, 1, 3, 40])), str(i), f"A{i}", "art"))
+	tree = _build(items)
+	for _ in range(200):
+		d = base + timedelta(days=rnd.randrange(-5, 170))
+		h = d + timedelta(days=rnd.choice([0, 2, 15]))
+		got: list = []
+		_query(tree, d, h, got)
+		assert sorted(got) == sorted(a for a in items if a.inicio <= h and a.fin >= d)
+
+	ensure_schema()
+	with session_scope() as s:
+		s.query(Aviso).filter(Aviso.legajo.in_(["8101", "8102"])).delete(synchronize_session=False)
+		for leg, area in (("8101", "calidad"), ("8102", "rrhh")):
+			if not s.get(Employee, leg):
+				s.add(Employee(legajo=leg, nombre=f"Emp {leg}", area=area, turno="noche"))
+	create_aviso({"legajo": "8101", "motivo": "art", "fecha_inicio": "2036-02-10", "duracion_estimdays": 2})
+	assert [r["legajo"] for r in empleados_ausentes("2036-02-12", area="calidad")] == ["8101"]
+	# Alta posterior a la carga del índice: se ve sin recargar
+	create_aviso({"legajo": "8102", "motivo": "matrimonio", "fecha_inicio": "2036-02-12", "duracion_estimdays": 1})
+	assert {r["legajo"] for r in empleados_ausentes("2036-02-12")} >= {"8101", "8102"}
+	assert [r["legajo"] for r in empleados_ausentes("2036-02-13", turno="noche", area="rrhh")] == ["8102"]
+	assert [r["legajo"] for r in empleados_ausentes("2036-02-01", "2036-02-10", area="calidad")] == ["8101"]
+	assert empleados_ausentes("2036-02-14", area="calidad") == []
+	idx = AbsenceIndex()
+	assert [r["nombre"] for r in idx.ausentes(date(2036, 2, 11), area="calidad")] == ["Emp 8101"]
+
+
+def test_indice_ausencias_no_duplica_alta_ya_cargada():
+	from src.persistence.absence_index import AbsenceIndex
+	from src.persistence.models import Employee
+
+	ensure_schema()
+	with session_scope() as s:
+		s.query(Aviso).filter(Aviso.legajo == "8103").delete(synchronize_session=False)
+		if not s.get(Employee, "8103"):
+			s.add(Employee(legajo="8103", nombre="Emp 8103", area="mantenimiento", turno="tarde"))
+	ida = create_aviso({"legajo": "8103", "motivo": "art", "fecha_inicio": "2036-03-02", "duracion_estimdays": 1})["id_aviso"]
+	with session_scope() as s:
+		av = s.get(Aviso, ida)
+		alta = {"id_aviso": ida, "legajo": av.legajo, "motivo": av.motivo, "fecha_inicio": av.fecha_inicio, "fecha_fin": av.fecha_fin}
+	# La recarga ya leyó el aviso; la notificación del alta llega después
+	idx = AbsenceIndex()
+	assert [r["id_aviso"] for r in idx.ausentes(date(2036, 3, 2), area="mantenimiento")] == [ida]
+	idx.add([alta, alta])
+	assert [r["id_aviso"] for r in idx.ausentes(date(2036, 3, 2), area="mantenimiento")] == [ida]
+	assert idx.stats()["added"] == 0
@@ -0,0 +1,106 @@
+from src.session_store import SessionStore
+
+
+class _Clock:
+	def __init__(self) -> None:
+		self.t = 0.0
+
+	def __call__(self) -> float:
+		return self.t
+
+
+def test_session_store_lru_ttl_y_metricas():
+	clock = _Clock()
+	store = SessionStore(maxsize=2, ttl=100.0, clock=clock)
+	store["a"] = {"facts": {"legajo": "1111"}}
+	store["b"] = {"facts": {}}
+	assert store.get("a")["facts"]["legajo"] == "1111"  # "a" pasa a ser la más reciente
+	store["c"] = {"facts": {}}
+	assert "b" not in store and "a" in store and "c" in store
+	clock.t = 150.0
+	assert store.get("a") is None  # inactiva más que el TTL
+	stats = store.stats()
+	assert stats["evictions"] == 1 and stats["expirations"] == 1
+	assert stats["live"] == 1 and stats["bytes_estimate"] > 0
+
+
+def test_session_store_compacta_claves_transitorias():
+	clock = _Clock()
+	store = SessionStore(maxsize=10, ttl=None, transient=("_inference",), compact_after=60.0, clock=clock)
+	store.get_or_create("s1", lambda: {"facts": {"x": 1}, "_inference": object()})
+	store.get_or_create("s2", lambda: {"facts": {}, "_inference": object()})
+	clock.t = 30.0
+	store.get("s2")
+	clock.t = 70.0
+	store.sweep()
+	assert "_inference" not in store["s1"] and store["s1"]["facts"] == {"x": 1}
+	assert "_inference" in store["s2"]
+	assert store.stats(with_bytes=False)["compactions"] == 1
+
+
+def test_backend_sqlite_sobrevive_reinicio_y_carga_perezosa(tmp_path):
+	from src.dialogue.manager import DialogueManager
+	from src.session_backends import SQLiteSessionBackend
+
+	path = tmp_path / "sessions.db"
+	b1 = SQLiteSessionBackend(path, flush_interval=0.01)
+	mgr = DialogueManager(backend=b1)
+	mgr.set_legajo_validado("chat-1", "1111")
+	mgr.process_message("chat-1", "motivo: matrimonio")
+	assert "_inference" in mgr.sessions["chat-1"]
+	b1.close()
+	assert b1.stats["batches"] >= 1 and b1.stats["errors"] == 0
+
+	# "Reinicio": backend y manager nuevos, la sesión se carga en el primer acceso
+	b2 = SQLiteSessionBackend(path)
+	mgr2 = DialogueManager(backend=b2)
+	assert len(mgr2.sessions) == 0
+	sess = mgr2.sessions["chat-1"]
+	assert sess["legajo_validado"] == "1111"
+	assert sess["facts"]["motivo"] == "matrimonio"
+	assert "_inference" not in sess
+	assert mgr2.sessions.stats(with_bytes=False)["loads"] == 1
+
+	# Borrado y expiración
+	store = SessionStore(ttl=0.0, backend=b2, namespace="dialogo")
+	assert store.get("chat-1") is None  # más viejo que el TTL
+	mgr2.sessions.pop("chat-1")
+	b2.flush()
+	assert b2.load("dialogo", "chat-1") is None
+	b2.close()
+
+
+def test_backend_sqlite_reintenta_lote_fallido_sin_pisar_escrituras_nuevas(tmp_path):
+	import sqlite3
+
+	from src.session_backends import SQLiteSessionBackend
+
+	b = SQLiteSessionBackend(tmp_path / "sessions.db", flush_interval=0.01)
+	real = b._conn
+
+	class _FallaUnaVez:
+		def __init__(self) -> None:
+			self.fallos = 0
+
+		def execute(self, *args):
+			return real.execute(*args)
+
+		def executemany(self, *args):
+			if not self.fallos:
+				self.fallos += 1
+				# Llega una escritura más nueva de "a" mientras el lote está en vuelo
+				b.save("dialogo", "a", {"v": 2})
+				raise sqlite3.OperationalError("database is locked")
+			return real.executemany(*args)
+
+	b._conn = _FallaUnaVez()
+	b.save("dialogo", "a", {"v": 1})
+	b.save("dialogo", "b", {"v": 1})
+	b.flush()  # vuelve tras el fallo; el lote quedó en la cola
+	assert b.stats["errors"] == 1 and b.stats["requeued"] == 1
+	b.flush()
+	b._conn = real
+	assert b.stats["batches"] == 1
+	assert b.load("dialogo", "a") == {"v": 2}
+	assert b.load("dialogo", "b") == {"v": 1}
+	b.close()